@@ -3,6 +3,16 @@ from flask_cors import CORS
 from app.models.data_loader import MovieDataStore
 from app.models.users import User
 from app.services.recommender import MovieRecommender
+from app.services.catalog_sync import CatalogSync
+from app.services.artifacts import ArtifactStore
+from app.services.interactions import InteractionMatrix
+from app.services.search_engine import SearchEngine
+from app.services.autocomplete import Autocomplete
+from app.services.response_cache import ResponseCache
+from app.services.quiz_cache import QuizCandidateCache
+from app.services.user_feed import UserFeeds
+from app.services.jobs import JobScheduler, SQLiteJobLog
+from app.services.shared_catalog import SharedCatalog
 from .routes.movies import movies_bp, favorites_bp
 from .routes.recommendations import recommendations_bp
 from .routes.main import main_bp
@@ -65,16 +75,84 @@ def create_app():
     app.register_blueprint(admin_bp)
 
     
+    # Prebuilt model artifacts (see build_models.py), memory-mapped by every worker
+    app.config.setdefault('MODEL_DIR', os.path.join(app.instance_path, 'models'))
+    artifacts = ArtifactStore(app.config['MODEL_DIR'])
+    app.config['MODEL_ARTIFACTS'] = artifacts
+    # IVF lists probed per approximate-similarity query (None: index default); the recall/latency knob
+    app.config.setdefault('ANN_NPROBE', None)
+    # Optional LSA stage: dense TF-IDF embeddings of this many dimensions (0 disables)
+    app.config.setdefault('CONTENT_LSA_DIM', 0)
+    # Content similarity weight per field, e.g. {"genres": 1.0, "director": 0.5, "cast": 0.75, "text": 1.5}
+    app.config.setdefault('CONTENT_FIELD_WEIGHTS', None)
+    # Per-source deadline (seconds) inside hybrid recommendations
+    app.config.setdefault('HYBRID_SOURCE_TIMEOUT', 0.5)
+    # Serialized responses of the catalog read endpoints (0 entries disables the cache)
+    app.config.setdefault('RESPONSE_CACHE_SIZE', 1024)
+    app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+    # Publish the catalog columns under MODEL_DIR and map them read-only in every worker process
+    app.config.setdefault('SHARED_CATALOG', True)
+    shared_catalog = SharedCatalog(artifacts) if app.config['SHARED_CATALOG'] else None
+
     migrate = Migrate(app, db)
     with app.app_context():
         db.create_all()
         store = MovieDataStore()
-        recommender = MovieRecommender(movies=store.get_all_movies(), user_interactions={})
+        if shared_catalog is not None:
+            shared_catalog.load(store)
+        else:
+            store.load_movies()
+        recommender = MovieRecommender(movies=store, user_interactions={}, artifacts=artifacts)
+        recommender.lsa_dim = app.config['CONTENT_LSA_DIM']
+        recommender.field_weights = app.config['CONTENT_FIELD_WEIGHTS']
+        recommender.source_timeout = app.config['HYBRID_SOURCE_TIMEOUT']
+        recommender.ann_nprobe = app.config['ANN_NPROBE']
+        recommender.preload_content()
+        recommender.set_interactions(InteractionMatrix.load())
+        recommender.load_cf_models()
+        # Postings are built once here and then extended as catalog deltas arrive
+        search_engine = SearchEngine(store)
+        search_engine.index()
+        autocomplete = Autocomplete(store)
+        autocomplete.index()
     
     app.config['MOVIE_STORE'] = store
+    app.config['SEARCH_ENGINE'] = search_engine
+    app.config['AUTOCOMPLETE'] = autocomplete
+    app.config['RESPONSE_CACHE'] = (ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+                                    if app.config['RESPONSE_CACHE_SIZE'] else None)
     app.config['RECOMMENDER'] = recommender
     app.config['USER_INTERACTIONS'] = {}
 
+    # Catalog change feed: deltas every CATALOG_POLL_SECONDS, full refit at most every CATALOG_REBUILD_SECONDS
+    app.config.setdefault('CATALOG_POLL_SECONDS', 30)
+    app.config.setdefault('CATALOG_REBUILD_SECONDS', 3600)
+    app.config.setdefault('INTERACTIONS_REFRESH_SECONDS', 300)
+    catalog_sync = CatalogSync(store, recommender,
+                               poll_interval=app.config['CATALOG_POLL_SECONDS'],
+                               rebuild_interval=app.config['CATALOG_REBUILD_SECONDS'],
+                               interactions_interval=app.config['INTERACTIONS_REFRESH_SECONDS'],
+                               shared=shared_catalog)
+    app.config['CATALOG_SYNC'] = catalog_sync
+    app.config['QUIZ_CACHE'] = catalog_sync.quiz_cache = QuizCandidateCache(store, search_engine, recommender)
+
+    # Background jobs: rebuilds, model training and feed refreshes never run on request threads.
+    # JOB_PROCESS_WORKERS > 0 trains CF models in worker processes; JOB_QUEUE_DB persists admin jobs.
+    app.config.setdefault('JOB_WORKERS', 2)
+    app.config.setdefault('JOB_PROCESS_WORKERS', 0)
+    app.config.setdefault('JOB_QUEUE_DB', None)
+    scheduler = JobScheduler(app, workers=app.config['JOB_WORKERS'],
+                             process_workers=app.config['JOB_PROCESS_WORKERS'],
+                             log=SQLiteJobLog(app.config['JOB_QUEUE_DB']) if app.config['JOB_QUEUE_DB'] else None)
+    app.config['JOB_SCHEDULER'] = scheduler
+    catalog_sync.register_jobs(scheduler)
+    # Per-user /personalized feeds, recomputed in the background after ratings, favorites and quizzes
+    app.config.setdefault('USER_FEED_MAX_AGE', 3600)
+    app.config['USER_FEEDS'] = UserFeeds(scheduler, store, recommender, app.config['QUIZ_CACHE'],
+                                         max_age=app.config['USER_FEED_MAX_AGE'])
+    scheduler.start()
+    catalog_sync.start(app)
+
     
     @app.route('/admin-login')
     def admin_login_page():
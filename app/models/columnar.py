@@ -0,0 +1,426 @@
+"""
+Columnar storage for the in-memory movie catalog.
+
+The catalog is held as typed NumPy columns instead of a list of dicts: numbers
+in plain arrays, text in offset-addressed UTF-8 pools, genres and directors as
+interned integer codes. Rows are only turned back into dicts for the movies a
+response actually returns.
+"""
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+# Same keys, same order as Movie.to_dict()
+FIELDS = ("id", "title", "genres", "rating", "year", "runtime", "director", "cast",
+          "plot", "keywords", "popularity", "img", "poster_filename", "created_at")
+TEXT_FIELDS = ("title", "genres", "cast", "plot", "keywords", "img", "poster_filename", "created_at")
+
+MISSING_INT = -1
+
+
+def split_genres(genres):
+    """Split a 'Action, Crime, Drama' string into clean genre names"""
+    return [g.strip() for g in str(genres or "").split(",") if g.strip()]
+
+
+# ===== Building Blocks =====
+class StringPool:
+    """UTF-8 strings packed into one byte buffer and addressed by offsets"""
+
+    def __init__(self, data, offsets, nulls):
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def from_values(cls, values):
+        values = list(values)
+        encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        nulls = np.array([v is None for v in values], dtype=bool)
+        return cls(data, offsets, nulls)
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def get(self, i):
+        if self.nulls[i]:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def extend(self, other):
+        return StringPool(
+            np.concatenate([self.data, other.data]),
+            np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]),
+            np.concatenate([self.nulls, other.nulls]),
+        )
+
+
+class RaggedCodes:
+    """A variable-length list of int32 codes per row (flat codes + offsets)"""
+
+    def __init__(self, codes, offsets):
+        self.codes = codes
+        self.offsets = offsets
+        self._owners = None
+
+    @classmethod
+    def from_lists(cls, lists):
+        lists = list(lists)
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        if lists:
+            np.cumsum([len(c) for c in lists], out=offsets[1:])
+        codes = np.fromiter((c for row in lists for c in row), dtype=np.int32, count=int(offsets[-1]))
+        return cls(codes, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, i):
+        return self.codes[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def owners(self):
+        """Row number of every flat code"""
+        if self._owners is None:
+            self._owners = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+        return self._owners
+
+    def rows_with_any(self, codes):
+        """Boolean row mask: True where the row holds at least one of `codes`"""
+        mask = np.zeros(len(self), dtype=bool)
+        if len(codes):
+            mask[self.owners[np.isin(self.codes, codes)]] = True
+        return mask
+
+    def extend(self, other):
+        return RaggedCodes(
+            np.concatenate([self.codes, other.codes]),
+            np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]),
+        )
+
+
+class Vocabulary:
+    """Interned string values with stable integer codes.
+
+    Codes are only ever appended, so a vocabulary can be shared by several
+    column snapshots.
+    """
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.index = {v: i for i, v in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def code(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.index[value] = code
+        return code
+
+    def codes_matching(self, text):
+        """Codes whose (lowercased) value contains `text`"""
+        text = str(text or "").lower().strip()
+        return np.array([i for i, v in enumerate(self.values) if text in v.lower()], dtype=np.int32)
+
+
+class IdIndex:
+    """movie id -> row number, answered with array lookups instead of scans.
+
+    Dense id ranges (the usual autoincrement case) get a direct-address table;
+    sparse ones fall back to a binary search over the sorted ids.
+    """
+
+    def __init__(self, ids, rows):
+        self.table = None
+        if len(ids) and ids.min() >= 0 and ids.max() <= 4 * len(ids) + 1024:
+            self.table = np.full(int(ids.max()) + 1, MISSING_INT, dtype=np.int64)
+            self.table[ids] = rows
+        else:
+            order = np.argsort(ids, kind="stable")
+            self.sorted_ids = ids[order]
+            self.sorted_rows = rows[order]
+
+    def lookup(self, ids):
+        """Row numbers for `ids` (array-like of ints); MISSING_INT where unknown"""
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        if self.table is not None:
+            rows = np.full(len(ids), MISSING_INT, dtype=np.int64)
+            valid = (ids >= 0) & (ids < len(self.table))
+            rows[valid] = self.table[ids[valid]]
+            return rows
+        if not len(self.sorted_ids):
+            return np.full(len(ids), MISSING_INT, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.sorted_ids, ids), len(self.sorted_ids) - 1)
+        return np.where(self.sorted_ids[pos] == ids, self.sorted_rows[pos], MISSING_INT)
+
+    def row(self, movie_id):
+        row = int(self.lookup([movie_id])[0])
+        return None if row == MISSING_INT else row
+
+
+def coerce_ids(ids):
+    """Int array from ids that may arrive as ints or numeric strings; junk is dropped"""
+    clean = []
+    for movie_id in ids:
+        try:
+            clean.append(int(movie_id))
+        except (TypeError, ValueError):
+            continue
+    return np.array(clean, dtype=np.int64)
+
+
+# ===== Column Snapshot =====
+class MovieColumns:
+    """Immutable snapshot of the catalog as typed columns.
+
+    Rows are append-only. A deleted movie is only marked dead in `alive`, and
+    an edited one is retired and appended again, so a row number handed out by
+    one snapshot stays valid in every later snapshot of the same generation.
+    """
+
+    def __init__(self, ids, rating, year, runtime, popularity, director_codes, genre_codes,
+                 text, alive, directors, genre_vocab, generation=0):
+        self.ids = ids
+        self.rating = rating
+        self.year = year
+        self.runtime = runtime
+        self.popularity = popularity
+        self.director_codes = director_codes
+        self.genre_codes = genre_codes
+        self.text = text
+        self.alive = alive
+        self.directors = directors
+        self.genre_vocab = genre_vocab
+        self.generation = generation
+        self._cache = {}
+
+    @classmethod
+    def from_dicts(cls, movies, directors=None, genre_vocab=None, generation=0):
+        """Build columns from an iterable of Movie.to_dict()-shaped dicts"""
+        directors = directors if directors is not None else Vocabulary()
+        genre_vocab = genre_vocab if genre_vocab is not None else Vocabulary()
+
+        numbers = {"id": [], "rating": [], "year": [], "runtime": [], "popularity": []}
+        texts = {field: [] for field in TEXT_FIELDS}
+        director_codes, genre_lists = [], []
+        for movie in movies:
+            for field, values in numbers.items():
+                values.append(movie.get(field))
+            for field, values in texts.items():
+                values.append(movie.get(field))
+            director = movie.get("director")
+            director_codes.append(MISSING_INT if director is None else directors.code(director))
+            genre_lists.append([genre_vocab.code(g) for g in split_genres(movie.get("genres"))])
+
+        n = len(director_codes)
+        return cls(
+            ids=np.array(numbers["id"], dtype=np.int64),
+            rating=_float_column(numbers["rating"]),
+            year=_int_column(numbers["year"]),
+            runtime=_int_column(numbers["runtime"]),
+            popularity=_float_column(numbers["popularity"]),
+            director_codes=np.array(director_codes, dtype=np.int32),
+            genre_codes=RaggedCodes.from_lists(genre_lists),
+            text={field: StringPool.from_values(values) for field, values in texts.items()},
+            alive=np.ones(n, dtype=bool),
+            directors=directors,
+            genre_vocab=genre_vocab,
+            generation=generation,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ===== Derived Data =====
+    def cached(self, key, build):
+        """Memoize something derived from this snapshot (rankings, masks, ...)"""
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = build()
+        return value
+
+    def view_rows(self):
+        """Live rows in catalog (id) order"""
+        def build():
+            rows = np.flatnonzero(self.alive)
+            return rows[np.argsort(self.ids[rows], kind="stable")]
+        return self.cached("view_rows", build)
+
+    def id_index(self):
+        """Shared id -> row index over live rows"""
+        def build():
+            rows = np.flatnonzero(self.alive)
+            return IdIndex(self.ids[rows], rows)
+        return self.cached("id_index", build)
+
+    def rows_for_ids(self, ids):
+        """Live row numbers for `ids`, in input order, unknown ids dropped"""
+        rows = self.id_index().lookup(coerce_ids(ids))
+        return rows[rows != MISSING_INT]
+
+    def genre_mask(self, genre):
+        """Rows whose genres contain `genre` (case-insensitive substring, like the old scans)"""
+        return self.genre_codes.rows_with_any(self.genre_vocab.codes_matching(genre))
+
+    def ratings_or_zero(self):
+        return self.cached("ratings_or_zero", lambda: np.nan_to_num(self.rating, nan=0.0))
+
+    def popularity_or_zero(self):
+        return self.cached("popularity_or_zero", lambda: np.nan_to_num(self.popularity, nan=0.0))
+
+    # ===== Row Access =====
+    def field(self, i, name):
+        if name in self.text:
+            return self.text[name].get(i)
+        if name == "id":
+            return int(self.ids[i])
+        if name == "rating":
+            return _py_float(self.rating[i])
+        if name == "popularity":
+            return _py_float(self.popularity[i])
+        if name == "year":
+            return _py_int(self.year[i])
+        if name == "runtime":
+            return _py_int(self.runtime[i])
+        if name == "director":
+            code = self.director_codes[i]
+            return None if code == MISSING_INT else self.directors[code]
+        raise KeyError(name)
+
+    def row_dict(self, i):
+        return {name: self.field(i, name) for name in FIELDS}
+
+    def to_dicts(self, rows):
+        return [self.row_dict(int(i)) for i in rows]
+
+    # ===== Serialization =====
+    def to_arrays(self):
+        """(arrays, meta) holding the whole snapshot; derived caches are left out"""
+        arrays = {
+            "ids": self.ids, "rating": self.rating, "year": self.year, "runtime": self.runtime,
+            "popularity": self.popularity, "director_codes": self.director_codes, "alive": self.alive,
+            "genre_codes": self.genre_codes.codes, "genre_offsets": self.genre_codes.offsets,
+        }
+        for field, pool in self.text.items():
+            arrays[f"text_{field}_data"] = pool.data
+            arrays[f"text_{field}_offsets"] = pool.offsets
+            arrays[f"text_{field}_nulls"] = pool.nulls
+        meta = {"directors": list(self.directors.values), "genre_vocab": list(self.genre_vocab.values),
+                "text_fields": list(self.text), "generation": self.generation}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """Snapshot over existing arrays (e.g. read-only memory maps), without copying them"""
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        text = {field: StringPool(arrays[f"text_{field}_data"], arrays[f"text_{field}_offsets"],
+                                  arrays[f"text_{field}_nulls"]) for field in meta["text_fields"]}
+        return cls(
+            ids=arrays["ids"], rating=arrays["rating"], year=arrays["year"], runtime=arrays["runtime"],
+            popularity=arrays["popularity"], director_codes=arrays["director_codes"],
+            genre_codes=RaggedCodes(arrays["genre_codes"], arrays["genre_offsets"]),
+            text=text, alive=arrays["alive"],
+            directors=Vocabulary(meta["directors"]), genre_vocab=Vocabulary(meta["genre_vocab"]),
+            generation=meta["generation"],
+        )
+
+    # ===== Deltas =====
+    def extend(self, movies):
+        """New snapshot with `movies` (dicts) appended as fresh rows"""
+        added = MovieColumns.from_dicts(movies, self.directors, self.genre_vocab, self.generation)
+        return MovieColumns(
+            ids=np.concatenate([self.ids, added.ids]),
+            rating=np.concatenate([self.rating, added.rating]),
+            year=np.concatenate([self.year, added.year]),
+            runtime=np.concatenate([self.runtime, added.runtime]),
+            popularity=np.concatenate([self.popularity, added.popularity]),
+            director_codes=np.concatenate([self.director_codes, added.director_codes]),
+            genre_codes=self.genre_codes.extend(added.genre_codes),
+            text={field: pool.extend(added.text[field]) for field, pool in self.text.items()},
+            alive=np.concatenate([self.alive, added.alive]),
+            directors=self.directors,
+            genre_vocab=self.genre_vocab,
+            generation=self.generation,
+        )
+
+    def retire(self, rows):
+        """New snapshot with `rows` marked dead"""
+        alive = self.alive.copy()
+        alive[np.asarray(rows, dtype=np.int64)] = False
+        return MovieColumns(
+            self.ids, self.rating, self.year, self.runtime, self.popularity, self.director_codes,
+            self.genre_codes, self.text, alive, self.directors, self.genre_vocab, self.generation,
+        )
+
+
+# ===== Lazy Views =====
+class MovieRecord(Mapping):
+    """Read-only, dict-like view of one row; fields are decoded on access"""
+    __slots__ = ("columns", "row")
+
+    def __init__(self, columns, row):
+        self.columns = columns
+        self.row = row
+
+    def __getitem__(self, name):
+        return self.columns.field(self.row, name)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def to_dict(self):
+        return self.columns.row_dict(self.row)
+
+
+class MovieListView(Sequence):
+    """List-like compatibility view that materializes dicts on access"""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.columns.to_dicts(self.rows[index])
+        return self.columns.row_dict(int(self.rows[index]))
+
+    def __iter__(self):
+        for i in self.rows:
+            yield self.columns.row_dict(int(i))
+
+    def copy(self):
+        return list(self)
+
+
+# ===== Helpers =====
+def _float_column(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _int_column(values):
+    return np.array([MISSING_INT if v is None else v for v in values], dtype=np.int32)
+
+
+def _py_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _py_int(value):
+    return None if value == MISSING_INT else int(value)
@@ -1,19 +1,129 @@
-from app.models.movie import Movie
+import threading
+
+from sqlalchemy import func
+
+from app.database import db
+from app.models.movie import Movie, CatalogChange
+from app.models.columnar import MovieColumns, MovieListView, MovieRecord
+
+# Columns needed to rebuild Movie.to_dict() without loading ORM objects
+LOAD_COLUMNS = ("id", "title", "genres", "rating", "year", "runtime", "director", "cast", "plot",
+                "keywords", "popularity", "img", "poster_filename", "created_at")
+LOAD_BATCH_SIZE = 5000
+
+
+def movie_row_to_dict(row):
+    """Same shape as Movie.to_dict(), built from a plain column row"""
+    movie = dict(zip(LOAD_COLUMNS, row))
+    movie["img"] = Movie.image_url(movie["poster_filename"], movie["img"])
+    movie["created_at"] = movie["created_at"].isoformat() if movie["created_at"] else None
+    return movie
+
+
+def apply_delta(columns, upserts, deleted_ids):
+    """New snapshot of the same generation: old rows of touched ids retired, new versions appended"""
+    touched = [m["id"] for m in upserts] + list(deleted_ids)
+    columns = columns.retire(columns.rows_for_ids(touched))
+    if upserts:
+        columns = columns.extend(upserts)
+    return columns
+
+
 class MovieDataStore:
+    """In-memory catalog held as typed columns (see app.models.columnar).
+
+    `version` is the last CatalogChange id folded into the columns; see
+    CatalogSync for how deltas and full rebuilds reach the store.
+    """
+
     def __init__(self):
-        self.movies = []
+        self._columns = None
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dicts(cls, movies):
+        """Store over an existing list of movie dicts (no database needed)"""
+        store = cls()
+        store._columns = MovieColumns.from_dicts(movies)
+        return store
 
     def load_movies(self):
-        from app.models.movie import Movie  # if not already imported
-        self.movies = [m.to_dict() for m in Movie.query.all()]  # ✅ clean dict
-        
+        columns, version = self.build_columns()
+        self.install(columns, version)
 
-    def get_all_movies(self):
-        if not self.movies:
+    def build_columns(self, generation=None):
+        """Read the whole catalog into a fresh snapshot, without installing it"""
+        if generation is None:
+            generation = self._columns.generation + 1 if self._columns is not None else 0
+        # Read the version first: changes racing the load are simply replayed (upserts are idempotent)
+        version = self.latest_version()
+        query = db.session.query(*[getattr(Movie, c) for c in LOAD_COLUMNS]).order_by(Movie.id)
+        columns = MovieColumns.from_dicts((movie_row_to_dict(r) for r in query.yield_per(LOAD_BATCH_SIZE)),
+                                          generation=generation)
+        return columns, version
+
+    @staticmethod
+    def latest_version():
+        """Id of the newest CatalogChange (0 when there are none)"""
+        return db.session.query(func.max(CatalogChange.id)).scalar() or 0
+
+    @staticmethod
+    def catalog_stamp():
+        """[latest change id, movie count, max movie id]: cheap check that a saved snapshot still matches"""
+        count, max_id = db.session.query(func.count(Movie.id), func.max(Movie.id)).one()
+        return [MovieDataStore.latest_version(), count, max_id or 0]
+
+    @staticmethod
+    def snapshot_stamp(columns, version):
+        """catalog_stamp() as it would read if the database held exactly `columns` at `version`"""
+        rows = columns.view_rows()
+        return [version, len(rows), int(columns.ids[rows].max()) if len(rows) else 0]
+
+    def install(self, columns, version):
+        with self._lock:
+            self._columns = columns
+            self.version = version
+
+    def apply_changes(self, upserts, deleted_ids, version):
+        """Apply a catalog delta: retire old rows of touched ids, append the new versions"""
+        if self._columns is None:
+            self.load_movies()
+        with self._lock:
+            columns = self._columns = apply_delta(self._columns, upserts, deleted_ids)
+            self.version = max(self.version, version)
+        return columns
+
+    @property
+    def columns(self):
+        if self._columns is None:
             self.load_movies()
-        return self.movies
+        return self._columns
+
+    # ===== Row Access =====
+    def get_all_movies(self):
+        """List-like view of every movie; dicts are built only for the rows you touch"""
+        columns = self.columns
+        return MovieListView(columns, columns.view_rows())
+
+    def records(self, rows=None):
+        """Lazy per-row mappings, for scans that only read a few fields"""
+        columns = self.columns
+        rows = columns.view_rows() if rows is None else rows
+        return (MovieRecord(columns, int(i)) for i in rows)
+
+    def materialize(self, rows):
+        return self.columns.to_dicts(rows)
+
+    def count(self):
+        return len(self.columns.view_rows())
 
     def get_movie_by_id(self, movie_id):
-        from app.models.movie import Movie
-        movie = Movie.query.get(movie_id)
-        return movie.to_dict() if movie else None  # ✅ safe
\ No newline at end of file
+        columns = self.columns
+        rows = columns.rows_for_ids([movie_id])
+        return columns.row_dict(int(rows[0])) if len(rows) else None  # ✅ safe
+
+    def get_many(self, ids):
+        """Batch lookup: dicts for the known `ids`, in the order given"""
+        columns = self.columns
+        return columns.to_dicts(columns.rows_for_ids(ids))
@@ -1,5 +1,6 @@
 from app.database import db
 from datetime import datetime
+from sqlalchemy import event
 
 class Movie(db.Model):
     __tablename__ = "movies"
@@ -49,15 +50,20 @@ class Movie(db.Model):
         Generate correct URL for the movie poster
         Since static/ is at same level as app/, use relative path
         """
-        if self.poster_filename:
+        return self.image_url(self.poster_filename, self.img)
+
+    @staticmethod
+    def image_url(poster_filename, img):
+        """Poster URL from raw column values (usable without a Movie instance)"""
+        if poster_filename:
             # ✅ CORRECT PATH: Go up from app/ to Movie-Mind/, then into static/
-            return f"/static/images/posters/{self.poster_filename}"
-        elif self.img:
+            return f"/static/images/posters/{poster_filename}"
+        elif img:
             # During transition
-            if self.img.startswith('/static/'):
-                return self.img
+            if img.startswith('/static/'):
+                return img
             # TMDB URL (temporary)
-            return self._fix_image_url(self.img)
+            return Movie._fix_image_url(img)
         else:
             # Placeholder
             return "/static/images/poster-not-available.jpg"
@@ -67,4 +73,37 @@ class Movie(db.Model):
         """Backward compatibility for TMDB URLs"""
         if img and not img.startswith('http') and not img.startswith('/static/'):
             return f"https://image.tmdb.org/t/p/w500{img}"
-        return img
\ No newline at end of file
+        return img
+
+
+class CatalogChange(db.Model):
+    """Append-only change feed for the movies table.
+
+    The autoincrement id doubles as the catalog version: in-memory copies of
+    the catalog remember the last id they applied and replay anything newer.
+    Ids must therefore never be reused, even after old rows are pruned.
+    """
+    __tablename__ = "catalog_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    movie_id = db.Column(db.Integer, nullable=False, index=True)
+    op = db.Column(db.String(10), nullable=False)  # "upsert" or "delete"
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+def _log_catalog_change(connection, movie_id, op):
+    # Written on the flush connection, so it commits or rolls back with the movie itself
+    connection.execute(CatalogChange.__table__.insert().values(
+        movie_id=movie_id, op=op, changed_at=datetime.utcnow()))
+
+
+@event.listens_for(Movie, "after_insert")
+@event.listens_for(Movie, "after_update")
+def _movie_upserted(mapper, connection, target):
+    _log_catalog_change(connection, target.id, "upsert")
+
+
+@event.listens_for(Movie, "after_delete")
+def _movie_deleted(mapper, connection, target):
+    _log_catalog_change(connection, target.id, "delete")
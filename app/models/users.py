@@ -24,6 +24,7 @@ class User(db.Model):
     favorites = db.relationship('Favorite', backref='user', lazy=True)
     ratings = db.relationship('UserRating', backref='user', lazy=True)
     quiz_results = db.relationship('QuizResult', back_populates='user', lazy=True, cascade="all, delete-orphan")
+    feed = db.relationship('UserFeed', uselist=False, lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -183,4 +184,18 @@ class QuizResult(db.Model):
             top_genres=json.dumps(quiz_data.get('topGenres', [])),
             tags=json.dumps(quiz_data.get('tags', [])),
             quiz_answers=json.dumps(quiz_data.get('answers', {}))
-        )
\ No newline at end of file
+        )
+
+
+class UserFeed(db.Model):
+    """Precomputed /personalized feed, shared by every worker process (see app.services.user_feed)"""
+    __tablename__ = 'user_feeds'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    movie_ids = db.Column(db.Text, nullable=False)    # JSON list, ranked
+    source = db.Column(db.String(20), nullable=False)  # "als", "quiz" or "popular"
+    message = db.Column(db.String(255))
+    profile_name = db.Column(db.String(200))
+    quiz_key = db.Column(db.Text)                     # JSON quiz profile key, for explanations
+    # Wall-clock start of the computation: a feed only replaces one that started earlier
+    computed_at = db.Column(db.Float, nullable=False)
@@ -1,6 +1,6 @@
 # app/routes/admin.py
 from functools import wraps
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, exceptions, verify_jwt_in_request, decode_token
 from app.database import db
 from app.models.users import User
@@ -13,6 +13,22 @@ from collections import Counter
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+
+def sync_catalog():
+    """Fold a just-committed movie write into the in-memory store and recommender"""
+    sync = current_app.config.get('CATALOG_SYNC')
+    if not sync:
+        return
+    try:
+        sync.poll()
+    except Exception as e:
+        # The background poller will pick the change up later
+        print(f"Catalog sync error: {str(e)}")
+    finally:
+        cache = current_app.config.get('RESPONSE_CACHE')
+        if cache:
+            cache.invalidate()
+
 # ========== DASHBOARD ==========
 @admin_bp.route('/dashboard')
 @jwt_required()
@@ -162,6 +178,7 @@ def create_movie():
         
         db.session.add(movie)
         db.session.commit()
+        sync_catalog()
         
         return jsonify({
             'success': True,
@@ -211,6 +228,7 @@ def update_movie(movie_id):
             movie.img = data['img']
         
         db.session.commit()
+        sync_catalog()
         
         return jsonify({
             'success': True,
@@ -239,6 +257,7 @@ def delete_movie(movie_id):
     try:
         db.session.delete(movie)
         db.session.commit()
+        sync_catalog()
         
         return jsonify({
             'success': True,
@@ -466,6 +485,82 @@ def test_admin():
         }
     })
 
+# ========== RESPONSE CACHE ==========
+@admin_bp.route('/cache/stats')
+@jwt_required()
+def cache_stats():
+    """Hit/miss/eviction counters of the response cache and the quiz candidate cache"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    cache = current_app.config.get('RESPONSE_CACHE')
+    quiz_cache = current_app.config.get('QUIZ_CACHE')
+    return jsonify({
+        'success': True,
+        'enabled': cache is not None,
+        'stats': cache.stats() if cache else {},
+        'quiz_candidates': quiz_cache.stats() if quiz_cache else {}
+    })
+
+# ========== BACKGROUND JOBS ==========
+@admin_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def enqueue_job():
+    """Queue a named job (e.g. rebuild_catalog); returns at once with the job to poll"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+
+    if not user or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    scheduler = current_app.config['JOB_SCHEDULER']
+    data = request.get_json(silent=True) or {}
+    name = data.get('name', 'rebuild_catalog')
+    if not scheduler.is_public(name):
+        return jsonify({'error': f"Unknown job '{name}'", 'jobs': [n for n in scheduler.names
+                                                                 if scheduler.is_public(n)]}), 400
+
+    priority = data.get('priority')
+    try:
+        priority = int(priority) if priority is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'priority must be an integer'}), 400
+
+    job = scheduler.submit(name, priority=priority)
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+@admin_bp.route('/jobs')
+@jwt_required()
+def list_jobs():
+    """Recent admin-visible jobs and queue counters"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+
+    if not user or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    scheduler = current_app.config['JOB_SCHEDULER']
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    return jsonify({'success': True, 'jobs': scheduler.recent(limit), 'stats': scheduler.stats()})
+
+@admin_bp.route('/jobs/<job_id>')
+@jwt_required()
+def get_job(job_id):
+    """Status of one job: queued, running, succeeded or failed"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+
+    if not user or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    job = current_app.config['JOB_SCHEDULER'].get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
 # Flask endpoint for quiz analytics
 @admin_bp.route('/quiz-analytics')
 @jwt_required()
@@ -788,6 +883,7 @@ def bulk_upload_movies():
         
         if movies_added > 0:
             db.session.commit()
+            sync_catalog()
         
         return jsonify({
             'success': True,
@@ -4,6 +4,9 @@ from app.models.movie import Movie
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from app.models.users import Favorite, QuizResult
 from app.database import db
+from app.models.columnar import MISSING_INT
+from app.services.user_feed import refresh_user_feed
+import numpy as np
 import json
 
 # Blueprints
@@ -63,34 +66,37 @@ def analyze_movies():
     """
     try:
         store = current_app.config["MOVIE_STORE"]
-        movies = store.get_all_movies()
+        columns = store.columns
+        rows = columns.view_rows()
         
-        total_movies = len(movies)
+        total_movies = len(rows)
         
-        # Genre analysis
-        all_genres = []
-        for movie in movies:
-            if movie.get("genres"):
-                all_genres.extend([g.strip() for g in movie["genres"].split(",")])
-        
-        unique_genres = list(set(all_genres))
-        genre_counts = {genre: all_genres.count(genre) for genre in unique_genres}
+        # Genre analysis (count interned genre codes of live rows)
+        genre_codes = columns.genre_codes
+        live_codes = genre_codes.codes[columns.alive[genre_codes.owners]]
+        code_counts = np.bincount(live_codes, minlength=len(columns.genre_vocab))
+        genre_counts = {columns.genre_vocab[c]: int(code_counts[c]) for c in np.flatnonzero(code_counts)}
+        unique_genres = list(genre_counts)
         top_genres = dict(sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:10])
 
         # Year analysis
-        years = [m.get("year", 0) for m in movies if m.get("year")]
-        avg_year = int(sum(years)/len(years)) if years else 0
-        min_year, max_year = (min(years), max(years)) if years else (0, 0)
+        years = columns.year[rows]
+        years = years[(years != MISSING_INT) & (years != 0)]
+        avg_year = int(years.mean()) if len(years) else 0
+        min_year, max_year = (int(years.min()), int(years.max())) if len(years) else (0, 0)
 
         # Rating analysis
-        ratings = [m.get("rating", 0) for m in movies if m.get("rating")]
-        avg_rating = round(sum(ratings)/len(ratings), 2) if ratings else 0
+        ratings = columns.ratings_or_zero()[rows]
+        ratings = ratings[ratings != 0]
+        avg_rating = round(float(ratings.mean()), 2) if len(ratings) else 0
 
         # Director analysis
-        directors = [m.get("director", "Unknown") for m in movies]
-        director_counts = {}
-        for d in directors:
-            director_counts[d] = director_counts.get(d, 0) + 1
+        director_codes = columns.director_codes[rows]
+        code_counts = np.bincount(director_codes[director_codes != MISSING_INT], minlength=len(columns.directors))
+        director_counts = {columns.directors[c]: int(code_counts[c]) for c in np.flatnonzero(code_counts)}
+        missing_directors = int((director_codes == MISSING_INT).sum())
+        if missing_directors:
+            director_counts[None] = missing_directors
         top_directors = dict(sorted(director_counts.items(), key=lambda x: x[1], reverse=True)[:5])
 
         return jsonify({
@@ -155,6 +161,7 @@ def add_favorite():
     )
     db.session.add(new_fav)
     db.session.commit()
+    refresh_user_feed(user_id)
     
     return jsonify({
         "success": True,
@@ -178,6 +185,7 @@ def remove_favorite(movie_id):
     # Remove from database
     db.session.delete(favorite)
     db.session.commit()
+    refresh_user_feed(user_id)
     
     return jsonify({
         "success": True,
@@ -194,6 +202,7 @@ def clear_favorites():
     
     Favorite.query.filter_by(user_id=user_id).delete()
     db.session.commit()
+    refresh_user_feed(user_id)
     
     return jsonify({
         "success": True,
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.users import  QuizResult, User
+from app.services.user_feed import refresh_user_feed
 from app.database import db
 import json
 from datetime import datetime
@@ -63,6 +64,7 @@ def save_quiz_result():
             user.quiz_taken_at = datetime.utcnow()
         
         db.session.commit()
+        refresh_user_feed(user_id)
         
         return jsonify({
             "success": True,
@@ -158,6 +160,7 @@ def clear_quiz_results():
             user.quiz_taken_at = None
         
         db.session.commit()
+        refresh_user_feed(user_id)
         
         return jsonify({
             "success": True,
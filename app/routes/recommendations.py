@@ -2,13 +2,15 @@ from flask import Blueprint, jsonify, current_app, request
 from app.services.quiz_recommender import get_quiz_recommendations
 from app.models.movie import Movie
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
-from app.models.users import QuizResult
 from app.database import db
-import json
+from app.services.ranking import highest_rated_rows
+from app.services import fusion
+from app.services.response_cache import cached_response
 
 recommendations_bp = Blueprint('recommendations', __name__, url_prefix='/recommendations')
 
 @recommendations_bp.route("/popular", methods=['GET'])
+@cached_response
 def popular_movies():
     """
     Get top popular movies
@@ -26,24 +28,37 @@ def popular_movies():
 
 
 @recommendations_bp.route("/content-based", methods=['GET'])
+@cached_response
 def content_based_movies():
     """
-    Content-based recommendations by movie title
+    Content-based recommendations by movie title (optionally disambiguated by year),
+    directly by movie_id, or "more like these" for comma-separated movie_ids
   
     """
     movie_title = request.args.get('movie_title')
-    if not movie_title:
-        return jsonify({"success": False, "error": "movie_title parameter is required"}), 400
+    movie_id = request.args.get('movie_id', type=int)
+    movie_ids = [int(i) for i in request.args.get('movie_ids', '').split(',') if i.strip().isdigit()]
+    if not movie_title and movie_id is None and not movie_ids:
+        return jsonify({"success": False, "error": "movie_title, movie_id or movie_ids parameter is required"}), 400
 
     top_n = int(request.args.get('top_n', 10))
     recommender = current_app.config['RECOMMENDER']
-    recommendations = recommender.get_similar_movies(movie_title, top_n)
+    if movie_ids:
+        recommendations = recommender.get_similar_to_movies(movie_ids, top_n)
+        algorithm = f"Content-Based (Similar to movies {','.join(map(str, movie_ids))})"
+    elif movie_id is not None:
+        recommendations = recommender.get_similar_movies_by_id(movie_id, top_n)
+        algorithm = f"Content-Based (Similar to movie {movie_id})"
+    else:
+        year = request.args.get('year', type=int)
+        recommendations = recommender.get_similar_movies(movie_title, top_n, year=year)
+        algorithm = f"Content-Based (Similar to '{movie_title}')"
 
     return jsonify({
         "success": True,
         "recommendations": recommendations,
         "count": len(recommendations),
-        "algorithm": f"Content-Based (Similar to '{movie_title}')"
+        "algorithm": algorithm
     })
 
 
@@ -65,7 +80,7 @@ def collaborative_recommendations():
         "success": True,
         "recommendations": recommendations,
         "count": len(recommendations),
-        "algorithm": "Collaborative Filtering",
+        "algorithm": "Item-Item Collaborative Filtering",
         "user_id": user_id
     })
 
@@ -82,13 +97,21 @@ def hybrid_recommendations_route():
     if not (user_id or movie_title or genre):
         return jsonify({"success": False, "error": "At least one of user_id, movie_title, or genre parameter is required"}), 400
 
+    # Fusion: "rrf" (reciprocal rank) or "blend" (normalized scores); weights like "genre:2,content:1"
+    method = request.args.get('fusion', 'rrf')
+    if method not in fusion.METHODS:
+        return jsonify({"success": False, "error": f"fusion must be one of {', '.join(fusion.METHODS)}"}), 400
+    weights = fusion.parse_weights(request.args.get('weights'))
+
     top_n = int(request.args.get('top_n', 20))
     recommender = current_app.config['RECOMMENDER']
-    recommendations = recommender.hybrid_recommendations(
+    recommendations, sources = recommender.hybrid_recommendations_with_meta(
         user_id=user_id,
         movie_title=movie_title,
         genre=genre,
-        top_n=top_n
+        top_n=top_n,
+        weights=weights,
+        method=method
     )
 
     algorithm_parts = []
@@ -105,11 +128,57 @@ def hybrid_recommendations_route():
         "success": True,
         "recommendations": recommendations,
         "count": len(recommendations),
-        "algorithm": algorithm
+        "algorithm": algorithm,
+        "fusion": method,
+        "sources": sources
     })
 
 
+MAX_BATCH_QUERIES = 100
+
+
+@recommendations_bp.route("/batch", methods=['POST'])
+def batch_recommendations():
+    """
+    Many recommendation queries in one request.
+    Body: {"top_n": 10, "queries": [{"type": "popular"}, {"type": "genre", "genre": "Drama"},
+           {"type": "similar", "movie_id": 3}, {"type": "user"}, ...]}
+    "user" queries need a JWT and only answer for the signed-in user
+    Returns each movie once in "movies", and per query the ordered movie ids in "results"
+    """
+    data = request.get_json(silent=True) or {}
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, dict) for q in queries):
+        return jsonify({"success": False, "error": "queries must be a non-empty list of objects"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"success": False, "error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+
+    try:
+        top_n = int(data.get('top_n', 10))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "top_n must be an integer"}), 400
+
+    user_id = None
+    if any(q.get('type') == 'user' for q in queries):
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+
+    try:
+        recommender = current_app.config['RECOMMENDER']
+        movies, results = recommender.batch_recommendations(queries, top_n, user_id=user_id)
+        return jsonify({
+            "success": True,
+            "movies": movies,
+            "results": results,
+            "count": len(movies)
+        })
+    except Exception as e:
+        print(f"Batch recommendations error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @recommendations_bp.route("/genre", methods=['GET'])
+@cached_response
 def genre_based_recommendations():
     """
     Get top movies for a specific genre
@@ -181,9 +250,8 @@ def quiz_recommendations():
             except TypeError as e:
                 print(f"Popular movies error: {e}")
                 # Fallback: get all movies and take top rated
-                all_movies = store.get_all_movies()
-                all_movies.sort(key=lambda x: x.get('rating', 0), reverse=True)
-                recommendations.extend(all_movies[:20])
+                columns = store.columns
+                recommendations.extend(columns.to_dicts(highest_rated_rows(columns)[:20]))
         
         # Remove duplicates and limit
         seen_ids = set()
@@ -273,94 +341,27 @@ from app.services.recommender import MovieRecommender
 @recommendations_bp.route("/personalized", methods=["GET"])
 @jwt_required()
 def get_personalized_recommendations():
-    """Get personalized recommendations based on quiz OR hybrid OR popular"""
+    """Get the user's precomputed feed: ALS model, OR quiz (new users) OR popular"""
     user_id = int(get_jwt_identity())
     
     try:
-        # Check if user has quiz results
-        latest_quiz = QuizResult.query.filter_by(user_id=user_id)\
-            .order_by(QuizResult.created_at.desc()).first()
-        
-        # PRIORITY 1: Quiz recommendations
-        if latest_quiz and latest_quiz.top_genres:
-            try:
-                top_genres = json.loads(latest_quiz.top_genres) if latest_quiz.top_genres else []
-                tags = json.loads(latest_quiz.tags) if latest_quiz.tags else []
-                
-                if top_genres:
-                    # Use the existing quiz recommendation logic
-                    params = {
-                        "genres": ",".join(top_genres),
-                        "tags": ",".join(tags) if tags else "",
-                        "user_id": str(user_id),
-                        "limit": 20
-                    }
-                    
-                    # Call quiz_recommendations internally
-                    quiz_response = quiz_recommendations()
-                    if isinstance(quiz_response, tuple):
-                        # If it returns a tuple (response, status), extract the JSON
-                        quiz_data = quiz_response[0].get_json()
-                    else:
-                        quiz_data = quiz_response.get_json()
-                    
-                    if quiz_data.get("success") and quiz_data.get("recommendations"):
-                        return jsonify({
-                            "success": True,
-                            "recommendations": quiz_data["recommendations"],
-                            "count": len(quiz_data["recommendations"]),
-                            "source": "quiz",
-                            "profile_name": latest_quiz.profile_name,
-                            "message": f"Based on your {latest_quiz.profile_name} profile"
-                        })
-            except Exception as e:
-                print(f"Quiz recommendations error: {e}")
-                # Fall through to next priority
-        
-        # PRIORITY 2: Hybrid recommendations (if user has interactions)
-        try:
-            # Check if user has any interactions (favorites, ratings, watchlist)
-            from app.models.users import Favorite, UserRating, Watchlist
-            
-            favorites_count = Favorite.query.filter_by(user_id=user_id).count()
-            ratings_count = UserRating.query.filter_by(user_id=user_id).count()
-            watchlist_count = Watchlist.query.filter_by(user_id=user_id).count()
-            
-            if favorites_count > 0 or ratings_count > 0 or watchlist_count > 0:
-                # User has interactions, use hybrid recommendations
-                store = current_app.config['MOVIE_STORE']
-                recommender = current_app.config['RECOMMENDER']
-                
-                # Get hybrid recommendations
-                recommendations = recommender.hybrid_recommendations(
-                    user_id=str(user_id),
-                    top_n=20
-                )
-                
-                if recommendations and len(recommendations) > 0:
-                    return jsonify({
-                        "success": True,
-                        "recommendations": recommendations,
-                        "count": len(recommendations),
-                        "source": "hybrid",
-                        "message": "Based on your watch history and preferences"
-                    })
-        except Exception as e:
-            print(f"Hybrid recommendations error: {e}")
-            # Fall through to next priority
-        
-        # PRIORITY 3: Popular movies (fallback)
+        # One keyed read; the feed is recomputed in the background when the user rates, favorites or takes a quiz.
+        # On a first visit it is queued and a provisional quiz/popular feed is served meanwhile
+        feed = current_app.config['USER_FEEDS'].get(user_id)
         store = current_app.config['MOVIE_STORE']
-        recommender = current_app.config['RECOMMENDER']
-        popular = recommender.get_popular_movies(20)
         
-        return jsonify({
+        recommendations = feed.hydrate(store.columns)
+        response = {
             "success": True,
-            "recommendations": popular,
-            "count": len(popular),
-            "source": "popular",
-            "message": "Trending movies"
-        })
+            "recommendations": recommendations,
+            "count": len(recommendations),
+            "source": feed.source,
+            "message": feed.message,
+            "provisional": feed.provisional
+        }
+        if feed.profile_name:
+            response["profile_name"] = feed.profile_name
+        return jsonify(response)
         
     except Exception as e:
         print(f"Personalized recommendations error: {e}")
@@ -384,21 +385,14 @@ def highest_rated_movies():
         top_n = int(request.args.get('top_n', 20))
         store = current_app.config['MOVIE_STORE']
         
-        # Get all movies
-        all_movies = store.get_all_movies()
-        
-        # Sort by rating (highest first)
-        sorted_movies = sorted(all_movies, 
-                              key=lambda x: x.get('rating', 0), 
-                              reverse=True)
-        
-        # Filter out movies with no rating
-        rated_movies = [m for m in sorted_movies if m.get('rating', 0) > 0]
+        # Rated movies, highest first: ranked once per catalog version
+        columns = store.columns
+        rated_movies = columns.to_dicts(highest_rated_rows(columns)[:top_n])
         
         return jsonify({
             "success": True,
-            "recommendations": rated_movies[:top_n],
-            "count": len(rated_movies[:top_n]),
+            "recommendations": rated_movies,
+            "count": len(rated_movies),
             "algorithm": "Highest Rated"
         })
         
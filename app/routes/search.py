@@ -1,15 +1,10 @@
 from flask import Blueprint, jsonify, request, current_app
 import re
 from datetime import datetime
+from app.services.response_cache import cached_response
 
 search_bp = Blueprint("search", __name__, url_prefix="/search")
 
-def normalize(value):
-    """Normalize value for search"""
-    if isinstance(value, list):
-        return " ".join(map(str, value))
-    return str(value or "").lower()
-
 def clean_query(query):
     """Clean and prepare search query"""
     # Remove extra spaces and special characters
@@ -18,6 +13,7 @@ def clean_query(query):
     query = ' '.join(query.split())
     return query.lower().strip()
 @search_bp.route("/", methods=["GET"])
+@cached_response
 def search_movies():
     """Enhanced movie search with exact title matching priority"""
     start_time = datetime.now()
@@ -25,6 +21,7 @@ def search_movies():
     query = request.args.get("query", "").strip()
     limit = request.args.get("limit", 30, type=int)
     exact_match = request.args.get("exact", "true").lower() == "true"
+    fuzzy = request.args.get("fuzzy", "false").lower() == "true"
 
     if not query or len(query) < 2:
         return jsonify({
@@ -43,31 +40,19 @@ def search_movies():
             "error": "Movie store not available"
         })
 
-    # Prepare query
-    query_cleaned = clean_query(query)
-    query_lower = query_cleaned.lower()
-    query_parts = query_lower.split()
-    
-    movies = store.get_all_movies()
-    
+    engine = current_app.config["SEARCH_ENGINE"]
+    columns = store.columns
+
+    if fuzzy:
+        return fuzzy_response(engine, columns, query, limit, start_time)
+
     # STRATEGY 1: EXACT TITLE MATCHES (HIGHEST PRIORITY)
-    exact_title_matches = []
-    for movie in movies:
-        title = normalize(movie.get("title", "")).lower()
-        # Exact match (case-insensitive)
-        if title == query_lower:
-            exact_title_matches.append((movie, 100))  # Highest score
-        # Contains exact phrase
-        elif query_lower in title:
-            exact_title_matches.append((movie, 90))  # Very high score
-        # Title starts with query
-        elif title.startswith(query_lower):
-            exact_title_matches.append((movie, 85))
+    # Title phrase lookups in the inverted index; dicts are built for returned movies only
+    title_rows, title_scores = engine.title_matches(clean_query(query))
     
     # If we have exact title matches and exact_match is True, return only those
-    if exact_match and exact_title_matches:
-        exact_title_matches.sort(key=lambda x: x[1], reverse=True)
-        results = [movie for movie, score in exact_title_matches[:limit]]
+    if exact_match and len(title_rows):
+        results = columns.to_dicts(title_rows[:limit])
         
         search_time = (datetime.now() - start_time).total_seconds()
         return jsonify({
@@ -81,26 +66,16 @@ def search_movies():
         })
     
     # STRATEGY 2: RELEVANT MATCHES (if no exact title matches or exact_match is False)
-    scored_movies = []
-    for movie in movies:
-        score = calculate_relevance_score(movie, query_parts, query_lower)
-        if score > 0:  # Only include movies with some relevance
-            scored_movies.append((movie, score))
-    
-    # Sort by score (highest first), then by rating
-    scored_movies.sort(key=lambda x: (x[1], x[0].get("rating", 0)), reverse=True)
+    # BM25F over the postings of the query terms; "quoted phrases" must match in order
+    rows, scores, total = engine.search(query, limit)
     
-    # Filter to get meaningful results
-    meaningful_matches = []
-    for movie, score in scored_movies:
-        # Only include if score is significant
-        if score >= 5:  # Minimum relevance threshold
-            movie_copy = movie.copy()
-            movie_copy["relevance_score"] = round(score, 2)
-            meaningful_matches.append(movie_copy)
+    # STRATEGY 3: TYPO-TOLERANT MATCHES (only when nothing else matched)
+    if total == 0:
+        return fuzzy_response(engine, columns, query, limit, start_time)
     
-    # Limit results
-    results = meaningful_matches[:limit]
+    results = columns.to_dicts(rows)
+    for movie, score in zip(results, scores):
+        movie["relevance_score"] = round(float(score), 2)
     
     # Calculate search stats
     search_time = (datetime.now() - start_time).total_seconds()
@@ -113,61 +88,37 @@ def search_movies():
         "search_time": round(search_time, 3),
         "search_type": "relevance",
         "stats": {
-            "total_scored": len(scored_movies),
-            "meaningful_matches": len(meaningful_matches),
+            "total_scored": total,
+            "meaningful_matches": total,
             "returned": len(results)
         }
     })
 
-def calculate_relevance_score(movie, query_parts, query_lower):
-    """Calculate relevance score with title priority"""
-    score = 0
+def fuzzy_response(engine, columns, query, limit, start_time):
+    """Search with misspelled words replaced by close indexed words"""
+    rows, scores, total, corrections = engine.fuzzy_search(query, limit)
+    results = columns.to_dicts(rows)
+    for movie, score in zip(results, scores):
+        movie["relevance_score"] = round(float(score), 2)
     
-    # Check title first (highest weight)
-    title = normalize(movie.get("title", "")).lower()
-    if title:
-        # Exact title match (already handled, but keep for scoring)
-        if title == query_lower:
-            score += 100
-        # Contains query
-        elif query_lower in title:
-            score += 50
-        # Word-by-word matching in title
-        else:
-            title_words = set(title.split())
-            matched_words = sum(1 for part in query_parts if part in title_words)
-            if matched_words > 0:
-                score += matched_words * 10
-    
-    # Then check other fields (lower weight)
-    if score < 50:  # Only check other fields if title didn't match strongly
-        other_weights = {
-            "genres": 8,
-            "keywords": 6,
-            "cast": 5,
-            "director": 4,
-            "plot": 2
+    search_time = (datetime.now() - start_time).total_seconds()
+    return jsonify({
+        "success": True,
+        "results": results,
+        "count": len(results),
+        "query": query,
+        "search_time": round(search_time, 3),
+        "search_type": "fuzzy",
+        "corrections": corrections,
+        "stats": {
+            "total_scored": total,
+            "meaningful_matches": total,
+            "returned": len(results)
         }
-        
-        for field, weight in other_weights.items():
-            field_value = normalize(movie.get(field, "")).lower()
-            if field_value:
-                if query_lower in field_value:
-                    score += weight
-                else:
-                    for part in query_parts:
-                        if part and part in field_value:
-                            score += weight * 0.3
-    
-    # Rating and popularity bonus (smaller influence)
-    rating = movie.get("rating", 0)
-    if rating > 7:
-        score += 2
-    elif rating > 5:
-        score += 1
-    
-    return score
+    })
+
 @search_bp.route("/suggest", methods=["GET"])
+@cached_response
 def search_suggestions():
     """Get search suggestions"""
     query = request.args.get("query", "").strip().lower()
@@ -179,24 +130,12 @@ def search_suggestions():
     if not store:
         return jsonify({"suggestions": []})
     
-    movies = store.get_all_movies()
-    
-    suggestions = set()
-    for movie in movies:
-        # Title suggestions
-        title = movie.get("title", "").lower()
-        if query in title and len(suggestions) < 10:
-            suggestions.add(movie.get("title"))
-        
-        # Genre suggestions
-        genres = normalize(movie.get("genres", "")).lower()
-        if query in genres:
-            for genre in movie.get("genres", "").split(","):
-                genre_clean = genre.strip().lower()
-                if query in genre_clean and len(suggestions) < 15:
-                    suggestions.add(genre.strip())
+    # Prefix lookup over titles, title words, genres, directors and cast, most popular first
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    completions = current_app.config["AUTOCOMPLETE"].suggest(query, limit)
     
     return jsonify({
-        "suggestions": list(suggestions)[:10],
+        "suggestions": [c["text"] for c in completions],
+        "completions": completions,
         "query": query
-    })
\ No newline at end of file
+    })
@@ -5,6 +5,7 @@ from app.models.movie import Movie
 from app.models.users import UserRating, WatchHistory, QuizResult
 from datetime import datetime
 from app.models.users import db, User, Watchlist, WatchHistory, Favorite, UserRating
+from app.services.user_feed import refresh_user_feed
 import json
 
 
@@ -95,6 +96,7 @@ def rate_movie():
         action = "added"
 
     db.session.commit()
+    refresh_user_feed(user_id)
 
     return jsonify({
         "success": True,
@@ -415,6 +417,7 @@ def clear_ratings():
         count = UserRating.query.filter_by(user_id=user_id).count()
         UserRating.query.filter_by(user_id=user_id).delete()
         db.session.commit()
+        refresh_user_feed(user_id)
         
         return jsonify({
             "success": True,
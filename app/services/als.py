@@ -0,0 +1,186 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.models.columnar import IdIndex, MISSING_INT
+from app.services.interactions import user_key
+from app.services.ranking import top_k
+
+ARTIFACT_KIND = "als"
+ANN_ARTIFACT_KIND = "ivf_als"
+ALS_PARAMS = {"factors": 64, "regularization": 0.05, "alpha": 10.0, "iterations": 15, "cg_steps": 3}
+# Users (or items) per conjugate-gradient batch handed to a worker thread
+SOLVE_BATCH = 4096
+
+
+def _conjugate_gradient(confidence, fixed, gram, regularization, current, steps):
+    """A few CG steps for a batch of implicit-ALS rows at once (Takacs et al.).
+
+    Row u solves (YtY + Yu^T (Cu - I) Yu + lambda I) x = Yu^T Cu 1, where
+    `confidence` is the batch's CSR rows of C, `fixed` is Y and `gram` is YtY.
+    Warm-starts from `current`, so a handful of steps per sweep is enough.
+    """
+    pattern_minus_one = confidence.copy()
+    pattern_minus_one.data -= 1
+    owners = np.repeat(np.arange(confidence.shape[0]), np.diff(confidence.indptr))
+    gathered = fixed[confidence.indices]
+
+    def apply(x):
+        # A x = x YtY + sum_i (c_ui - 1) (y_i . x) y_i + lambda x, as one sparse product
+        weighted = sp.csr_matrix(
+            (pattern_minus_one.data * np.einsum("ij,ij->i", gathered, x[owners]),
+             confidence.indices, confidence.indptr), shape=confidence.shape)
+        return x @ gram + weighted @ fixed + regularization * x
+
+    x = current.copy()
+    residual = np.asarray(confidence @ fixed, dtype=np.float32) - apply(x)
+    direction = residual.copy()
+    rs_old = np.einsum("ij,ij->i", residual, residual)
+    for _ in range(steps):
+        a_dir = apply(direction)
+        denom = np.einsum("ij,ij->i", direction, a_dir)
+        alpha = np.divide(rs_old, denom, out=np.zeros_like(rs_old), where=denom > 1e-12)
+        x += alpha[:, None] * direction
+        residual -= alpha[:, None] * a_dir
+        rs_new = np.einsum("ij,ij->i", residual, residual)
+        if rs_new.max(initial=0) < 1e-10:
+            break
+        beta = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 1e-12)
+        direction = residual + beta[:, None] * direction
+        rs_old = rs_new
+    return x
+
+
+class ALSModel:
+    """Implicit-feedback matrix factorization (weighted ALS, Hu/Koren/Volinsky).
+
+    Interaction weights become confidences 1 + alpha * w. Each sweep solves
+    all users against fixed item factors, then all items against fixed user
+    factors, with batched conjugate-gradient steps spread over a thread pool.
+    Factors are float32 and map straight from disk; scoring a user is one
+    GEMV over the item factors plus a top-k selection.
+    """
+
+    def __init__(self, user_ids, item_ids, user_factors, item_factors, checksum=None, params=None):
+        self.user_ids = np.asarray(user_ids)
+        self.user_index = {user_key(u): i for i, u in enumerate(self.user_ids.tolist())}
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_index = IdIndex(self.item_ids, np.arange(len(self.item_ids), dtype=np.int64))
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.checksum = checksum
+        self.params = {**ALS_PARAMS, **(params or {})}
+        self._gram = None
+        # Optional IVF index over the item factors (IVFIndex)
+        self.ann = None
+
+    @property
+    def gram(self):
+        """YtY of the item factors, shared by every fold-in"""
+        if self._gram is None:
+            self._gram = self.item_factors.T @ self.item_factors
+        return self._gram
+
+    @classmethod
+    def fit(cls, interactions, workers=None, seed=0, **params):
+        params = {**ALS_PARAMS, **params}
+        factors, reg = params["factors"], params["regularization"]
+        confidence = interactions.matrix.astype(np.float32)
+        confidence.data = 1 + params["alpha"] * confidence.data
+        by_item = confidence.T.tocsr()
+        n_users, n_items = confidence.shape
+
+        rng = np.random.default_rng(seed)
+        user_factors = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+        item_factors = (rng.standard_normal((n_items, factors)) * 0.01).astype(np.float32)
+
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in range(params["iterations"]):
+                cls._solve_side(pool, confidence, user_factors, item_factors, reg, params["cg_steps"])
+                cls._solve_side(pool, by_item, item_factors, user_factors, reg, params["cg_steps"])
+
+        logging.info(f"ALS trained: {n_users} users x {n_items} movies, {factors} factors.")
+        return cls(interactions.user_ids, interactions.item_ids, user_factors, item_factors,
+                   interactions.checksum(), params)
+
+    @staticmethod
+    def _solve_side(pool, confidence, solving, fixed, regularization, steps):
+        """Update `solving` in place, one CG batch per task (NumPy/SciPy release the GIL in the products)"""
+        gram = fixed.T @ fixed
+
+        def solve(start):
+            end = min(start + SOLVE_BATCH, confidence.shape[0])
+            solving[start:end] = _conjugate_gradient(
+                confidence[start:end], fixed, gram, regularization, solving[start:end], steps)
+
+        list(pool.map(solve, range(0, confidence.shape[0], SOLVE_BATCH)))
+
+    # ===== Serving =====
+    def user_vector(self, user_id, movie_ids=None, weights=None):
+        """Stored factors for a known user; otherwise fold their interactions in against the item factors"""
+        row = self.user_index.get(user_key(user_id))
+        if row is not None:
+            return self.user_factors[row]
+        return self.fold_in(movie_ids, weights)
+
+    def fold_in(self, movie_ids, weights):
+        """User factors solved from (movie ids, weights) against the fixed item factors; None if none are known"""
+        if movie_ids is None or not len(movie_ids):
+            return None
+        cols = self.item_index.lookup(movie_ids)
+        known = cols != MISSING_INT
+        if not known.any():
+            return None
+        items = self.item_factors[cols[known]]
+        confidence = 1 + self.params["alpha"] * np.asarray(weights, dtype=np.float32)[known]
+        system = self.gram + (items.T * (confidence - 1)) @ items
+        system[np.diag_indices_from(system)] += self.params["regularization"]
+        return np.linalg.solve(system, items.T @ confidence).astype(np.float32)
+
+    def recommend(self, vector, top_n, exclude_ids=None, allowed=None, nprobe=None):
+        """(movie ids, scores): one GEMV over the item factors, then argpartition.
+
+        With an IVF index attached only the probed lists are scored.
+        """
+        if self.ann is not None:
+            allowed = np.ones(len(self.item_ids), dtype=bool) if allowed is None else allowed.copy()
+            if exclude_ids is not None and len(exclude_ids):
+                seen = self.item_index.lookup(exclude_ids)
+                allowed[seen[seen != MISSING_INT]] = False
+            best, scores = self.ann.search(vector, self.item_factors, top_n, nprobe, allowed)
+            return self.item_ids[best], scores
+
+        scores = self.item_factors @ vector
+        if exclude_ids is not None and len(exclude_ids):
+            seen = self.item_index.lookup(exclude_ids)
+            scores[seen[seen != MISSING_INT]] = -np.inf
+        if allowed is not None:
+            scores[~allowed] = -np.inf
+        best = top_k(scores, top_n)
+        best = best[np.isfinite(scores[best])]
+        return self.item_ids[best], scores[best]
+
+    def item_mask(self, columns):
+        """Which of this model's items are still live movies in `columns`"""
+        return columns.id_index().lookup(self.item_ids) != MISSING_INT
+
+    # ===== Artifacts =====
+    def save(self, artifacts):
+        return artifacts.save(ARTIFACT_KIND, self.checksum, {
+            "user_ids": self.user_ids, "item_ids": self.item_ids,
+            "user_factors": self.user_factors, "item_factors": self.item_factors,
+        }, {"params": self.params})
+
+    @classmethod
+    def load(cls, artifacts, checksum):
+        loaded = artifacts.load(ARTIFACT_KIND, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        logging.info(f"ALS factors loaded from artifact {checksum}.")
+        return cls(arrays["user_ids"], arrays["item_ids"], arrays["user_factors"], arrays["item_factors"],
+                   checksum, meta.get("params"))
@@ -0,0 +1,129 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from app.services.ranking import top_k
+
+# Below this many vectors an exact scan is as fast as probing lists
+ANN_MIN_ROWS = 2000
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+# Rows sampled to train the coarse quantizer
+KMEANS_SAMPLE = 100000
+# Dense cells per assignment block (rows x centroids)
+BLOCK_CELLS = 32 * 1024 * 1024
+
+
+def _unit_rows(vectors):
+    """L2-normalized float32 copy of dense or sparse row vectors"""
+    if sp.issparse(vectors):
+        return normalize(vectors.astype(np.float32).tocsr(), norm="l2", axis=1)
+    return normalize(np.asarray(vectors, dtype=np.float32), norm="l2", axis=1)
+
+
+def _assign(vectors, centroids):
+    """Nearest centroid (max cosine) for every row, in blocks"""
+    n = vectors.shape[0]
+    assignment = np.empty(n, dtype=np.int32)
+    block = max(1, BLOCK_CELLS // max(len(centroids), 1))
+    for start in range(0, n, block):
+        scores = vectors[start:start + block] @ centroids.T
+        assignment[start:start + block] = np.asarray(scores).argmax(axis=1)
+    return assignment
+
+
+class IVFIndex:
+    """Inverted-file ANN index with a spherical k-means coarse quantizer.
+
+    Rows are grouped into `nlist` lists by nearest centroid. A query scores
+    the centroids, scans only the rows of the `nprobe` best lists, and ranks
+    those candidates exactly. More probes mean better recall at higher
+    latency; nprobe == nlist is an exact search.
+
+    The index keeps only centroids and list membership. Callers pass the
+    vectors they rank with (the sparse TF-IDF matrix, ALS item factors, ...)
+    at search time, so the index holds no second copy of them. Rows appended
+    after the build (catalog deltas) are always scanned.
+    """
+
+    def __init__(self, centroids, list_offsets, list_rows, nprobe=DEFAULT_NPROBE, checksum=None):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+        self.checksum = checksum
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @property
+    def n_rows(self):
+        return len(self.list_rows)
+
+    @classmethod
+    def build(cls, vectors, nlist=None, nprobe=DEFAULT_NPROBE, iterations=KMEANS_ITERATIONS, seed=0, checksum=None):
+        unit = _unit_rows(vectors)
+        n = unit.shape[0]
+        nlist = max(1, min(n, nlist or int(np.sqrt(n) * 2)))
+        rng = np.random.default_rng(seed)
+        sample = unit[np.sort(rng.choice(n, min(n, KMEANS_SAMPLE), replace=False))]
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)]
+        centroids = centroids.toarray() if sp.issparse(centroids) else np.array(centroids)
+        for _ in range(iterations):
+            assignment = _assign(sample, centroids)
+            members = sp.csr_matrix((np.ones(len(assignment), dtype=np.float32),
+                                     (assignment, np.arange(len(assignment)))), shape=(nlist, sample.shape[0]))
+            sums = members @ sample
+            sums = (sums.toarray() if sp.issparse(sums) else sums).astype(np.float32)
+            empty = np.asarray(members.sum(axis=1)).ravel() == 0
+            sums[empty] = centroids[empty]  # keep the old centroid for an empty list
+            centroids = normalize(sums, norm="l2", axis=1)
+
+        assignment = _assign(unit, centroids)
+        list_rows = np.argsort(assignment, kind="stable").astype(np.int32)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+        logging.info(f"IVF index built: {n} vectors in {nlist} lists.")
+        return cls(centroids.astype(np.float32), list_offsets, list_rows, nprobe, checksum)
+
+    def candidates(self, query, nprobe=None):
+        """Rows in the `nprobe` lists whose centroids best match `query` (a dense vector)"""
+        nprobe = min(self.nlist, nprobe or self.nprobe)
+        probed = top_k(self.centroids @ query, nprobe)
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probed])
+
+    def search(self, query, vectors, k, nprobe=None, allowed=None):
+        """(rows, scores) of the best `k` rows of `vectors` for `query`, scored exactly within the probed lists"""
+        if sp.issparse(query):
+            query = query.toarray()
+        query = np.asarray(query, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = self.candidates(query / norm, nprobe).astype(np.int64)
+        if vectors.shape[0] > self.n_rows:
+            rows = np.concatenate([rows, np.arange(self.n_rows, vectors.shape[0])])
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        rows.sort()  # candidate order matches an exact scan, so ties break the same way
+        scores = np.asarray(vectors[rows] @ query).ravel()
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+    # ===== Artifacts =====
+    def save(self, artifacts, kind):
+        return artifacts.save(kind, self.checksum, {
+            "centroids": self.centroids, "list_offsets": self.list_offsets, "list_rows": self.list_rows,
+        }, {"nprobe": self.nprobe})
+
+    @classmethod
+    def load(cls, artifacts, kind, checksum):
+        loaded = artifacts.load(kind, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        logging.info(f"IVF index loaded from {kind} artifact {checksum}.")
+        return cls(arrays["centroids"], arrays["list_offsets"], arrays["list_rows"], meta["nprobe"], checksum)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def catalog_checksum(columns):
+    """Fingerprint of everything a model reads from a column snapshot.
+
+    Two processes that loaded the same catalog get the same checksum, so they
+    can share one set of artifacts.
+    """
+    digest = hashlib.sha1()
+    for array in (columns.ids, columns.alive, columns.rating, columns.year, columns.popularity,
+                  columns.director_codes, columns.genre_codes.codes, columns.genre_codes.offsets):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    for name in sorted(columns.text):
+        pool = columns.text[name]
+        for array in (pool.data, pool.offsets, pool.nulls):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update("\x00".join(columns.directors.values).encode("utf-8"))
+    digest.update("\x00".join(columns.genre_vocab.values).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ArtifactStore:
+    """Versioned model artifacts on disk: <root>/<kind>/<key>/{*.npy, meta.json}.
+
+    Arrays are written with np.save and read back with mmap_mode='r', so every
+    worker on the host maps the same page-cache copy instead of holding a
+    private one. Directories are written under a temp name and renamed into
+    place, so readers never see a half-written artifact.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, kind, key):
+        return os.path.join(self.root, kind, key)
+
+    def exists(self, kind, key):
+        return os.path.exists(os.path.join(self.path(kind, key), "meta.json"))
+
+    def save(self, kind, key, arrays, meta=None):
+        final_path = self.path(kind, key)
+        parent = os.path.dirname(final_path)
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f".{key}-", dir=parent)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+            meta = dict(meta or {})
+            meta.update({"format": FORMAT_VERSION, "arrays": sorted(arrays),
+                         "created_at": datetime.utcnow().isoformat()})
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path)
+            os.rename(tmp_path, final_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        logging.info(f"Saved {kind} artifact {key}.")
+        return final_path
+
+    def load(self, kind, key, mmap=True):
+        """(arrays, meta) for an artifact, or None if it is missing or from another format"""
+        path = self.path(kind, key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("format") != FORMAT_VERSION:
+            return None
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in meta["arrays"]}
+        return arrays, meta
+
+    def prune(self, kind, keep):
+        """Delete every artifact of `kind` except the keys in `keep`"""
+        kind_path = os.path.join(self.root, kind)
+        if not os.path.isdir(kind_path):
+            return
+        for key in os.listdir(kind_path):
+            if key not in keep and not key.startswith("."):
+                shutil.rmtree(os.path.join(kind_path, key), ignore_errors=True)
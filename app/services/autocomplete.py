@@ -0,0 +1,137 @@
+import bisect
+import threading
+
+import numpy as np
+
+from app.services.ranking import top_k, popular_scores
+from app.services.search_engine import tokenize
+
+# Prefixes up to this length match large key ranges, so their answers are kept per snapshot
+MAX_CACHED_PREFIX = 3
+DEFAULT_LIMIT = 10
+
+
+def completion_key(text):
+    """Normalized form keys and queries are compared in"""
+    return " ".join(tokenize(text))
+
+
+def _names(value):
+    return [n.strip() for n in str(value or "").split(",") if n.strip()]
+
+
+class PrefixIndex:
+    """Sorted completion keys searched with bisect.
+
+    Every label (a title, genre, director or cast member) is entered under its
+    normalized text and under each later word start, so "knight" completes
+    "The Dark Knight". Labels remember the rows they came from and rank by the
+    best popularity among those still alive. Within a generation rows only get
+    appended, so catalog deltas insert their keys into the sorted list instead
+    of rebuilding it.
+    """
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.size = 0
+        self.keys = []  # sorted (key, label) pairs
+        self.labels = []
+        self.label_kinds = []
+        self._label_index = {}
+        # (label, row) pairs, in the order rows were added
+        self._owners = []
+        self._rows = []
+
+    def _label(self, kind, text, new_keys):
+        """Slot of `text`; one label per text, whichever kind saw it first"""
+        slot = self._label_index.get(text.lower())
+        if slot is None:
+            slot = self._label_index[text.lower()] = len(self.labels)
+            self.labels.append(text)
+            self.label_kinds.append(kind)
+            tokens = tokenize(text)
+            new_keys.extend((" ".join(tokens[start:]), slot) for start in range(len(tokens)))
+        return slot
+
+    def add(self, columns, start):
+        """Enter rows [start, len(columns))"""
+        new_keys = []
+        for row in range(max(start, self.size), len(columns)):
+            entries = [("title", columns.field(row, "title")), ("director", columns.field(row, "director"))]
+            entries += [("genre", g) for g in _names(columns.field(row, "genres"))]
+            entries += [("cast", c) for c in _names(columns.field(row, "cast"))]
+            for kind, text in entries:
+                if text and completion_key(text):
+                    self._owners.append(self._label(kind, str(text).strip(), new_keys))
+                    self._rows.append(row)
+        # Two sorted runs, so the sort is a linear merge; readers keep the list they started with
+        new_keys.sort()
+        keys = self.keys + new_keys
+        keys.sort()
+        self.keys = keys
+        self.size = max(self.size, len(columns))
+
+    # ===== Ranking =====
+    def _ranked(self, columns):
+        """Per-snapshot keys, their labels as an array, label scores (-inf once no row is alive) and prefix cache"""
+        def build():
+            keys = self.keys
+            owners = np.array(self._owners, dtype=np.int64)
+            rows = np.array(self._rows, dtype=np.int64)
+            # Rows a concurrent delta is still adding belong to a newer snapshot
+            current = rows < len(columns)
+            owners, rows = owners[current], rows[current]
+            live = columns.alive[rows]
+            scores = np.full(len(self.labels), -np.inf)
+            np.maximum.at(scores, owners[live], popular_scores(columns)[rows[live]])
+            key_labels = np.array([label for _, label in keys], dtype=np.int64)
+            return keys, key_labels, scores, {}
+        return columns.cached(("suggest", self.generation, id(self)), build)
+
+    def complete(self, query, columns, limit=DEFAULT_LIMIT):
+        """Labels with a key starting with `query`, most popular first"""
+        prefix = completion_key(query)
+        if not prefix:
+            return []
+        keys, key_labels, scores, cache = self._ranked(columns)
+        cached = cache.get(prefix)
+        if cached is not None and cached[0] >= limit:
+            return cached[1][:limit]
+
+        lo = bisect.bisect_left(keys, (prefix,))
+        hi = bisect.bisect_left(keys, (prefix + "\uffff",))
+        labels = np.unique(key_labels[lo:hi])
+        labels = labels[np.isfinite(scores[labels])]
+        # Ties keep label order (first seen in the catalog)
+        best = labels[top_k(scores[labels], limit)]
+        completions = [{"text": self.labels[label], "type": self.label_kinds[label]} for label in best]
+        if len(prefix) <= MAX_CACHED_PREFIX:
+            cache[prefix] = (limit, completions)
+        return completions
+
+
+class Autocomplete:
+    """Keeps a PrefixIndex in step with the movie store and answers /search/suggest"""
+
+    def __init__(self, store):
+        self.store = store
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self):
+        """(index, columns) for the current snapshot: rebuilt per generation, extended for deltas"""
+        columns = self.store.columns
+        index = self._index
+        if index is not None and index.generation == columns.generation and index.size >= len(columns):
+            return index, columns
+        with self._lock:
+            index = self._index
+            if index is None or index.generation != columns.generation:
+                index = PrefixIndex(columns.generation)
+            index.add(columns, index.size)
+            self._index = index
+        return index, columns
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        index, columns = self.index()
+        return index.complete(query, columns, limit)
@@ -0,0 +1,352 @@
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from app.database import db
+from app.models.movie import Movie, CatalogChange
+from app.models.data_loader import LOAD_COLUMNS, movie_row_to_dict
+from app.services import content_model, similarity_table, item_cf, als, lsa
+from app.services.similarity_table import SimilarityTable
+from app.services.interactions import InteractionMatrix
+from app.services.item_cf import ItemNeighbors
+from app.services.als import ALSModel
+from app.services.ann_index import IVFIndex, ANN_MIN_ROWS
+from app.services.jobs import PRIORITY_NORMAL, PRIORITY_LOW
+from app.services.shared_catalog import DELTA_LOCK_FILE
+
+CHANGE_RETENTION = timedelta(days=7)
+
+
+class CatalogSync:
+    """Keeps MOVIE_STORE and RECOMMENDER in step with the database.
+
+    `poll()` replays the CatalogChange feed as a delta: touched rows are
+    retired and re-appended in the store, and the recommender folds the new
+    rows into its TF-IDF matrix with the fitted vocabulary. `rebuild()` reloads
+    and refits from scratch; it only runs on the background schedule, once
+    enough time has passed since the last rebuild and something has changed.
+    The collaborative-filtering interaction matrix is reloaded in bulk every
+    `interactions_interval` seconds, and the item-item neighbour lists and
+    ALS factors are retrained whenever it changed.
+
+    With a job scheduler attached, the heavy steps run as named jobs
+    (coalesced with the same job queued from the admin endpoints) and model
+    training goes through the scheduler's process pool when it has one.
+
+    With a SharedCatalog, a rebuild publishes its columns for every worker
+    process and a worker that sees a newer published generation adopts it
+    (mapping the same files and loading the model artifacts saved with it)
+    instead of rebuilding on its own. Deltas are shared as small records on
+    top of that snapshot; they are folded into a full one only by rebuilds.
+    """
+
+    def __init__(self, store, recommender, poll_interval=30, rebuild_interval=3600, interactions_interval=300,
+                 shared=None):
+        self.store = store
+        self.recommender = recommender
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.rebuild_interval = rebuild_interval
+        self.interactions_interval = interactions_interval
+        self.last_rebuild = time.monotonic()
+        self.last_interactions = time.monotonic()
+        self.rebuilt_version = store.version
+        self._poll_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._thread = None
+        # Set by the app: quiz candidates to precompute at each catalog version
+        self.quiz_cache = None
+        self.scheduler = None
+
+    # ===== Deltas =====
+    def poll(self):
+        """Apply any catalog changes newer than the store's version; returns how many movies changed"""
+        with self._poll_lock:
+            delta = self._read_delta(self.store.version)
+            if delta is None:
+                return 0
+            upserts, deleted_ids, version = delta
+            if not (self.shared is not None and self._poll_shared()):
+                self.store.apply_changes(upserts, deleted_ids, version)
+            self.recommender.sync_content()
+            logging.info(f"Catalog delta applied: {len(upserts)} upserted, {len(deleted_ids)} deleted "
+                         f"(version {self.store.version}).")
+            return len(upserts) + len(deleted_ids)
+
+    @staticmethod
+    def _read_delta(after_version):
+        """(upserted movie dicts, deleted ids, newest change id) for changes after `after_version`, or None"""
+        changes = CatalogChange.query.filter(CatalogChange.id > after_version)\
+            .order_by(CatalogChange.id).all()
+        if not changes:
+            return None
+
+        # Last operation per movie wins
+        latest = {}
+        for change in changes:
+            latest[change.movie_id] = change.op
+        upsert_ids = [mid for mid, op in latest.items() if op == "upsert"]
+        deleted_ids = [mid for mid, op in latest.items() if op == "delete"]
+
+        upserts = []
+        if upsert_ids:
+            rows = db.session.query(*[getattr(Movie, c) for c in LOAD_COLUMNS])\
+                .filter(Movie.id.in_(upsert_ids)).order_by(Movie.id).all()
+            upserts = [movie_row_to_dict(r) for r in rows]
+            # An upsert whose row is gone was deleted after we read the feed
+            found = {m["id"] for m in upserts}
+            deleted_ids.extend(mid for mid in upsert_ids if mid not in found)
+        return upserts, deleted_ids, changes[-1].id
+
+    def _poll_shared(self):
+        """Catch up on the delta records of our generation, recording the feed's newer changes first.
+
+        Records are small and each continues from the one before it, so every worker applies the same
+        sequence on top of the mapped snapshot and row numbers agree; only rebuild() writes a full
+        snapshot. Returns False when there is no shared snapshot of our generation (e.g. a rebuild is
+        pending) or our version is not on its chain.
+        """
+        generation = self.store.columns.generation
+        published = self.shared.current()
+        if published is None or published["generation"] != generation:
+            return False
+        with self.shared.exclusive(DELTA_LOCK_FILE):
+            records = self.shared.deltas(generation, published["version"])
+            tip = records[-1]["version"] if records else published["version"]
+            delta = self._read_delta(tip)
+            if delta is not None:
+                upserts, deleted_ids, version = delta
+                records.append(self.shared.publish_delta(generation, tip, version, upserts, deleted_ids))
+        columns, version = self.shared.catch_up(self.store.columns, self.store.version, records)
+        if version != (records[-1]["version"] if records else published["version"]):
+            return False
+        self.store.install(columns, version)
+        return True
+
+    # ===== Full Rebuild =====
+    def rebuild(self):
+        """Reload the catalog and refit the content model off to the side, then swap both in"""
+        with self._rebuild_lock, (self.shared.exclusive() if self.shared is not None else nullcontext()):
+            columns, version = self._next_columns()
+            # Another worker may already have built this catalog's artifacts
+            model = self.recommender._load_content_model(columns)
+            if model is None:
+                model = self.recommender.fit_content_model(columns)
+                self.save_artifacts(model)
+            if model.neighbors is None:
+                model.neighbors = self.build_neighbors(model)
+            if model.ann is None:
+                model.ann = self.build_ann(model.vectors, model.ann_kind, model.checksum)
+            # Stage the model before the columns go live so no request refits inline
+            self.recommender.add_content_model(model)
+            self.store.install(columns, version)
+            self.last_rebuild = time.monotonic()
+            self.rebuilt_version = version
+            # Always keep the newest change: tables created without AUTOINCREMENT would otherwise
+            # restart ids from 1 once emptied, and every poll() would skip them as already applied
+            CatalogChange.query.filter(CatalogChange.changed_at < datetime.utcnow() - CHANGE_RETENTION,
+                                       CatalogChange.id < self.store.latest_version())\
+                .delete(synchronize_session=False)
+            db.session.commit()
+            logging.info(f"Catalog rebuilt: {len(columns)} movies (version {version}).")
+        # Replay anything that landed while we were rebuilding
+        self.poll()
+
+    def _next_columns(self):
+        """The snapshot to rebuild onto: one another worker already published, or a fresh one we publish"""
+        if self.shared is None:
+            return self.store.build_columns()
+        generation = self.store.columns.generation
+        published = self.shared.newer_than(generation)
+        attached = self.shared.attach(published) if published is not None else None
+        if attached is not None:
+            return attached
+        columns, version = self.store.build_columns(generation=self.shared.next_generation(generation))
+        self.shared.publish(columns, version)
+        # Run on the mapped copy so this worker's private one can be freed
+        return self.shared.attach() or (columns, version)
+
+    def adoption_due(self):
+        """Another worker published a newer catalog generation"""
+        return self.shared is not None and self.shared.newer_than(self.store.columns.generation) is not None
+
+    def save_artifacts(self, model):
+        """Persist a freshly fitted model so other workers (and restarts) can map it"""
+        artifacts = self.recommender.artifacts
+        if artifacts is None:
+            return
+        try:
+            model.save(artifacts)
+            artifacts.prune(content_model.ARTIFACT_KIND, keep={model.checksum})
+            artifacts.prune(lsa.ARTIFACT_KIND, keep={model.checksum})
+        except Exception as e:
+            logging.error("Error saving TF-IDF artifact", exc_info=True)
+
+    def build_neighbors(self, model):
+        """Top-K similar-movies table for `model`, persisted next to it when possible"""
+        table = SimilarityTable.build(model)
+        artifacts = self.recommender.artifacts
+        if artifacts is not None and model.checksum is not None:
+            try:
+                table.save(artifacts)
+                artifacts.prune(similarity_table.ARTIFACT_KIND, keep={model.checksum})
+            except Exception as e:
+                logging.error("Error saving similarity table", exc_info=True)
+        return table
+
+    def build_ann(self, vectors, kind, checksum):
+        """IVF index over `vectors`, persisted next to their model; None for catalogs small enough to scan"""
+        if vectors.shape[0] < ANN_MIN_ROWS:
+            return None
+        index = IVFIndex.build(vectors, checksum=checksum)
+        artifacts = self.recommender.artifacts
+        if artifacts is not None and checksum is not None:
+            try:
+                index.save(artifacts, kind)
+                artifacts.prune(kind, keep={checksum})
+            except Exception as e:
+                logging.error(f"Error saving {kind} index", exc_info=True)
+        return index
+
+    def warm_models(self):
+        """Make sure the current content model, its neighbour table and IVF index exist, off the request path.
+
+        Under the shared lock one worker fits and saves them while the others wait and then load the artifacts.
+        """
+        with self.shared.exclusive() if self.shared is not None else nullcontext():
+            model = self.recommender._ensure_tfidf_matrix()
+            artifacts = self.recommender.artifacts
+            if (model is not None and model.checksum is not None and artifacts is not None
+                    and not model.is_saved(artifacts)):
+                self.save_artifacts(model)
+            if model is not None and model.neighbors is None:
+                self.recommender.attach_neighbors(model.columns.generation, table=self.build_neighbors(model))
+            if model is not None and model.ann is None and model.checksum is not None:
+                self.recommender.attach_neighbors(model.columns.generation, ann=self.build_ann(
+                    model.vectors, model.ann_kind, model.checksum))
+        self.refresh_cf_models()
+        self.warm_quiz_candidates()
+
+    def warm_quiz_candidates(self):
+        """Precompute quiz candidates for every known profile, once per catalog version"""
+        if self.quiz_cache is not None:
+            self.quiz_cache.warm()
+
+    # ===== User Interactions =====
+    def refresh_interactions(self):
+        """Reload the users x movies matrix in bulk and swap it into the recommender"""
+        self.recommender.set_interactions(InteractionMatrix.load())
+        self.last_interactions = time.monotonic()
+        self.refresh_cf_models()
+
+    def refresh_cf_models(self):
+        """Load or train the item-item lists and ALS factors for the current interactions, if they changed"""
+        interactions = self.recommender.interactions
+        checksum = interactions.checksum()
+        current = self.recommender.item_neighbors
+        if current is None or current.checksum != checksum:
+            self.recommender.set_item_neighbors(
+                self._load_or_build(ItemNeighbors, item_cf.ARTIFACT_KIND, checksum,
+                                   lambda: self._train(ItemNeighbors.build, interactions)))
+        als_model = self.recommender.als_model
+        if als_model is None or als_model.checksum != checksum:
+            als_model = self._load_or_build(ALSModel, als.ARTIFACT_KIND, checksum,
+                                            lambda: self._train(ALSModel.fit, interactions))
+            self.recommender.set_als_model(als_model)
+        if als_model.ann is None:
+            artifacts = self.recommender.artifacts
+            als_model.ann = (IVFIndex.load(artifacts, als.ANN_ARTIFACT_KIND, checksum) if artifacts is not None else None)\
+                or self.build_ann(als_model.item_factors, als.ANN_ARTIFACT_KIND, checksum)
+
+    def _train(self, fit, interactions):
+        """CPU-bound training, in a worker process when the scheduler has them"""
+        if self.scheduler is None:
+            return fit(interactions)
+        return self.scheduler.run_cpu(fit, interactions)
+
+    def _load_or_build(self, model_class, kind, checksum, build):
+        """Another worker may already have trained this model; otherwise train and persist it"""
+        artifacts = self.recommender.artifacts
+        model = model_class.load(artifacts, checksum) if artifacts is not None else None
+        if model is not None:
+            return model
+        model = build()
+        if artifacts is not None:
+            try:
+                model.save(artifacts)
+                artifacts.prune(kind, keep={checksum})
+            except Exception as e:
+                logging.error(f"Error saving {kind} artifact", exc_info=True)
+        return model
+
+    def interactions_due(self):
+        return time.monotonic() - self.last_interactions >= self.interactions_interval
+
+    def rebuild_due(self):
+        return (self.store.version != self.rebuilt_version
+                and time.monotonic() - self.last_rebuild >= self.rebuild_interval)
+
+    # ===== Jobs =====
+    def register_jobs(self, scheduler):
+        """Expose rebuilds and model refreshes as named jobs and run the background schedule through them"""
+        self.scheduler = scheduler
+        scheduler.register("rebuild_catalog", self._rebuild_job, priority=PRIORITY_LOW)
+        scheduler.register("refresh_interactions", self._interactions_job, priority=PRIORITY_NORMAL)
+        scheduler.register("warm_models", self._warm_job, priority=PRIORITY_NORMAL)
+
+    def _rebuild_job(self):
+        self.rebuild()
+        return {"movies": len(self.store.columns), "version": self.store.version}
+
+    def _interactions_job(self):
+        self.refresh_interactions()
+        interactions = self.recommender.interactions
+        return {"checksum": interactions.checksum(), "users": len(interactions.user_ids)}
+
+    def _warm_job(self):
+        self.warm_models()
+        return {"generation": self.store.columns.generation}
+
+    # ===== Background Schedule =====
+    def start(self, app):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(app,), name="catalog-sync", daemon=True)
+        self._thread.start()
+
+    def _run(self, app):
+        if self.scheduler is not None:
+            self.scheduler.submit("warm_models")
+        else:
+            with app.app_context():
+                try:
+                    self.warm_models()
+                except Exception as e:
+                    logging.error("Model warm-up failed", exc_info=True)
+                finally:
+                    db.session.remove()
+        while True:
+            time.sleep(self.poll_interval)
+            with app.app_context():
+                try:
+                    self.poll()
+                    # Neither is due again until its queued job had a chance to run
+                    if self.adoption_due() or self.rebuild_due():
+                        self.last_rebuild = time.monotonic()
+                        self._schedule("rebuild_catalog", self.rebuild)
+                    if self.interactions_due():
+                        self.last_interactions = time.monotonic()
+                        self._schedule("refresh_interactions", self.refresh_interactions)
+                    self.warm_quiz_candidates()
+                except Exception as e:
+                    logging.error("Catalog sync failed", exc_info=True)
+                finally:
+                    db.session.remove()
+
+    def _schedule(self, name, run):
+        if self.scheduler is None:
+            run()
+        else:
+            self.scheduler.submit(name)
@@ -0,0 +1,172 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+from app.services.artifacts import catalog_checksum
+from app.services.field_vectorizer import FieldVectorizer
+from app.services import lsa
+
+ARTIFACT_KIND = "tfidf"
+ANN_ARTIFACT_KIND = "ivf_tfidf"
+
+
+def normalize_text(text):
+    return str(text or "").lower().strip()
+
+
+def movie_to_text(movie):
+    return " ".join([
+        normalize_text(movie.get("title")),
+        normalize_text(movie.get("genres")),
+        normalize_text(movie.get("director")),
+        normalize_text(movie.get("cast")),
+        normalize_text(movie.get("plot")),
+        normalize_text(movie.get("keywords"))
+    ])
+
+
+class TitleIndex:
+    """Normalized title -> rows, with "title (year)" aliases to tell duplicates apart.
+
+    Built alongside the TF-IDF matrix. Deltas append to the same index in
+    place; lookups ignore rows that are dead or past the caller's snapshot.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.size = 0
+
+    def add(self, columns, start):
+        """Index rows [start, len(columns))"""
+        for row in range(max(start, self.size), len(columns)):
+            title = normalize_text(columns.field(row, "title"))
+            self.rows.setdefault(title, []).append(row)
+            year = columns.field(row, "year")
+            if year is not None:
+                self.rows.setdefault(f"{title} ({year})", []).append(row)
+        self.size = max(self.size, len(columns))
+
+    def resolve(self, title, columns, year=None):
+        """Row of the live movie called `title` (oldest id wins a tie), or None"""
+        key = normalize_text(title)
+        if year:
+            key = f"{key} ({year})"
+        live = [r for r in self.rows.get(key, ()) if r < len(columns) and columns.alive[r]]
+        if not live:
+            return None
+        return min(live, key=lambda r: columns.ids[r])
+
+
+class ContentModel:
+    """Field-weighted TF-IDF model bound to the column snapshot it was built from.
+
+    Matrix row i is column row i. New catalog rows are folded in with
+    `transform` against the fitted vocabularies; a full refit is left to the
+    background rebuild.
+    """
+
+    def __init__(self, columns, vectorizer, matrix, checksum=None, titles=None):
+        self.columns = columns
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        # Checksum of the snapshot the matrix was fitted on (None once deltas are folded in)
+        self.checksum = checksum
+        # Precomputed top-K neighbours (SimilarityTable); survives deltas, covers the fitted rows only
+        self.neighbors = None
+        # IVF index over the fitted rows (IVFIndex) for approximate similarity queries
+        self.ann = None
+        # Optional dense LSA projection (LSAEmbedding); when present, similarity runs on it
+        self.lsa = None
+        # Seed lookup by title; shared with (and extended for) later snapshots of the same generation
+        self.titles = titles if titles is not None else TitleIndex()
+        self.titles.add(columns, 0)
+
+    @classmethod
+    def fit(cls, columns, weights=None):
+        vectorizer = FieldVectorizer(weights)
+        matrix = vectorizer.fit_transform(columns)
+        logging.info("TF-IDF matrix built successfully.")
+        return cls(columns, vectorizer, matrix, catalog_checksum(columns))
+
+    def extend(self, columns):
+        """Same model over a newer snapshot of the same generation"""
+        built = self.matrix.shape[0]
+        matrix = self.matrix
+        if len(columns) > built:
+            added = self.vectorizer.transform(columns, start=built)
+            matrix = sp.vstack([self.matrix, added], format="csr")
+            logging.info(f"Folded {added.shape[0]} catalog rows into the TF-IDF matrix.")
+        checksum = self.checksum if len(columns) == built and columns.alive.all() else None
+        model = ContentModel(columns, self.vectorizer, matrix, checksum, titles=self.titles)
+        model.neighbors = self.neighbors
+        model.ann = self.ann
+        if self.lsa is not None:
+            model.lsa = self.lsa.extend(matrix[self.lsa.vectors.shape[0]:]) if len(columns) > built else self.lsa
+        return model
+
+    # ===== Similarity =====
+    @property
+    def vectors(self):
+        """Row vectors similarity runs on: dense LSA when fitted, else the sparse TF-IDF matrix"""
+        return self.lsa.vectors if self.lsa is not None else self.matrix
+
+    @property
+    def space(self):
+        """Which vectors similarity runs on; derived tables and indexes are only valid for one space"""
+        return "lsa" if self.lsa is not None else "tfidf"
+
+    @property
+    def params(self):
+        """What besides the catalog decides the vectors: field weights and the LSA dimensions"""
+        return {"weights": self.vectorizer.weights, "lsa_dim": self.lsa.requested_dim if self.lsa is not None else 0}
+
+    @property
+    def ann_kind(self):
+        return lsa.ANN_ARTIFACT_KIND if self.lsa is not None else ANN_ARTIFACT_KIND
+
+    def query_vector(self, rows):
+        """Mean of the vectors of `rows`, as a 1 x d row"""
+        vectors = self.vectors[np.asarray(rows)]
+        return vectors if len(rows) == 1 else np.asarray(vectors.mean(axis=0)).reshape(1, -1)
+
+    def scores_for(self, query, rows):
+        """Similarity of one query row to just `rows`"""
+        scores = self.vectors[rows] @ query.T
+        return (scores.toarray() if sp.issparse(scores) else np.asarray(scores)).ravel()
+
+    def similarities(self, queries):
+        """Dot products of each query row with every movie: a GEMV for one query, a GEMM for a batch"""
+        sims = queries @ self.vectors.T
+        return sims.toarray() if sp.issparse(sims) else np.asarray(sims)
+
+    # ===== Artifacts =====
+    def save(self, artifacts):
+        """Write the field vocabularies, IDF weights and the CSR arrays, keyed by catalog checksum"""
+        if self.checksum is None:
+            raise ValueError("Only a freshly fitted model can be saved")
+        arrays, meta = self.vectorizer.state()
+        matrix = self.matrix.tocsr()
+        arrays.update({"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr})
+        meta["shape"] = list(matrix.shape)
+        return artifacts.save(ARTIFACT_KIND, self.checksum, arrays, meta)
+
+    def is_saved(self, artifacts):
+        """Whether `artifacts` already holds this model (same catalog checksum, parameters and weights)"""
+        loaded = artifacts.load(ARTIFACT_KIND, self.checksum) if self.checksum is not None else None
+        return loaded is not None and FieldVectorizer.matches(loaded[1], self.vectorizer.weights)
+
+    @classmethod
+    def load(cls, artifacts, columns, checksum=None, weights=None):
+        """Memory-mapped model for `columns`, or None if no artifact matches its checksum and weights"""
+        checksum = checksum or catalog_checksum(columns)
+        loaded = artifacts.load(ARTIFACT_KIND, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        if not FieldVectorizer.matches(meta, weights) or meta["shape"][0] != len(columns):
+            return None
+        vectorizer = FieldVectorizer.from_state(arrays, meta)
+        # copy=False keeps the mmap'd buffers: every worker shares one page-cache copy
+        matrix = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                               shape=tuple(meta["shape"]), copy=False)
+        logging.info(f"TF-IDF matrix loaded from artifact {checksum}.")
+        return cls(columns, vectorizer, matrix, checksum)
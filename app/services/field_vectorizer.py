@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# Relative importance of each field in the combined similarity
+FIELD_WEIGHTS = {"genres": 1.0, "director": 0.5, "cast": 0.75, "text": 1.5}
+FIELDS = ("genres", "director", "cast", "text")
+TEXT_PARAMS = {"stop_words": "english", "max_features": 5000}
+CAST_PARAMS = {"max_features": 20000}
+
+
+def _split_names(value):
+    """'Name One, Name Two' -> ['name one', 'name two']: a cast member is one token"""
+    return [n.strip() for n in str(value or "").lower().split(",") if n.strip()]
+
+
+def _code_map(values, fitted):
+    """Column-vocabulary code -> fitted feature (-1 for values unseen at fit time)"""
+    index = {v: i for i, v in enumerate(fitted)}
+    return np.array([index.get(v, -1) for v in values], dtype=np.int64)
+
+
+class FieldVectorizer:
+    """One feature block per movie field, weighted and stacked side by side.
+
+    - genres: one-hot over the genre vocabulary (straight from the genre codes)
+    - director: one-hot over directors
+    - cast: binary set of cast members
+    - text: TF-IDF over title, plot and keywords
+
+    Each block is L2-normalized and scaled by sqrt(weight) before the blocks
+    are stacked and the rows normalized again. The dot product of two rows is
+    then the weight-averaged cosine of their fields, so a shared cast no longer
+    drowns out genre and plot. Fields are built in parallel on a thread pool.
+    """
+
+    def __init__(self, weights=None, workers=None):
+        self.weights = {**FIELD_WEIGHTS, **(weights or {})}
+        self.workers = workers or min(len(FIELDS), os.cpu_count() or 1)
+        self.genre_values = []
+        self.director_values = []
+        self.cast = CountVectorizer(binary=True, tokenizer=_split_names, token_pattern=None,
+                                    lowercase=False, **CAST_PARAMS)
+        self.text = TfidfVectorizer(**TEXT_PARAMS)
+
+    @property
+    def widths(self):
+        return {"genres": len(self.genre_values), "director": len(self.director_values),
+                "cast": len(self.cast.vocabulary_), "text": len(self.text.vocabulary_)}
+
+    # ===== Fields =====
+    def _texts(self, columns, start):
+        field = columns.field
+        return [" ".join(str(field(i, name) or "") for name in ("title", "plot", "keywords")).lower()
+                for i in range(start, len(columns))]
+
+    def _casts(self, columns, start):
+        return [columns.field(i, "cast") for i in range(start, len(columns))]
+
+    def _one_hot(self, codes, offsets, values, fitted):
+        """Rows of `codes` (ragged via `offsets`) as one-hot CSR over the fitted values"""
+        mapped = _code_map(values, fitted)[codes] if len(codes) else np.empty(0, dtype=np.int64)
+        owners = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        keep = mapped >= 0
+        return sp.csr_matrix((np.ones(keep.sum(), dtype=np.float32), (owners[keep], mapped[keep])),
+                             shape=(len(offsets) - 1, max(len(fitted), 1)))
+
+    def _genres(self, columns, start):
+        genre_codes = columns.genre_codes
+        lo, hi = genre_codes.offsets[start], genre_codes.offsets[-1]
+        return self._one_hot(genre_codes.codes[lo:hi], genre_codes.offsets[start:] - lo,
+                             columns.genre_vocab.values, self.genre_values)
+
+    def _director(self, columns, start):
+        codes = columns.director_codes[start:]
+        present = codes >= 0
+        offsets = np.concatenate([[0], np.cumsum(present)])
+        return self._one_hot(codes[present], offsets, columns.directors.values, self.director_values)
+
+    def _build(self, name, columns, start, fit):
+        if name == "genres":
+            return self._genres(columns, start)
+        if name == "director":
+            return self._director(columns, start)
+        if name == "cast":
+            casts = self._casts(columns, start)
+            if fit:
+                try:
+                    return self.cast.fit_transform(casts)
+                except ValueError:  # no cast anywhere in the catalog
+                    self.cast.fit(["\u0000"])
+            return self.cast.transform(casts)
+        texts = self._texts(columns, start)
+        return self.text.fit_transform(texts) if fit else self.text.transform(texts)
+
+    def _combine(self, columns, start, fit):
+        if fit:
+            self.genre_values = list(columns.genre_vocab.values)
+            self.director_values = list(columns.directors.values)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            blocks = list(pool.map(lambda name: self._build(name, columns, start, fit), FIELDS))
+        weighted = [normalize(block.astype(np.float32), norm="l2") * np.float32(np.sqrt(self.weights[name]))
+                    for name, block in zip(FIELDS, blocks)]
+        return normalize(sp.hstack(weighted, format="csr"), norm="l2")
+
+    def fit_transform(self, columns):
+        return self._combine(columns, 0, fit=True)
+
+    def transform(self, columns, start=0):
+        """Rows [start, len(columns)) with the fitted vocabularies"""
+        return self._combine(columns, start, fit=False)
+
+    # ===== Artifacts =====
+    def state(self):
+        """(arrays, meta) that restore this vectorizer without refitting"""
+        meta = {
+            "weights": self.weights,
+            "genre_values": self.genre_values,
+            "director_values": self.director_values,
+            "cast_vocabulary": sorted(self.cast.vocabulary_, key=self.cast.vocabulary_.get),
+            "text_vocabulary": sorted(self.text.vocabulary_, key=self.text.vocabulary_.get),
+            "params": {"text": TEXT_PARAMS, "cast": CAST_PARAMS},
+        }
+        return {"idf": self.text.idf_}, meta
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        vectorizer = cls(meta["weights"])
+        vectorizer.genre_values = meta["genre_values"]
+        vectorizer.director_values = meta["director_values"]
+        vectorizer.cast.vocabulary_ = {t: i for i, t in enumerate(meta["cast_vocabulary"])}
+        vectorizer.text.vocabulary_ = {t: i for i, t in enumerate(meta["text_vocabulary"])}
+        vectorizer.text.idf_ = np.asarray(arrays["idf"])
+        return vectorizer
+
+    @staticmethod
+    def matches(meta, weights=None):
+        """Whether a saved state was built with the current parameters and these weights"""
+        return (meta.get("params") == {"text": TEXT_PARAMS, "cast": CAST_PARAMS}
+                and meta.get("weights") == {**FIELD_WEIGHTS, **(weights or {})})
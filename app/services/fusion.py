@@ -0,0 +1,73 @@
+"""
+Score fusion for hybrid recommendations.
+
+Every source hands over a small candidate set as parallel (movie ids, scores)
+arrays, best first. Fusion concatenates them, maps ids to dense slots with
+one np.unique, and accumulates each source's weighted contribution with a
+bincount, so the cost is linear in the number of candidates.
+"""
+import numpy as np
+
+from app.services.ranking import top_k
+
+RRF_K = 60
+METHODS = ("rrf", "blend")
+# Default source weights; popular is a weak prior that also fills short lists
+SOURCE_WEIGHTS = {"genre": 1.0, "content": 1.0, "collaborative": 1.0, "popular": 0.25}
+
+
+def _min_max(scores):
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(scores):
+        return scores
+    low, high = scores.min(), scores.max()
+    if high == low:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+def _contributions(candidates, weights, method, k):
+    for (ids, scores), weight in zip(candidates, weights):
+        if not len(ids) or weight <= 0:
+            continue
+        if method == "rrf":
+            # 1 / (k + rank), ranks starting at 1; only the order of each source matters
+            yield ids, weight / (k + np.arange(1, len(ids) + 1))
+        else:
+            yield ids, weight * _min_max(scores)
+
+
+def fuse(candidates, weights, top_n, method="rrf", k=RRF_K):
+    """(movie ids, fused scores) of the best `top_n` across sources.
+
+    `candidates` is a list of (ids, scores) per source and `weights` the
+    matching source weights. "rrf" is weighted reciprocal rank fusion;
+    "blend" sums min-max normalized scores. Ties keep first-seen order.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown fusion method '{method}'")
+    parts = list(_contributions(candidates, weights, method, k))
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    ids = np.concatenate([np.asarray(p[0], dtype=np.int64) for p in parts])
+    values = np.concatenate([p[1] for p in parts])
+    unique_ids, first, slots = np.unique(ids, return_index=True, return_inverse=True)
+    totals = np.bincount(slots, weights=values, minlength=len(unique_ids))
+
+    # Re-order slots by first appearance so equal scores keep source order
+    order = np.argsort(first, kind="stable")
+    best = top_k(totals[order], top_n)
+    return unique_ids[order][best], totals[order][best]
+
+
+def parse_weights(text):
+    """'genre:2,content:1' -> {"genre": 2.0, "content": 1.0}; malformed parts are ignored"""
+    weights = {}
+    for part in str(text or "").split(","):
+        name, _, value = part.partition(":")
+        try:
+            weights[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
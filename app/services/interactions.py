@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from app.models.columnar import IdIndex, MISSING_INT
+from app.services.ranking import top_k
+
+# Implicit-feedback weight per source; an explicit rating contributes its stars
+SOURCE_WEIGHTS = {"rating": 1.0, "favorite": 4.0, "watch": 2.0}
+
+
+def user_key(user_id):
+    """User ids arrive as ints or strings (JWT identity, query args); index them as ints"""
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return user_id
+
+
+class InteractionMatrix:
+    """Sparse users x movies matrix of implicit feedback.
+
+    Built in bulk from user_ratings, favorites and watch_history. A user's
+    row holds, per movie, the weighted sum of every signal they gave it.
+    """
+
+    def __init__(self, matrix, user_ids, item_ids):
+        self.matrix = matrix.tocsr()
+        self.user_ids = list(user_ids)
+        self.user_index = {u: i for i, u in enumerate(self.user_ids)}
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_index = IdIndex(self.item_ids, np.arange(len(self.item_ids), dtype=np.int64))
+        # Row-normalized copy: X_norm @ x_u gives cosine similarity to every user at once
+        self.normalized = normalize(self.matrix, norm="l2", axis=1) if self.matrix.shape[0] else self.matrix
+        self._pattern = None
+
+    @classmethod
+    def from_triples(cls, users, items, weights):
+        users = [user_key(u) for u in users]
+        items = np.array([int(i) for i in items], dtype=np.int64)
+        user_ids = sorted(set(users), key=str)
+        user_index = {u: i for i, u in enumerate(user_ids)}
+        item_ids, item_cols = np.unique(items, return_inverse=True)
+        matrix = sp.coo_matrix(
+            (np.asarray(weights, dtype=np.float32), (np.array([user_index[u] for u in users], dtype=np.int64), item_cols)),
+            shape=(len(user_ids), len(item_ids)),
+        ).tocsr()  # duplicate (user, movie) pairs are summed
+        return cls(matrix, user_ids, item_ids)
+
+    @classmethod
+    def load(cls, weights=None):
+        """Bulk-load every interaction table (three column queries, no ORM objects)"""
+        from app.database import db
+        from app.models.users import UserRating, Favorite, WatchHistory
+
+        weights = {**SOURCE_WEIGHTS, **(weights or {})}
+        users, items, values = [], [], []
+        for user_id, movie_id, rating in db.session.query(UserRating.user_id, UserRating.movie_id, UserRating.rating):
+            users.append(user_id); items.append(movie_id); values.append(weights["rating"] * (rating or 0))
+        for user_id, movie_id in db.session.query(Favorite.user_id, Favorite.movie_id):
+            users.append(user_id); items.append(movie_id); values.append(weights["favorite"])
+        for user_id, movie_id in db.session.query(WatchHistory.user_id, WatchHistory.movie_id):
+            users.append(user_id); items.append(movie_id); values.append(weights["watch"])
+        matrix = cls.from_triples(users, items, values)
+        logging.info(f"Interaction matrix loaded: {len(matrix.user_ids)} users x {len(matrix.item_ids)} movies, "
+                     f"{matrix.matrix.nnz} interactions.")
+        return matrix
+
+    @staticmethod
+    def load_user(user_id, weights=None):
+        """(movie ids, weights) of one user straight from the tables, summed per movie like a matrix row"""
+        from app.database import db
+        from app.models.users import UserRating, Favorite, WatchHistory
+
+        weights = {**SOURCE_WEIGHTS, **(weights or {})}
+        totals = {}
+        for movie_id, rating in db.session.query(UserRating.movie_id, UserRating.rating).filter_by(user_id=user_id):
+            totals[movie_id] = totals.get(movie_id, 0.0) + weights["rating"] * (rating or 0)
+        for (movie_id,) in db.session.query(Favorite.movie_id).filter_by(user_id=user_id):
+            totals[movie_id] = totals.get(movie_id, 0.0) + weights["favorite"]
+        for (movie_id,) in db.session.query(WatchHistory.movie_id).filter_by(user_id=user_id):
+            totals[movie_id] = totals.get(movie_id, 0.0) + weights["watch"]
+        ids = np.fromiter(totals.keys(), dtype=np.int64, count=len(totals))
+        return ids, np.fromiter(totals.values(), dtype=np.float32, count=len(totals))
+
+    @classmethod
+    def from_legacy(cls, user_interactions):
+        """From the old {user_id: {"rated_movies": {movie_id: rating}}} dict"""
+        users, items, values = [], [], []
+        for user_id, data in (user_interactions or {}).items():
+            for movie_id, rating in data.get("rated_movies", {}).items():
+                users.append(user_id); items.append(movie_id); values.append(rating)
+        return cls.from_triples(users, items, values)
+
+    @property
+    def pattern(self):
+        """Binary copy of the matrix (who touched what), built on first use"""
+        if self._pattern is None:
+            pattern = self.matrix.copy()
+            pattern.data[:] = 1
+            self._pattern = pattern
+        return self._pattern
+
+    def checksum(self):
+        """Fingerprint of the matrix and both id axes, so models built from it can be shared as artifacts"""
+        digest = hashlib.sha1()
+        for array in (self.item_ids, self.matrix.indptr, self.matrix.indices, self.matrix.data):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(str(self.matrix.shape).encode("utf-8"))
+        # Rows are users: the same matrix over other users must not reuse their factors
+        digest.update("\x00".join(repr(u) for u in self.user_ids).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    # ===== Queries =====
+    def user_row(self, user_id):
+        return self.user_index.get(user_key(user_id))
+
+    def user_items(self, user_row):
+        """(movie ids, weights) of everything the user has interacted with"""
+        start, end = self.matrix.indptr[user_row], self.matrix.indptr[user_row + 1]
+        return self.item_ids[self.matrix.indices[start:end]], self.matrix.data[start:end]
+
+    def seen_items(self, user_row):
+        """Item columns the user has interacted with"""
+        return self.matrix.indices[self.matrix.indptr[user_row]:self.matrix.indptr[user_row + 1]]
+
+    def similar_users(self, user_row, k=50, min_common=1, similarity_threshold=0.1):
+        """(rows, cosine similarities) of the k closest users: one sparse mat-vec, no Python loop"""
+        sims = (self.normalized @ self.normalized[user_row].T).toarray().ravel()
+        sims[user_row] = 0
+        if min_common > 1:
+            # Shared-movie counts via the binary pattern: another single mat-vec
+            common = (self.pattern @ self.pattern[user_row].T).toarray().ravel()
+            sims[common < min_common] = 0
+        sims[sims < similarity_threshold] = 0
+        rows = top_k(sims, k)
+        rows = rows[sims[rows] > 0]
+        return rows, sims[rows]
+
+    def recommend_items(self, user_row, top_n, k=50, min_common=1, similarity_threshold=0.1, allowed=None):
+        """(movie ids, scores) from the user's nearest neighbours, excluding what they've seen"""
+        neighbours, sims = self.similar_users(user_row, k, min_common, similarity_threshold)
+        if not len(neighbours):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        scores = np.asarray(self.matrix[neighbours].T @ sims).ravel()
+        scores[self.seen_items(user_row)] = 0
+        if allowed is not None:
+            scores[~allowed] = 0
+        cols = top_k(scores, top_n)
+        cols = cols[scores[cols] > 0]
+        return self.item_ids[cols], scores[cols]
+
+    def item_mask(self, columns):
+        """Which item columns are still live movies in `columns`"""
+        return columns.id_index().lookup(self.item_ids) != MISSING_INT
@@ -0,0 +1,114 @@
+import logging
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from app.models.columnar import IdIndex, MISSING_INT
+from app.services.ranking import top_k, top_k_rows
+
+ARTIFACT_KIND = "item_cf"
+DEFAULT_K = 50
+BLOCK_CELLS = 32 * 1024 * 1024
+
+
+def adjusted_cosine_columns(matrix):
+    """Center each user's values on their mean, then L2-normalize every item column.
+
+    Users whose values are all equal (e.g. only favorites) would center to
+    zero and vanish, so they are left uncentered.
+    """
+    centered = matrix.tocsr(copy=True).astype(np.float32)
+    n_users = centered.shape[0]
+    counts = np.diff(centered.indptr)
+    owners = np.repeat(np.arange(n_users), counts)
+    means = np.bincount(owners, weights=centered.data, minlength=n_users) / np.maximum(counts, 1)
+    row_max = np.full(n_users, -np.inf)
+    row_min = np.full(n_users, np.inf)
+    np.maximum.at(row_max, owners, centered.data)
+    np.minimum.at(row_min, owners, centered.data)
+    varies = row_max > row_min
+    centered.data -= np.where(varies[owners], means[owners], 0).astype(np.float32)
+    centered.eliminate_zeros()
+    return normalize(centered.tocsc(), norm="l2", axis=0)
+
+
+class ItemNeighbors:
+    """Item-item collaborative filtering with precomputed neighbour lists.
+
+    For every movie that has interactions, keeps its K most similar movies by
+    adjusted cosine as int32 item columns + float16 scores. Scoring a user is
+    a gather over the neighbour lists of the movies they touched and one
+    bincount, so cost depends on the user's history, not the number of users.
+    """
+
+    def __init__(self, item_ids, neighbor_cols, scores, checksum=None):
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.neighbor_cols = neighbor_cols
+        self.scores = scores
+        self.checksum = checksum
+        self.item_index = IdIndex(self.item_ids, np.arange(len(self.item_ids), dtype=np.int64))
+
+    @property
+    def k(self):
+        return self.neighbor_cols.shape[1]
+
+    @classmethod
+    def build(cls, interactions, k=DEFAULT_K, block_cells=BLOCK_CELLS):
+        """Blocked item x item products over the adjusted-cosine columns"""
+        normalized = adjusted_cosine_columns(interactions.matrix)
+        by_item = normalized.T.tocsr()      # items x users
+        users_items = normalized.tocsr()    # users x items
+        n = by_item.shape[0]
+        k_eff = max(0, min(k, n - 1))
+        neighbor_cols = np.full((n, k), MISSING_INT, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float16)
+        block = max(1, min(n, block_cells // max(n, 1)))
+
+        for start in range(0, n if k_eff else 0, block):
+            end = min(start + block, n)
+            sims = (by_item[start:end] @ users_items).toarray()
+            sims[np.arange(end - start), np.arange(start, end)] = 0
+            top, top_scores = top_k_rows(sims, k_eff)
+            # Only positively correlated neighbours are worth recommending from
+            valid = top_scores > 0
+            neighbor_cols[start:end, :k_eff] = np.where(valid, top, MISSING_INT)
+            scores[start:end, :k_eff] = np.where(valid, top_scores, 0)
+
+        logging.info(f"Item-item neighbours built: {n} movies x {k} neighbours.")
+        return cls(interactions.item_ids, neighbor_cols, scores, interactions.checksum())
+
+    def recommend(self, movie_ids, weights, top_n, allowed=None):
+        """(movie ids, scores): sum the neighbour lists of the user's movies, weighted by their signal"""
+        cols = self.item_index.lookup(movie_ids)
+        known = cols != MISSING_INT
+        cols, weights = cols[known], np.asarray(weights, dtype=np.float32)[known]
+        if not len(cols):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        neighbors = self.neighbor_cols[cols]
+        contributions = self.scores[cols].astype(np.float32) * weights[:, None]
+        valid = neighbors != MISSING_INT
+        totals = np.bincount(neighbors[valid], weights=contributions[valid], minlength=len(self.item_ids))
+        totals[cols] = 0  # already seen
+        if allowed is not None:
+            totals[~allowed] = 0
+        best = top_k(totals, top_n)
+        best = best[totals[best] > 0]
+        return self.item_ids[best], totals[best]
+
+    def item_mask(self, columns):
+        """Which of this model's items are still live movies in `columns`"""
+        return columns.id_index().lookup(self.item_ids) != MISSING_INT
+
+    # ===== Artifacts =====
+    def save(self, artifacts):
+        return artifacts.save(ARTIFACT_KIND, self.checksum, {
+            "item_ids": self.item_ids, "neighbor_cols": self.neighbor_cols, "scores": self.scores})
+
+    @classmethod
+    def load(cls, artifacts, checksum):
+        loaded = artifacts.load(ARTIFACT_KIND, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        logging.info(f"Item-item neighbours loaded from artifact {checksum}.")
+        return cls(arrays["item_ids"], arrays["neighbor_cols"], arrays["scores"], checksum)
@@ -0,0 +1,302 @@
+"""
+In-process background jobs.
+
+Handlers are registered by name. Submitting a job puts it on a priority
+heap (lower number runs first) served by a pool of worker threads, each
+running its job inside an app context. A job submitted while an identical
+one (same name and key) is still queued returns that queued job instead.
+
+CPU-bound steps inside a job (model training) go through `run_cpu`, which
+hands them to a ProcessPoolExecutor when process workers are configured so
+they stop competing with request threads for the GIL; their arguments and
+results must be picklable.
+
+Admin-visible jobs are "tracked": kept in a bounded history and, when a
+database path is configured, written to a small SQLite log so their status
+survives restarts and jobs that never finished are queued again at start.
+"""
+import heapq
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from app.database import db
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+JOB_WORKERS = 2
+MAX_HISTORY = 200
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class Job:
+    def __init__(self, name, args=None, key=None, priority=PRIORITY_NORMAL, job_id=None, created_at=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.args = args or {}
+        self.key = key
+        self.priority = priority
+        self.status = QUEUED
+        self.created_at = created_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """The job's result; raises TimeoutError if it has not finished within `timeout` seconds"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.id} still {self.status}")
+        return self.result
+
+    def to_dict(self):
+        result = self.result if _is_json(self.result) else repr(self.result)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "key": self.key,
+            "args": self.args,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": result,
+            "error": self.error,
+        }
+
+
+def _is_json(value):
+    try:
+        json.dumps(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+class JobHandler:
+    def __init__(self, name, run, priority, tracked):
+        self.name = name
+        self.run = run
+        self.priority = priority
+        self.tracked = tracked
+
+
+# ===== Durable Log =====
+class SQLiteJobLog:
+    """Tracked jobs in a standalone SQLite file: survives restarts, requeues unfinished work"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, key TEXT, args TEXT, priority INTEGER,
+                status TEXT NOT NULL, created_at REAL, started_at REAL, finished_at REAL,
+                result TEXT, error TEXT)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status)")
+
+    def save(self, job):
+        row = job.to_dict()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (row["id"], row["name"], row["key"], json.dumps(row["args"]), row["priority"], row["status"],
+                 row["created_at"], row["started_at"], row["finished_at"], json.dumps(row["result"]), row["error"]))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def recent(self, limit):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def unfinished(self):
+        """Jobs that were queued or running when the process stopped, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, key, args, priority, created_at FROM jobs WHERE status IN (?, ?) "
+                "ORDER BY created_at", (QUEUED, RUNNING)).fetchall()
+        return [Job(name, json.loads(args or "{}"), key, priority, job_id, created_at)
+                for job_id, name, key, args, priority, created_at in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        names = ("id", "name", "key", "args", "priority", "status", "created_at", "started_at",
+                 "finished_at", "result", "error")
+        job = dict(zip(names, row))
+        job["args"] = json.loads(job["args"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+# ===== Scheduler =====
+class JobScheduler:
+    """Named jobs on a priority queue with duplicate coalescing, a worker pool and an optional process pool"""
+
+    def __init__(self, app, workers=JOB_WORKERS, process_workers=0, log=None):
+        self.app = app
+        self.workers = workers
+        self.process_workers = process_workers
+        self.log = log
+        self._handlers = {}
+        self._heap = []
+        self._order = itertools.count()
+        self._pending = {}
+        self._jobs = {}
+        self._history = OrderedDict()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._processes = None
+
+    def register(self, name, run, priority=PRIORITY_NORMAL, tracked=True):
+        """`run(**args)` executes the job; untracked jobs are internal and never listed or persisted"""
+        self._handlers[name] = JobHandler(name, run, priority, tracked)
+
+    def is_public(self, name):
+        handler = self._handlers.get(name)
+        return handler is not None and handler.tracked
+
+    @property
+    def names(self):
+        return sorted(self._handlers)
+
+    def start(self):
+        if self._threads:
+            return
+        if self.process_workers:
+            # Forked (spawn would re-run the entry script, and with it create_app, in every child) and
+            # primed now, so all children are forked before the job and sync threads exist
+            self._processes = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                  mp_context=multiprocessing.get_context("fork"))
+            self._processes.submit(os.getpid).result()
+        if self.log is not None:
+            for job in self.log.unfinished():
+                if job.name in self._handlers and (job.name, job.key) not in self._pending:
+                    logging.info(f"Requeueing unfinished job {job.name} ({job.id}).")
+                    self._enqueue(job)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # ===== Submitting =====
+    def submit(self, name, args=None, key=None, priority=None):
+        """Queue a job (never blocks); returns the already-queued duplicate if there is one"""
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise KeyError(f"Unknown job '{name}'")
+        key = None if key is None else str(key)
+        with self._condition:
+            queued = self._pending.get((name, key))
+            if queued is not None:
+                # Keep the more urgent priority; the stale heap entry is skipped when popped
+                if priority is not None and priority < queued.priority:
+                    queued.priority = priority
+                    heapq.heappush(self._heap, (queued.priority, next(self._order), queued.id))
+                return queued
+            job = Job(name, args, key, handler.priority if priority is None else priority)
+            self._enqueue(job)
+        return job
+
+    def _enqueue(self, job):
+        with self._condition:
+            self._jobs[job.id] = job
+            self._pending[(job.name, job.key)] = job
+            heapq.heappush(self._heap, (job.priority, next(self._order), job.id))
+            self._record(job)
+            self._condition.notify()
+
+    def get(self, job_id):
+        """Status dict of a tracked job (live, recent, or from the durable log)"""
+        job = self._jobs.get(job_id) or self._history.get(job_id)
+        if job is not None and self._handlers[job.name].tracked:
+            return job.to_dict()
+        return self.log.get(job_id) if self.log is not None else None
+
+    def recent(self, limit=50):
+        if self.log is not None:
+            return self.log.recent(limit)
+        with self._condition:
+            live = [j for j in self._jobs.values() if self._handlers[j.name].tracked]
+            jobs = live + [j for j in self._history.values() if j.id not in self._jobs]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return [j.to_dict() for j in jobs[:limit]]
+
+    def stats(self):
+        with self._condition:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.workers, "process_workers": self.process_workers,
+                    "queued": counts.get(QUEUED, 0), "running": counts.get(RUNNING, 0),
+                    "jobs": self.names}
+
+    # ===== Workers =====
+    def _next(self):
+        with self._condition:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    # Skip entries left behind by a priority bump
+                    if job is not None and job.status == QUEUED:
+                        job.status = RUNNING
+                        job.started_at = time.time()
+                        self._pending.pop((job.name, job.key), None)
+                        return job
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            job = self._next()
+            self._record(job)
+            handler = self._handlers[job.name]
+            with self.app.app_context():
+                try:
+                    job.result = handler.run(**job.args)
+                    job.status = SUCCEEDED
+                except Exception as e:
+                    job.status = FAILED
+                    job.error = str(e)
+                    logging.error(f"Job {job.name} ({job.id}) failed", exc_info=True)
+                finally:
+                    db.session.remove()
+            job.finished_at = time.time()
+            with self._condition:
+                self._jobs.pop(job.id, None)
+                if handler.tracked:
+                    self._history[job.id] = job
+                    while len(self._history) > MAX_HISTORY:
+                        self._history.popitem(last=False)
+            self._record(job)
+            job._done.set()
+
+    def run_cpu(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) in the process pool when there is one, else inline; call from job workers"""
+        if self._processes is None:
+            return fn(*args, **kwargs)
+        return self._processes.submit(fn, *args, **kwargs).result()
+
+    def _record(self, job):
+        if self.log is not None and self._handlers[job.name].tracked:
+            try:
+                self.log.save(job)
+            except sqlite3.Error as e:
+                logging.error(f"Error recording job {job.id}", exc_info=True)
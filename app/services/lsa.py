@@ -0,0 +1,68 @@
+import logging
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+ARTIFACT_KIND = "lsa"
+ANN_ARTIFACT_KIND = "ivf_lsa"
+DEFAULT_DIM = 128
+
+
+class LSAEmbedding:
+    """Dense low-rank projection of the TF-IDF matrix (latent semantic analysis).
+
+    `vectors` holds one L2-normalized float32 row per TF-IDF row, C-contiguous,
+    so cosine similarity to a seed is a single GEMV and to a batch of seeds a
+    single GEMM. `components` projects new TF-IDF rows into the same space.
+    """
+
+    def __init__(self, components, vectors, checksum=None, requested_dim=None):
+        self.components = components
+        self.vectors = vectors
+        self.checksum = checksum
+        # Configured size; the fitted one can be smaller on a tiny catalog
+        self.requested_dim = requested_dim or components.shape[0]
+
+    @property
+    def dim(self):
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, matrix, dim=DEFAULT_DIM, checksum=None, seed=0):
+        # Rank is bounded by both sides of the matrix
+        fitted_dim = max(1, min(dim, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=fitted_dim, algorithm="randomized", random_state=seed)
+        svd.fit(matrix)
+        components = np.ascontiguousarray(svd.components_, dtype=np.float32)
+        logging.info(f"LSA embedding fitted: {matrix.shape[0]} movies x {fitted_dim} dimensions.")
+        return cls(components, cls._project(matrix, components), checksum, dim)
+
+    @staticmethod
+    def _project(matrix, components):
+        return np.ascontiguousarray(normalize(np.asarray(matrix @ components.T, dtype=np.float32)))
+
+    def transform(self, matrix):
+        """Unit LSA vectors for TF-IDF rows"""
+        return self._project(matrix, self.components)
+
+    def extend(self, added):
+        """Same projection with TF-IDF rows appended (catalog deltas); never refits"""
+        return LSAEmbedding(self.components, np.vstack([self.vectors, self.transform(added)]),
+                            requested_dim=self.requested_dim)
+
+    # ===== Artifacts =====
+    def save(self, artifacts):
+        return artifacts.save(ARTIFACT_KIND, self.checksum,
+                              {"components": self.components, "vectors": self.vectors},
+                              {"requested_dim": self.requested_dim})
+
+    @classmethod
+    def load(cls, artifacts, checksum, dim=DEFAULT_DIM):
+        loaded = artifacts.load(ARTIFACT_KIND, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        if meta.get("requested_dim") != dim:
+            return None  # built for another configured size
+        logging.info(f"LSA embedding loaded from artifact {checksum}.")
+        return cls(arrays["components"], arrays["vectors"], checksum, dim)
@@ -0,0 +1,161 @@
+"""
+Ranked quiz candidates per profile.
+
+Quiz profiles come from a small fixed set, so the quiz pipeline is run once
+per (profile type, genres, tags, era) and catalog version rather than once
+per page load. A request only drops the user's own movies from the cached
+list and nudges the rest towards genres the user already interacted with.
+"""
+import json
+import logging
+import threading
+
+import numpy as np
+
+from app.models.users import QuizResult
+from app.services.quiz_recommender import quiz_rows, genre_bits, explain
+
+# Candidates kept per profile; enough to survive per-user exclusions
+QUIZ_CANDIDATES = 60
+# Re-rank bonus per genre shared with the user's own movies (a genre match is worth 3)
+AFFINITY_WEIGHT = 0.5
+
+
+def profile_key(profile_type, genres, tags, year_start=None, year_end=None):
+    """Normalized cache key; genre order is kept because the first genre drives the fallback"""
+    genres = tuple(g.strip().lower() for g in genres or [] if g and g.strip())
+    tags = tuple(t.strip().lower() for t in tags or [] if t and t.strip())
+    return (profile_type or "", genres, tags, year_start, year_end)
+
+
+def _bit_counts(bits):
+    """Set bits per row of a (rows, words) uint64 mask"""
+    return np.unpackbits(np.ascontiguousarray(bits).view(np.uint8), axis=1).sum(axis=1)
+
+
+def hydrate(columns, rows, key):
+    """Movie dicts for quiz rows, with explanations for the top 10"""
+    movies = columns.to_dicts(rows)
+    _, genres, tags, year_start, year_end = key
+    for movie in movies[:10]:
+        movie['explanation'] = explain(movie, genres, tags, year_start, year_end)
+    return movies
+
+
+class QuizCandidateCache:
+    """profile key -> ranked (rows, match scores), dropped whenever the catalog version changes"""
+
+    def __init__(self, store, search_engine, recommender, size=QUIZ_CANDIDATES):
+        self.store = store
+        self.search_engine = search_engine
+        self.recommender = recommender
+        self.size = size
+        self._version = None
+        self._entries = {}
+        self._warmed_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.precomputed = 0
+
+    def _catalog_version(self, columns):
+        return columns.generation, self.store.version
+
+    def candidates(self, key):
+        """(rows, scores, columns) for a profile key, computed at most once per catalog version"""
+        index, columns = self.search_engine.index()
+        version = self._catalog_version(columns)
+        with self._lock:
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry + (columns,)
+            self.misses += 1
+        entry = self._compute(index, columns, key)
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = entry
+        return entry + (columns,)
+
+    def _compute(self, index, columns, key):
+        _, genres, tags, year_start, year_end = key
+        rows, scores, _ = quiz_rows(columns, index, self.recommender, list(genres), list(tags),
+                                    year_start, year_end, limit=self.size)
+        return rows, scores
+
+    # ===== Precompute =====
+    def warm(self, profiles=None):
+        """Compute every known profile for the current catalog version (once per version)"""
+        index, columns = self.search_engine.index()
+        version = self._catalog_version(columns)
+        if version == self._warmed_version:
+            return 0
+        keys = profiles if profiles is not None else self.known_profiles()
+        for key in keys:
+            with self._lock:
+                if version != self._version:
+                    self._entries = {}
+                    self._version = version
+                if key in self._entries:
+                    continue
+            entry = self._compute(index, columns, key)
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = entry
+                    self.precomputed += 1
+        self._warmed_version = version
+        logging.info(f"Quiz candidates precomputed for {len(keys)} profiles (version {version}).")
+        return len(keys)
+
+    @staticmethod
+    def known_profiles():
+        """Distinct profile keys among saved quiz results"""
+        rows = QuizResult.query.with_entities(QuizResult.profile_type, QuizResult.top_genres, QuizResult.tags)\
+            .distinct().all()
+        keys = []
+        for profile_type, top_genres, tags in rows:
+            key = profile_key(profile_type, json.loads(top_genres or "[]"), json.loads(tags or "[]"))
+            if key[1] and key not in keys:
+                keys.append(key)
+        return keys
+
+    # ===== Requests =====
+    def ranked_rows(self, key, user_id=None, top_n=20, own_ids=None):
+        """(rows, columns): cached candidates minus the user's movies, lightly re-ranked.
+
+        The user's movies come from `own_ids` when given, else from the interaction matrix.
+        """
+        rows, scores, columns = self.candidates(key)
+        if own_ids is None:
+            interactions = self.recommender.interactions
+            user_row = interactions.user_row(user_id) if interactions is not None and user_id is not None else None
+            own_ids = interactions.user_items(user_row)[0] if user_row is not None else []
+        own_rows = columns.rows_for_ids(own_ids)
+        if len(own_rows):
+            keep = ~np.isin(rows, own_rows)
+            rows, scores = rows[keep], scores[keep]
+            bits = genre_bits(columns)
+            affinity = np.bitwise_or.reduce(bits[own_rows], axis=0)
+            scores = scores + AFFINITY_WEIGHT * _bit_counts(bits[rows] & affinity)
+        # Stable: equal scores keep the cached (score, rating) order
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        return rows[order], columns
+
+    def recommend(self, key, user_id=None, top_n=20, own_ids=None):
+        """Movie dicts for one user, the top 10 with explanations"""
+        rows, columns = self.ranked_rows(key, user_id, top_n, own_ids)
+        return hydrate(columns, rows, key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "profiles": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "precomputed": self.precomputed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,5 +1,179 @@
 from flask import current_app
+import numpy as np
+from app.models.columnar import MISSING_INT
 from app.services.recommender import MovieRecommender
+from app.services.search_engine import tokenize
+
+# Search index fields a tag is looked up in when filtering, and when scoring a match
+TAG_FILTER_FIELDS = ("title", "genres", "plot", "keywords", "director", "cast")
+TAG_SCORE_FIELDS = ("title", "plot", "keywords")
+
+
+# ===== Per-Snapshot Indexes =====
+def genre_bits(columns):
+    """(rows, words) uint64 genre bitmask: bit c of the row is set when it has genre code c"""
+    def build():
+        genre_codes = columns.genre_codes
+        words = max(1, (len(columns.genre_vocab) + 63) // 64)
+        bits = np.zeros((len(columns), words), dtype=np.uint64)
+        codes = genre_codes.codes.astype(np.int64)
+        np.bitwise_or.at(bits, (genre_codes.owners, codes // 64),
+                         np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+        return bits
+    return columns.cached("quiz_genre_bits", build)
+
+
+def genre_query_bits(columns, genre):
+    """Bitmask of every genre code whose name contains `genre` (same matching as genre_mask)"""
+    words = genre_bits(columns).shape[1]
+    codes = columns.genre_vocab.codes_matching(genre).astype(np.int64)
+    # Codes newer than this snapshot belong to no row of it
+    codes = codes[codes < words * 64]
+    query = np.zeros(words, dtype=np.uint64)
+    np.bitwise_or.at(query, codes // 64, np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+    return query
+
+
+def tag_rows(index, columns, tag, fields=TAG_FILTER_FIELDS):
+    """Sorted rows where `tag` occurs in any of `fields`, from the search postings.
+
+    The tag's words must appear consecutively and the last one may be the
+    start of a longer word ("sci-fi" matches "Sci-Fi", "fun" matches "funny").
+    Lookup cost follows the tag's postings, so nothing is cached per tag.
+    """
+    tokens = tokenize(tag)
+    if not tokens:
+        return np.empty(0, dtype=np.int64)
+    rows = set()
+    for field in fields:
+        rows.update(index.phrase_rows(field, tokens, prefix_last=True))
+    rows = np.array(sorted(rows), dtype=np.int64)
+    return rows[rows < len(columns)]
+
+
+def _in(rows, posting):
+    return np.isin(rows, posting, assume_unique=True)
+
+
+# ===== Ranking =====
+def _diversify(columns, rows, limit):
+    """At most max(2, limit // groups) per primary genre, best rated first; rating ties keep input order"""
+    genre_codes = columns.genre_codes
+    starts, ends = genre_codes.offsets[rows], genre_codes.offsets[rows + 1]
+    has_genre = ends > starts
+    primary = np.full(len(rows), MISSING_INT, dtype=np.int64)
+    primary[has_genre] = genre_codes.codes[starts[has_genre]]
+    groups, first_seen, group_of = np.unique(primary, return_index=True, return_inverse=True)
+    # Groups in order of first appearance
+    group_rank = np.argsort(np.argsort(first_seen, kind="stable"), kind="stable")[group_of]
+    max_per_genre = max(2, limit // max(len(groups), 1))
+
+    ratings = columns.ratings_or_zero()[rows]
+    position = np.arange(len(rows))
+    order = np.lexsort((position, -ratings, group_rank))
+    # Rank inside each group after sorting
+    sorted_groups = group_rank[order]
+    group_start = np.searchsorted(sorted_groups, sorted_groups, side="left")
+    kept = order[(np.arange(len(order)) - group_start) < max_per_genre]
+    # Concatenating groups and then stable-sorting by rating == rating, then group, then within-group order
+    kept = kept[np.lexsort((position[kept], group_rank[kept], -ratings[kept]))]
+    return rows[kept[:limit]]
+
+
+def _best(scores, ratings, limit):
+    """Positions of the `limit` best by (score, rating), ties in input order, via argpartition"""
+    n = len(scores)
+    if limit < n:
+        kth = np.partition(scores, n - limit)[n - limit]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -ratings[candidates], -scores[candidates]))
+    return candidates[order][:limit]
+
+
+def explain(movie, genres, tags, year_start=None, year_end=None):
+    """Why a quiz recommendation was made, for display"""
+    explanations = []
+    if genres and movie.get('genres'):
+        matched_genres = [g for g in genres if g in movie['genres'].lower()]
+        if matched_genres:
+            explanations.append(f"Matches your preferred genres: {', '.join(matched_genres[:2])}")
+    if tags and any(t in str(movie.get('title', '')).lower() for t in tags):
+        matched_tags = [t for t in tags if t in str(movie.get('title', '')).lower()]
+        if matched_tags:
+            explanations.append(f"Matches your tags: {', '.join(matched_tags[:2])}")
+    if year_start and year_end and movie.get('year') is not None:
+        if year_start <= movie['year'] <= year_end:
+            explanations.append(f"From your preferred era ({year_start}-{year_end})")
+    return ' • '.join(explanations) if explanations else "Recommended based on quiz preferences"
+
+
+def quiz_rows(columns, index, recommender, genres, tags, year_start=None, year_end=None, user_id=None, limit=20):
+    """(rows, match scores, candidates before the cut) for parsed, lowercased quiz parameters, best first.
+
+    `index` is the SearchIndex of `columns` (see SearchEngine.index()).
+    """
+    # Start with all movies (as row numbers into the columnar store)
+    rows = columns.view_rows()
+
+    # 1️⃣ Filter by genres: one AND per genre against the bitmasks
+    genre_queries = [genre_query_bits(columns, g) for g in genres]
+    if genres:
+        bits = genre_bits(columns)[rows]
+        rows = rows[np.any([(bits & q).any(axis=1) for q in genre_queries], axis=0)]
+
+    # 2️⃣ Filter by year range
+    if year_start and year_end:
+        years = columns.year[rows]
+        rows = rows[(years != MISSING_INT) & (years >= year_start) & (years <= year_end)]
+
+    # 3️⃣ Filter by tags (title, genres, plot, keywords, director, cast) via the search postings
+    if tags:
+        rows = rows[np.any([_in(rows, tag_rows(index, columns, t)) for t in tags], axis=0)]
+
+    # 4️⃣ Apply fallback if too few movies
+    if len(rows) < 5:
+        fallback = None
+        if user_id:
+            hybrid_results = recommender.hybrid_recommendations(
+                user_id=user_id,
+                genre=genres[0] if genres else None,
+                top_n=limit
+            )
+            fallback = hybrid_results or None
+        if fallback is None or len(fallback) < 5:
+            if genres:
+                fallback = recommender.get_similar_by_genre(genres[0], limit)
+            else:
+                fallback = recommender.get_popular_movies(limit)
+        rows = columns.rows_for_ids([m['id'] for m in fallback])
+
+    # 5️⃣ Apply diversity (avoid repeating same genres)
+    if len(rows) > 10:
+        rows = _diversify(columns, rows, limit)
+
+    # 6️⃣ Compute match scores as arrays: genres 3 each, tags 1 each, up to 2 for the era
+    scores = np.zeros(len(rows))
+    if genres:
+        bits = genre_bits(columns)[rows]
+        for q in genre_queries:
+            scores += 3 * (bits & q).any(axis=1)
+    for t in tags:
+        scores += _in(rows, tag_rows(index, columns, t, TAG_SCORE_FIELDS))
+    if year_start and year_end:
+        years = columns.year[rows].astype(np.float64)
+        in_range = (columns.year[rows] != MISSING_INT) & (years >= year_start) & (years <= year_end)
+        range_middle = (year_start + year_end) / 2
+        max_diff = max(abs(year_start - range_middle), abs(year_end - range_middle))
+        if max_diff > 0:
+            scores += np.where(in_range, (1 - np.abs(years - range_middle) / max_diff) * 2, 0)
+    scores = np.round(scores, 2)
+
+    # Sort by match score, then rating
+    best = _best(scores, columns.ratings_or_zero()[rows], limit)
+    return rows[best], scores[best], len(rows)
+
 
 def get_quiz_recommendations(params):
     """
@@ -18,136 +192,29 @@ def get_quiz_recommendations(params):
         genres = [g.strip().lower() for g in genres_param.split(',') if g.strip()] if genres_param else []
         tags = [t.strip().lower() for t in tags_param.split(',') if t.strip()] if tags_param else []
 
-        # Get movie store and recommender from app context
-        store = current_app.config['MOVIE_STORE']
+        # Get the search index (and its column snapshot) and recommender from app context
+        index, columns = current_app.config['SEARCH_ENGINE'].index()
         recommender: MovieRecommender = current_app.config['RECOMMENDER']
 
-        # Start with all movies
-        filtered_movies = store.get_all_movies()
-
-        # 1️⃣ Filter by genres
-        if genres:
-            filtered_movies = [
-                m for m in filtered_movies
-                if any(g in m.get('genres', '').lower() for g in genres)
-            ]
-
-        # 2️⃣ Filter by year range
-        if year_start and year_end:
-            filtered_movies = [
-                m for m in filtered_movies
-                if isinstance(m.get('year'), (int, float)) and year_start <= m['year'] <= year_end
-            ]
-
-        # 3️⃣ Filter by tags (search across title, plot, keywords, director, cast)
-        if tags:
-            def matches_tags(movie):
-                search_text = ' '.join([
-                    str(movie.get('title', '')).lower(),
-                    str(movie.get('genres', '')).lower(),
-                    str(movie.get('plot', '')).lower(),
-                    str(movie.get('keywords', '')).lower(),
-                    str(movie.get('director', '')).lower(),
-                    ' '.join([c.lower() for c in movie.get('cast', [])]) if isinstance(movie.get('cast', []), list) else str(movie.get('cast', '')).lower()
-                ])
-                return any(tag in search_text for tag in tags)
-
-            filtered_movies = [m for m in filtered_movies if matches_tags(m)]
-
-        # 4️⃣ Apply fallback if too few movies
-        if len(filtered_movies) < 5:
-            if user_id:
-                hybrid_results = recommender.hybrid_recommendations(
-                    user_id=user_id,
-                    genre=genres[0] if genres else None,
-                    top_n=limit
-                )
-                filtered_movies = hybrid_results if hybrid_results else filtered_movies
-            if len(filtered_movies) < 5:
-                if genres:
-                    filtered_movies = recommender.get_similar_by_genre(genres[0], limit)
-                else:
-                    filtered_movies = recommender.get_popular_movies(limit)
-
-        # 5️⃣ Apply diversity (avoid repeating same genres)
-        if len(filtered_movies) > 10:
-            grouped = {}
-            for movie in filtered_movies:
-                primary_genre = movie.get('genres', '').split(',')[0].strip() if movie.get('genres') else 'Other'
-                grouped.setdefault(primary_genre, []).append(movie)
-
-            filtered_movies = []
-            max_per_genre = max(2, limit // max(len(grouped), 1))
-            for movies in grouped.values():
-                movies.sort(key=lambda x: x.get('rating', 0), reverse=True)
-                filtered_movies.extend(movies[:max_per_genre])
-            filtered_movies.sort(key=lambda x: x.get('rating', 0), reverse=True)
-            filtered_movies = filtered_movies[:limit]
-
-        # 6️⃣ Compute match scores and explanations
-        for movie in filtered_movies:
-            match_score = 0
-
-            # Genre match
-            if genres and movie.get('genres'):
-                movie_genres = movie['genres'].lower()
-                match_score += sum(3 for g in genres if g in movie_genres)
-
-            # Tag match
-            if tags:
-                search_text = ' '.join([
-                    str(movie.get('title', '')).lower(),
-                    str(movie.get('plot', '')).lower(),
-                    str(movie.get('keywords', '')).lower()
-                ])
-                match_score += sum(1 for t in tags if t in search_text)
-
-            # Year match
-            if year_start and year_end and 'year' in movie:
-                year = movie['year']
-                if year_start <= year <= year_end:
-                    range_middle = (year_start + year_end) / 2
-                    year_diff = abs(year - range_middle)
-                    max_diff = max(abs(year_start - range_middle), abs(year_end - range_middle))
-                    if max_diff > 0:
-                        match_score += (1 - year_diff / max_diff) * 2
-
-            movie['match_score'] = round(match_score, 2)
-
-        # Sort by match score, then rating
-        filtered_movies.sort(key=lambda x: (x.get('match_score', 0), x.get('rating', 0)), reverse=True)
+        rows, _, candidates = quiz_rows(columns, index, recommender, genres, tags, year_start, year_end,
+                                        user_id, limit)
+        filtered_movies = columns.to_dicts(rows)
 
         # Add explanation for top 10
         for movie in filtered_movies[:10]:
-            explanations = []
-            if genres and movie.get('genres'):
-                matched_genres = [g for g in genres if g in movie['genres'].lower()]
-                if matched_genres:
-                    explanations.append(f"Matches your preferred genres: {', '.join(matched_genres[:2])}")
-            if tags and any(t in str(movie.get('title', '')).lower() for t in tags):
-                matched_tags = [t for t in tags if t in str(movie.get('title', '')).lower()]
-                if matched_tags:
-                    explanations.append(f"Matches your tags: {', '.join(matched_tags[:2])}")
-            if year_start and year_end and 'year' in movie:
-                if year_start <= movie['year'] <= year_end:
-                    explanations.append(f"From your preferred era ({year_start}-{year_end})")
-            movie['explanation'] = ' • '.join(explanations) if explanations else "Recommended based on quiz preferences"
-
-        # Remove internal match_score
-        for movie in filtered_movies:
-            movie.pop('match_score', None)
+            movie['explanation'] = explain(movie, genres, tags, year_start, year_end)
 
         return {
             "success": True,
-            "recommendations": filtered_movies[:limit],
-            "count": len(filtered_movies[:limit]),
+            "recommendations": filtered_movies,
+            "count": len(filtered_movies),
             "quiz_parameters": {
                 "genres": genres,
                 "tags": tags,
                 "year_range": [year_start, year_end] if year_start and year_end else None
             },
             "algorithm": "Quiz-Based Recommendations",
-            "diversity_applied": len(filtered_movies) > 1
+            "diversity_applied": candidates > 1
         }
 
     except Exception as e:
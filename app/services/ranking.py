@@ -0,0 +1,68 @@
+"""
+Top-k selection shared by the recommenders and routes.
+
+Ranking paths only ever need the best few candidates, so they select with
+np.argpartition (O(n)) and sort just the winners, instead of sorting the
+whole candidate set. Ties resolve by position, exactly like a stable sort.
+Whole-catalog rankings that don't depend on the request are computed once
+per column snapshot (i.e. per catalog version) and sliced per request.
+"""
+import numpy as np
+
+
+def top_k(scores, k):
+    """Positions of the `k` largest scores, best first"""
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+
+def top_k_rows(scores, k):
+    """Row-wise top-k of a 2-D score block: (positions, scores), best first per row"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0), dtype=scores.dtype)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    chosen = np.take_along_axis(scores, top, axis=1)
+    kth = chosen.min(axis=1, keepdims=True)
+    # argpartition picks among ties at the cut arbitrarily; redo those rows like top_k
+    for i in np.flatnonzero((scores == kth).sum(axis=1) > (chosen == kth).sum(axis=1)):
+        top[i] = top_k(scores[i], k)
+    top.sort(axis=1)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+# ===== Precomputed Catalog Rankings =====
+def popular_scores(columns, rating_weight=0.7, popularity_weight=0.3):
+    """Weighted rating + popularity of every row (dead rows included), computed once per snapshot"""
+    return columns.cached(("popular_scores", rating_weight, popularity_weight),
+                          lambda: columns.ratings_or_zero() * rating_weight + columns.popularity_or_zero() * popularity_weight)
+
+
+def popular_rows(columns, rating_weight=0.7, popularity_weight=0.3):
+    """Live rows by weighted rating + popularity, computed once per snapshot"""
+    def build():
+        rows = columns.view_rows()
+        scores = popular_scores(columns, rating_weight, popularity_weight)[rows]
+        return rows[np.argsort(-scores, kind="stable")]
+    return columns.cached(("popular", rating_weight, popularity_weight), build)
+
+
+def highest_rated_rows(columns):
+    """Live rows with a rating, best first, computed once per snapshot"""
+    def build():
+        ratings = columns.ratings_or_zero()
+        rows = columns.view_rows()
+        rows = rows[ratings[rows] > 0]
+        return rows[np.argsort(-ratings[rows], kind="stable")]
+    return columns.cached("highest_rated", build)
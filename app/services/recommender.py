@@ -1,151 +1,593 @@
 import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import numpy as np
+from app.models.columnar import MISSING_INT
+from app.models.data_loader import MovieDataStore
+from app.services import content_model, als
+from app.services.content_model import ContentModel, normalize_text, movie_to_text
+from app.services.similarity_table import SimilarityTable
+from app.services.ranking import top_k, top_k_rows, popular_rows, popular_scores
+from app.services.interactions import InteractionMatrix
+from app.services.item_cf import ItemNeighbors
+from app.services.als import ALSModel
+from app.services.ann_index import IVFIndex
+from app.services.lsa import LSAEmbedding
+from app.services import fusion
 
 logging.basicConfig(level=logging.INFO)
 
+# Hybrid sources run concurrently on a shared, bounded pool
+HYBRID_WORKERS = 8
+# Seconds a hybrid source may take before its precomputed fallback is used instead
+HYBRID_SOURCE_TIMEOUT = 0.5
+# Fixed candidate-set size each hybrid source hands to fusion
+HYBRID_CANDIDATES = 50
+# Most results one batch sub-query may ask for
+MAX_BATCH_TOP_N = 100
+
 
 class MovieRecommender:
-    def __init__(self, movies, user_interactions=None):
-        self.movies = movies
+    def __init__(self, movies, user_interactions=None, artifacts=None):
+        # Accept the columnar store directly, or a plain list of movie dicts
+        self.store = movies if isinstance(movies, MovieDataStore) else MovieDataStore.from_dicts(movies)
         self.user_movie_interactions = user_interactions or {}
+        # users x movies CSR for collaborative filtering; replaced wholesale by set_interactions()
+        self.interactions = InteractionMatrix.from_legacy(self.user_movie_interactions)
+        # Precomputed item-item neighbour lists, built off the request path
+        self.item_neighbors = None
+        # Implicit-feedback ALS factors for personalized recommendations
+        self.als_model = None
+        # IVF lists probed per ANN query (None: the index default); higher is slower and more exact
+        self.ann_nprobe = None
+        # Dimensions of the optional LSA stage over TF-IDF (0: similarity stays on the sparse matrix)
+        self.lsa_dim = 0
+        # Per-field weights of the content vectors (None: FIELD_WEIGHTS)
+        self.field_weights = None
+        # Optional ArtifactStore with prebuilt, memory-mapped models
+        self.artifacts = artifacts
         self.tfidf_matrix = None
         self.tfidf_vectorizer = None
         self._tfidf_built = False
+        # Content models by column generation; a background rebuild stages the next one here
+        self._content_models = {}
+        self._content_lock = threading.Lock()
+        self.source_timeout = HYBRID_SOURCE_TIMEOUT
+        self._source_pool = ThreadPoolExecutor(max_workers=HYBRID_WORKERS, thread_name_prefix="hybrid-source")
+
+    @property
+    def movies(self):
+        """List-like view of the catalog (kept for older callers)"""
+        return self.store.get_all_movies()
 
     # ===== Helper Functions =====
     def _normalize_text(self, text):
-        return str(text or "").lower().strip()
+        return normalize_text(text)
 
     def _movie_to_text(self, movie):
-        return " ".join([
-            self._normalize_text(movie.get("title")),
-            self._normalize_text(movie.get("genres")),
-            self._normalize_text(movie.get("director")),
-            self._normalize_text(movie.get("cast")),
-            self._normalize_text(movie.get("plot")),
-            self._normalize_text(movie.get("keywords"))
-        ])
+        return movie_to_text(movie)
 
     def _ensure_tfidf_matrix(self):
-        """Build TF-IDF matrix only once"""
-        if self._tfidf_built:
+        """Return the TF-IDF model for the current catalog snapshot.
+
+        Fits once per catalog generation; rows added since then are folded in
+        with the existing vocabulary instead of refitting.
+        """
+        columns = self.store.columns
+        model = self._content_models.get(columns.generation)
+        if model is not None and model.columns is columns:
+            return model
+        try:
+            with self._content_lock:
+                model = self._content_models.get(columns.generation)
+                if model is None:
+                    model = self._load_content_model(columns) or self.fit_content_model(columns)
+                elif model.columns is not columns:
+                    model = model.extend(columns)
+                self.add_content_model(model)
+            return model
+        except Exception as e:
+            logging.error("Error building TF-IDF matrix", exc_info=True)
+            return None
+
+    def fit_content_model(self, columns):
+        """Fit TF-IDF (and the LSA stage, if configured) for a column snapshot"""
+        model = ContentModel.fit(columns, self.field_weights)
+        self.add_lsa(model)
+        return model
+
+    def add_lsa(self, model):
+        """Attach the configured LSA projection to a freshly fitted or loaded model"""
+        if not self.lsa_dim:
             return
+        if self.artifacts is not None and model.checksum is not None:
+            model.lsa = LSAEmbedding.load(self.artifacts, model.checksum, self.lsa_dim)
+        if model.lsa is None:
+            model.lsa = LSAEmbedding.fit(model.matrix, self.lsa_dim, model.checksum)
+            if self.artifacts is not None and model.checksum is not None:
+                model.lsa.save(self.artifacts)
+
+    def _load_content_model(self, columns):
+        if self.artifacts is None:
+            return None
         try:
-            movie_texts = [self._movie_to_text(m) for m in self.movies]
-            self.tfidf_vectorizer = TfidfVectorizer(stop_words="english", max_features=5000)
-            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(movie_texts)
+            model = ContentModel.load(self.artifacts, columns, weights=self.field_weights)
+            if model is not None:
+                self.add_lsa(model)
+                model.neighbors = SimilarityTable.load(self.artifacts, model.checksum, model.space,
+                                                       model.params)
+                model.ann = IVFIndex.load(self.artifacts, model.ann_kind, model.checksum)
+            return model
+        except Exception as e:
+            logging.error("Error loading TF-IDF artifact", exc_info=True)
+            return None
+
+    def preload_content(self):
+        """Map a prebuilt TF-IDF artifact at boot, if one matches the catalog (never fits)"""
+        columns = self.store.columns
+        if columns.generation in self._content_models:
+            return True
+        model = self._load_content_model(columns)
+        if model is not None:
+            self.add_content_model(model)
+        return model is not None
+
+    def add_content_model(self, model):
+        """Install a content model, dropping models for older generations"""
+        models = {g: m for g, m in self._content_models.items() if g > model.columns.generation}
+        models[model.columns.generation] = model
+        self._content_models = models
+        if model.columns.generation >= self.store.columns.generation:
+            self.tfidf_matrix = model.matrix
+            self.tfidf_vectorizer = model.vectorizer
             self._tfidf_built = True
-            logging.info("TF-IDF matrix built successfully.")
+
+    def attach_neighbors(self, generation, table=None, ann=None):
+        """Hang a freshly built SimilarityTable and/or IVF index on the content model of `generation`"""
+        with self._content_lock:
+            model = self._content_models.get(generation)
+            if model is None:
+                return
+            # Built from an older model of the same generation in another vector space: drop it
+            if table is not None and table.space == model.space:
+                model.neighbors = table
+            if ann is not None and ann.centroids.shape[1] == model.vectors.shape[1]:
+                model.ann = ann
+
+    def set_interactions(self, interactions):
+        self.interactions = interactions
+
+    def set_item_neighbors(self, item_neighbors):
+        self.item_neighbors = item_neighbors
+
+    def set_als_model(self, als_model):
+        self.als_model = als_model
+
+    def load_cf_models(self):
+        """Map prebuilt item-item and ALS artifacts matching the current interactions, if any (never trains)"""
+        if self.artifacts is None:
+            return False
+        checksum = self.interactions.checksum()
+        try:
+            self.item_neighbors = ItemNeighbors.load(self.artifacts, checksum) or self.item_neighbors
+            als_model = ALSModel.load(self.artifacts, checksum)
+            if als_model is not None:
+                als_model.ann = IVFIndex.load(self.artifacts, als.ANN_ARTIFACT_KIND, checksum)
+                self.als_model = als_model
         except Exception as e:
-            logging.error("Error building TF-IDF matrix", exc_info=True)
+            logging.error("Error loading collaborative-filtering artifacts", exc_info=True)
+            return False
+        return self.item_neighbors is not None and self.als_model is not None
+
+    def sync_content(self):
+        """Fold catalog deltas into an already-built content model (no-op before first use)"""
+        if self._content_models:
+            self._ensure_tfidf_matrix()
 
     # ===== Movie Retrieval =====
     def get_movie_by_id(self, movie_id):
-        return next((m for m in self.movies if m["id"] == movie_id), None)
+        return self.store.get_movie_by_id(movie_id)
+
+    def get_many(self, movie_ids):
+        return self.store.get_many(movie_ids)
 
     # ===== Content-Based Recommendations =====
-    def get_similar_movies(self, movie_title, top_n=10):
+    def get_similar_movies(self, movie_title, top_n=10, year=None):
         try:
-            self._ensure_tfidf_matrix()
-            movie_idx = next((i for i, m in enumerate(self.movies)
-                              if self._normalize_text(m["title"]) == self._normalize_text(movie_title)), None)
+            model = self._ensure_tfidf_matrix()
+            movie_idx = model.titles.resolve(movie_title, model.columns, year)
             if movie_idx is None:
                 return self.get_popular_movies(top_n)
-
-            cosine_similarities = cosine_similarity(self.tfidf_matrix[movie_idx], self.tfidf_matrix).flatten()
-            similar_indices = [i for i in cosine_similarities.argsort()[::-1] if i != movie_idx][:top_n]
-            return [self.movies[i] for i in similar_indices]
+            return self._similar_to_row(model, movie_idx, top_n)
 
         except Exception as e:
             logging.error(f"Error in content-based recommendation for '{movie_title}'", exc_info=True)
             return self.get_popular_movies(top_n)
 
+    def get_similar_movies_by_id(self, movie_id, top_n=10):
+        """Like get_similar_movies, but the seed is a movie id (no title resolution)"""
+        try:
+            model = self._ensure_tfidf_matrix()
+            rows = model.columns.rows_for_ids([movie_id])
+            if not len(rows):
+                return self.get_popular_movies(top_n)
+            return self._similar_to_row(model, int(rows[0]), top_n)
+
+        except Exception as e:
+            logging.error(f"Error in content-based recommendation for movie {movie_id}", exc_info=True)
+            return self.get_popular_movies(top_n)
+
+    def _similar_to_row(self, model, movie_idx, top_n):
+        return model.columns.to_dicts(self._similar_rows(model, movie_idx, top_n))
+
+    def _similar_rows(self, model, movie_idx, top_n):
+        # Precomputed neighbours answer with one slice; stale or missing entries fall through
+        if model.neighbors is not None:
+            rows = model.neighbors.neighbors(movie_idx, model.columns, top_n)
+            if rows is not None:
+                return rows
+        return self._nearest_rows(model, model.query_vector([movie_idx]), top_n, exclude=[movie_idx])
+
+    def _nearest_rows(self, model, query, top_n, exclude=()):
+        """Live rows closest to `query`: through the IVF index when there is one, else an exact scan"""
+        columns = model.columns
+        if model.ann is not None:
+            allowed = columns.alive.copy()
+            allowed[list(exclude)] = False
+            rows, scores = model.ann.search(query, model.vectors, top_n, self.ann_nprobe, allowed)
+            return rows
+
+        # Model rows are unit length, so the dot product ranks like cosine similarity
+        similarities = model.similarities(query).ravel()
+        similarities[~columns.alive] = -np.inf
+        similarities[list(exclude)] = -np.inf
+        similar_indices = top_k(similarities, top_n)
+        return similar_indices[np.isfinite(similarities[similar_indices])]
+
+    def get_similar_movies_batch(self, movie_ids, top_n=10):
+        """Similar movies for many seeds at once: one GEMM (or sparse product) for the whole batch.
+
+        Returns one list per seed, in order; unknown seeds get an empty list.
+        """
+        try:
+            model = self._ensure_tfidf_matrix()
+            columns = model.columns
+            rows = columns.id_index().lookup(movie_ids)
+            known = np.flatnonzero(rows != MISSING_INT)
+            results = [[] for _ in movie_ids]
+            for position, neighbours in zip(known, self._similar_rows_batch(model, rows[known], top_n)):
+                results[position] = columns.to_dicts(neighbours)
+            return results
+
+        except Exception as e:
+            logging.error(f"Error in batch content-based recommendation for movies {movie_ids}", exc_info=True)
+            return [self.get_popular_movies(top_n) for _ in movie_ids]
+
+    def _similar_rows_batch(self, model, seeds, top_n):
+        """Live neighbour rows for each seed row.
+
+        Same structures as the single-seed path: the precomputed neighbour table first, then the IVF
+        index; only seeds neither can answer share one product against the whole catalog.
+        """
+        results = [None] * len(seeds)
+        if model.neighbors is not None:
+            for i, seed in enumerate(seeds):
+                results[i] = model.neighbors.neighbors(int(seed), model.columns, top_n)
+        misses = [i for i, rows in enumerate(results) if rows is None]
+        if model.ann is not None:
+            for i in misses:
+                results[i] = self._nearest_rows(model, model.query_vector([int(seeds[i])]), top_n,
+                                                exclude=[int(seeds[i])])
+        elif misses:
+            columns = model.columns
+            miss_seeds = np.asarray(seeds)[misses]
+            similarities = model.similarities(model.vectors[miss_seeds])
+            similarities[:, ~columns.alive] = -np.inf
+            similarities[np.arange(len(miss_seeds)), miss_seeds] = -np.inf
+            top, scores = top_k_rows(similarities, top_n)
+            for i, neighbours, neighbour_scores in zip(misses, top, scores):
+                results[i] = neighbours[np.isfinite(neighbour_scores)]
+        return results
+
+    def get_similar_to_movies(self, movie_ids, top_n=10):
+        """"More like these": movies closest to the centroid of several seed movies"""
+        try:
+            model = self._ensure_tfidf_matrix()
+            rows = model.columns.rows_for_ids(movie_ids)
+            if not len(rows):
+                return self.get_popular_movies(top_n)
+            query = model.query_vector(rows)
+            return model.columns.to_dicts(self._nearest_rows(model, query, top_n, exclude=rows))
+
+        except Exception as e:
+            logging.error(f"Error in content-based recommendation for movies {movie_ids}", exc_info=True)
+            return self.get_popular_movies(top_n)
+
     def get_similar_by_genre(self, genre, top_n=10):
         try:
-            genre_lower = self._normalize_text(genre)
-            # Get all movies with this genre
-            genre_movies = [m for m in self.movies if genre_lower in self._normalize_text(m.get("genres"))]
-            
-            # Sort by rating (highest first)
-            genre_movies.sort(key=lambda x: x.get("rating", 0), reverse=True)
-            
-            # Return top N
-            return genre_movies[:top_n]
+            columns = self.store.columns
+            return columns.to_dicts(self._genre_rows(columns, genre, top_n))
             
         except Exception as e:
             logging.error(f"Error in genre-based recommendation for '{genre}'", exc_info=True)
             # Fallback: get popular movies
             return self.get_popular_movies(top_n)
+
+    def _genre_rows(self, columns, genre, top_n):
+        # Get all movies with this genre
+        rows = columns.view_rows()
+        rows = rows[columns.genre_mask(genre)[rows]]
+
+        # Top N by rating (highest first)
+        return rows[top_k(columns.ratings_or_zero()[rows], top_n)]
+
         # ===== Popular Movies =====
     def get_popular_movies(self, top_n=10, rating_weight=0.7, popularity_weight=0.3):
         try:
-            popular_movies = self.movies.copy()
-            popular_movies.sort(key=lambda x: x.get("rating", 0) * rating_weight + x.get("popularity", 0) * popularity_weight,
-                                reverse=True)
-            return popular_movies[:min(top_n, len(popular_movies))]
+            # Ranked once per catalog version, sliced per request
+            columns = self.store.columns
+            return columns.to_dicts(popular_rows(columns, rating_weight, popularity_weight)[:top_n])
         except Exception as e:
             logging.error("Error fetching popular movies", exc_info=True)
             return self.movies[:top_n]
 
     # ===== Collaborative Filtering =====
-    def collaborative_recommendations(self, user_id, top_n=10, min_common=2, similarity_threshold=0.5):
+    def collaborative_recommendations(self, user_id, top_n=10, min_common=1, similarity_threshold=0.1, neighbours=50):
+        """User-based CF over the sparse interaction matrix.
+
+        Neighbours are the `neighbours` users with the highest cosine similarity
+        (at least `similarity_threshold`, sharing at least `min_common` movies),
+        found with one sparse mat-vec; their weighted interactions score the
+        movies this user hasn't touched yet.
+        """
         try:
-            current_ratings = self.user_movie_interactions.get(user_id, {}).get("rated_movies", {})
-            if not current_ratings:
+            interactions = self.interactions
+            user_row = interactions.user_row(user_id)
+            if user_row is None:
                 return self.get_popular_movies(top_n)
 
-            similar_users = []
-            for other_id, other_data in self.user_movie_interactions.items():
-                if other_id == user_id:
-                    continue
-                other_ratings = other_data.get("rated_movies", {})
-                common_movies = set(current_ratings.keys()) & set(other_ratings.keys())
-                if len(common_movies) > min_common:
-                    similarity = sum(1 for m in common_movies if abs(current_ratings[m] - other_ratings[m]) <= 1) / len(common_movies)
-                    if similarity > similarity_threshold:
-                        similar_users.append((other_id, similarity))
-
-            recommendations = {}
-            for other_id, similarity in similar_users[:5]:
-                for movie_id, rating in self.user_movie_interactions[other_id].get("rated_movies", {}).items():
-                    if rating >= 4 and movie_id not in current_ratings:
-                        recommendations.setdefault(movie_id, {"score": 0, "ratings": rating})
-                        recommendations[movie_id]["score"] += similarity
-
-            recommended_movies = [self.get_movie_by_id(mid) for mid in recommendations.keys() if self.get_movie_by_id(mid)]
-            # Optional: sort by score
-            recommended_movies.sort(key=lambda m: recommendations[m["id"]]["score"], reverse=True)
-            return recommended_movies[:top_n]
+            columns = self.store.columns
+            movie_ids, scores = interactions.recommend_items(
+                user_row, top_n, k=neighbours, min_common=min_common,
+                similarity_threshold=similarity_threshold, allowed=interactions.item_mask(columns))
+            return columns.to_dicts(columns.rows_for_ids(movie_ids))
 
         except Exception as e:
             logging.error(f"Error in collaborative recommendations for user {user_id}", exc_info=True)
             return self.get_popular_movies(top_n)
 
-    # ===== Hybrid Recommendations =====
-    def hybrid_recommendations(self, user_id=None, movie_title=None, genre=None, top_n=20):
+    def collaborative_filtering(self, user_id, top_n=10):
+        """Item-item CF: sum the precomputed neighbour lists of the movies this user touched.
+
+        Falls back to user-based CF while the neighbour lists haven't been built,
+        or when none of the user's movies have neighbours yet.
+        """
+        try:
+            interactions = self.interactions
+            item_neighbors = self.item_neighbors
+            user_row = interactions.user_row(user_id)
+            if user_row is None:
+                return self.get_popular_movies(top_n)
+            if item_neighbors is None:
+                return self.collaborative_recommendations(user_id, top_n)
+
+            columns = self.store.columns
+            seen_ids, weights = interactions.user_items(user_row)
+            movie_ids, scores = item_neighbors.recommend(
+                seen_ids, weights, top_n, allowed=item_neighbors.item_mask(columns))
+            if not len(movie_ids):
+                return self.collaborative_recommendations(user_id, top_n)
+            return columns.to_dicts(columns.rows_for_ids(movie_ids))
+
+        except Exception as e:
+            logging.error(f"Error in item-based recommendations for user {user_id}", exc_info=True)
+            return self.get_popular_movies(top_n)
+
+    def personalized_recommendations(self, user_id, top_n=20):
+        """ALS recommendations for a user, or None when the model can't place them.
+
+        Users trained into the model use their stored factors; users who
+        interacted since the last training are folded in from the live matrix.
+        """
+        movie_ids = self.personalized_ids(user_id, top_n)
+        if movie_ids is None:
+            return None
+        columns = self.store.columns
+        return columns.to_dicts(columns.rows_for_ids(movie_ids))
+
+    def personalized_ids(self, user_id, top_n=20, items=None):
+        """ALS movie ids for a user, or None; `items` = (movie ids, weights) read just now folds the user in afresh"""
         try:
-            recommendations = []
+            als_model = self.als_model
+            if als_model is None:
+                return None
+            if items is not None:
+                seen_ids, weights = items
+                vector = als_model.fold_in(seen_ids, weights)
+            else:
+                interactions = self.interactions
+                user_row = interactions.user_row(user_id)
+                seen_ids, weights = interactions.user_items(user_row) if user_row is not None else (None, None)
+                vector = als_model.user_vector(user_id, seen_ids, weights)
+            if vector is None:
+                return None
 
-            # Split top_n fairly among available sources
-            sources = [s for s in [user_id, movie_title, genre] if s]
-            split_n = max(top_n // len(sources), 1) if sources else top_n
+            columns = self.store.columns
+            movie_ids, scores = als_model.recommend(
+                vector, top_n, exclude_ids=seen_ids, allowed=als_model.item_mask(columns), nprobe=self.ann_nprobe)
+            return movie_ids
 
+        except Exception as e:
+            logging.error(f"Error in ALS recommendations for user {user_id}", exc_info=True)
+            return None
+
+    # ===== Hybrid Recommendations =====
+    def hybrid_recommendations(self, user_id=None, movie_title=None, genre=None, top_n=20, weights=None, method="rrf"):
+        return self.hybrid_recommendations_with_meta(user_id, movie_title, genre, top_n, weights, method)[0]
+
+    def hybrid_recommendations_with_meta(self, user_id=None, movie_title=None, genre=None, top_n=20,
+                                         weights=None, method="rrf"):
+        """Hybrid recommendations plus per-source timings.
+
+        The genre, content and collaborative sources run concurrently on a
+        bounded pool, each returning a fixed-size scored candidate set. A
+        source that misses its deadline (or fails) is replaced by the
+        precomputed popular ranking. Candidates are combined by weighted
+        reciprocal rank fusion ("rrf") or normalized score blending ("blend"),
+        with the popular ranking as a low-weight prior that fills short lists.
+        Returns (recommendations, sources metadata).
+        """
+        try:
+            weights = {**fusion.SOURCE_WEIGHTS, **(weights or {})}
+            n = max(top_n, HYBRID_CANDIDATES)
+
+            calls = []
             if genre:
-                recommendations.extend(self.get_similar_by_genre(genre, split_n))
+                calls.append(("genre", self._genre_candidates, genre))
             if movie_title:
-                recommendations.extend(self.get_similar_movies(movie_title, split_n))
+                calls.append(("content", self._content_candidates, movie_title))
             if user_id:
-                recommendations.extend(self.collaborative_recommendations(user_id, split_n))
+                calls.append(("collaborative", self._collaborative_candidates, user_id))
 
-            # Fill remaining slots with popular movies
-            if len(recommendations) < top_n:
-                recommendations.extend(self.get_popular_movies(top_n - len(recommendations)))
+            names, candidates, meta = [], [], []
+            for name, source_candidates, source_meta in self._run_sources(calls, n):
+                names.append(name)
+                candidates.append(source_candidates)
+                meta.append(source_meta)
+            names.append("popular")
+            candidates.append(self._popular_candidates(n))
 
-            # Remove duplicates
-            unique_movies = {m["id"]: m for m in recommendations}
-            return list(unique_movies.values())[:top_n]
+            movie_ids, scores = fusion.fuse(candidates, [weights.get(name, 0.0) for name in names], top_n, method)
+            columns = self.store.columns
+            return columns.to_dicts(columns.rows_for_ids(movie_ids)), meta
 
         except Exception as e:
             logging.error("Error in hybrid recommendations", exc_info=True)
-            return self.get_popular_movies(top_n)
+            return self.get_popular_movies(top_n), []
+
+    # Candidate sources: (movie ids, scores), best first
+    def _genre_candidates(self, genre, n):
+        columns = self.store.columns
+        rows = self._genre_rows(columns, genre, n)
+        return columns.ids[rows], columns.ratings_or_zero()[rows]
+
+    def _content_candidates(self, movie_title, n):
+        model = self._ensure_tfidf_matrix()
+        movie_idx = model.titles.resolve(movie_title, model.columns, None)
+        if movie_idx is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = self._similar_rows(model, movie_idx, n)
+        return model.columns.ids[rows], model.scores_for(model.query_vector([movie_idx]), rows)
+
+    def _collaborative_candidates(self, user_id, n):
+        interactions = self.interactions
+        user_row = interactions.user_row(user_id)
+        if user_row is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        item_neighbors = self.item_neighbors
+        if item_neighbors is not None:
+            seen_ids, weights = interactions.user_items(user_row)
+            movie_ids, scores = item_neighbors.recommend(
+                seen_ids, weights, n, allowed=item_neighbors.item_mask(self.store.columns))
+            if len(movie_ids):
+                return movie_ids, scores
+        return interactions.recommend_items(user_row, n, allowed=interactions.item_mask(self.store.columns))
+
+    def _popular_candidates(self, n, rating_weight=0.7, popularity_weight=0.3):
+        columns = self.store.columns
+        rows = popular_rows(columns, rating_weight, popularity_weight)[:n]
+        scores = popular_scores(columns, rating_weight, popularity_weight)[rows]
+        return columns.ids[rows], scores
+
+    def _run_sources(self, calls, top_n):
+        """Run (name, fn, arg) sources concurrently; yields (name, (ids, scores), metadata) in call order"""
+        def timed(fn, arg):
+            start = time.perf_counter()
+            result = fn(arg, top_n)
+            return result, (time.perf_counter() - start) * 1000
+
+        submitted = time.perf_counter()
+        deadline = submitted + self.source_timeout
+        futures = [(name, self._source_pool.submit(timed, fn, arg)) for name, fn, arg in calls]
+        for name, future in futures:
+            try:
+                candidates, elapsed_ms = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                status = "ok"
+            except FutureTimeout:
+                future.cancel()
+                candidates, status = self._popular_candidates(top_n), "timeout"
+                elapsed_ms = (time.perf_counter() - submitted) * 1000
+            except Exception as e:
+                logging.error(f"Hybrid source '{name}' failed", exc_info=True)
+                candidates, status = self._popular_candidates(top_n), "error"
+                elapsed_ms = (time.perf_counter() - submitted) * 1000
+            yield name, candidates, {"source": name, "status": status, "ms": round(elapsed_ms, 2), "count": len(candidates[0])}
+
+    # ===== Batch Recommendations =====
+    def batch_recommendations(self, queries, top_n=10, user_id=None):
+        """Answer many sub-queries against one catalog snapshot.
+
+        Each query is a dict with a "type" (popular, genre, similar, user) and
+        its parameters. Every "similar" seed is stacked into one similarity
+        product. "user" queries only answer for `user_id`, the signed-in user.
+        Returns (movies, results): each recommended movie once, and per query
+        either {"type", "ids"} or {"type", "error"}.
+        """
+        model = None
+        if any(q.get("type") == "similar" for q in queries):
+            model = self._ensure_tfidf_matrix()
+        columns = model.columns if model is not None else self.store.columns
+
+        results = [None] * len(queries)
+        row_lists = [None] * len(queries)
+        seeds = []  # (position, seed row, top_n)
+        for position, query in enumerate(queries):
+            kind = query.get("type")
+            try:
+                try:
+                    n = min(max(int(query.get("top_n", top_n)), 1), MAX_BATCH_TOP_N)
+                except (TypeError, ValueError):
+                    results[position] = {"type": kind, "error": "top_n must be an integer"}
+                    continue
+                if kind == "popular":
+                    row_lists[position] = popular_rows(columns)[:n]
+                elif kind == "genre":
+                    row_lists[position] = self._genre_rows(columns, query.get("genre"), n)
+                elif kind == "similar":
+                    if query.get("movie_id") is not None:
+                        rows = columns.rows_for_ids([query["movie_id"]])
+                        seed = int(rows[0]) if len(rows) else None
+                    else:
+                        seed = model.titles.resolve(query.get("movie_title"), columns, query.get("year"))
+                    if seed is None:
+                        results[position] = {"type": kind, "error": "movie not found"}
+                    else:
+                        seeds.append((position, seed, n))
+                elif kind == "user":
+                    if user_id is None:
+                        results[position] = {"type": kind, "error": "sign in to get user recommendations"}
+                    elif query.get("user_id") is not None and str(query["user_id"]) != str(user_id):
+                        results[position] = {"type": kind, "error": "user queries are limited to the signed-in user"}
+                    else:
+                        movies = self.collaborative_filtering(user_id, n)
+                        row_lists[position] = columns.rows_for_ids([m["id"] for m in movies])
+                else:
+                    results[position] = {"type": kind, "error": f"unknown query type '{kind}'"}
+            except Exception as e:
+                logging.error(f"Error in batch query {query}", exc_info=True)
+                results[position] = {"type": kind, "error": "query failed"}
+
+        if seeds:
+            neighbours = self._similar_rows_batch(model, np.array([s for _, s, _ in seeds]), max(n for _, _, n in seeds))
+            for (position, _, n), rows in zip(seeds, neighbours):
+                row_lists[position] = rows[:n]
+
+        for position, rows in enumerate(row_lists):
+            if rows is not None:
+                results[position] = {"type": queries[position].get("type"), "ids": columns.ids[rows].tolist()}
+
+        # One de-duplicated movie table, in first-seen order
+        all_rows = np.concatenate([np.empty(0, dtype=np.int64)] + [rows for rows in row_lists if rows is not None])
+        _, first = np.unique(all_rows, return_index=True)
+        return columns.to_dicts(all_rows[np.sort(first)]), results
@@ -0,0 +1,129 @@
+"""
+Response cache for the read-heavy catalog endpoints.
+
+Finished JSON bodies are kept as bytes, keyed by route, normalized query
+parameters and the catalog version (generation + change id), so a catalog
+delta makes old entries unreachable without any bookkeeping. Entries are
+bounded in number (LRU) and in age (TTL); the TTL also covers models that
+get swapped in the background. Concurrent misses for one key share a single
+computation.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+
+from flask import current_app, request
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 300
+
+
+class ResponseCache:
+    """Bounded LRU/TTL map of key -> serialized response, with single-flight misses"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so computations started earlier are not stored
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute):
+        """(value, hit) for `key`; `compute` returns (value, cacheable) and runs once per concurrent miss"""
+        leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], True
+                del self._entries[key]
+                self.expirations += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                leader, epoch = True, self._epoch
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            value, cacheable = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable and epoch == self._epoch:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(value)
+        return value, False
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def request_key():
+    """Route plus query parameters in a canonical order, blanks dropped"""
+    params = tuple(sorted((name, value.strip()) for name, values in request.args.lists()
+                          for value in values if value.strip()))
+    return request.path, params
+
+
+def cached_response(view):
+    """Serve a GET view from the app's ResponseCache; only 200 responses are stored"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.config.get("RESPONSE_CACHE")
+        if cache is None or request.method != "GET":
+            return view(*args, **kwargs)
+        store = current_app.config["MOVIE_STORE"]
+        key = request_key() + (store.columns.generation, store.version)
+
+        def compute():
+            response = current_app.make_response(view(*args, **kwargs))
+            return (response.get_data(), response.status_code, response.mimetype), response.status_code == 200
+
+        (body, status, mimetype), hit = cache.get_or_compute(key, compute)
+        response = current_app.response_class(body, status=status, mimetype=mimetype)
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+    return wrapper
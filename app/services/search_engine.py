@@ -0,0 +1,349 @@
+import bisect
+import math
+import re
+import threading
+
+import numpy as np
+
+
+TOKEN_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]+)"')
+# BM25F: per-field boosts and length normalization, shared saturation
+FIELD_WEIGHTS = {"title": 3.0, "genres": 1.5, "keywords": 1.2, "cast": 1.0, "director": 1.0, "plot": 0.5}
+FIELD_B = {"title": 0.5, "genres": 0.3, "keywords": 0.75, "cast": 0.5, "director": 0.3, "plot": 0.75}
+K1 = 1.2
+# Fuzzy matching: vocabulary of these fields, corrections kept per misspelled word
+FUZZY_FIELDS = ("title", "cast", "director")
+MAX_CORRECTIONS = 3
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or "").lower())
+
+
+def max_edits(token):
+    """Typos tolerated in a word of this length"""
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+
+def trigrams(token):
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a, b, limit):
+    """Damerau (optimal string alignment) distance, or limit + 1 once it must exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class FieldPostings:
+    """token -> postings (rows, term frequencies, positions) for one field.
+
+    Deltas append while queries read, so readers copy a posting's two
+    parallel lists under the same lock the writer appends them under.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.lengths = []
+        self._sorted_tokens = None
+        self._length_array = None
+        self._lock = threading.Lock()
+
+    def add(self, row, tokens):
+        positions = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        with self._lock:
+            for token, token_positions in positions.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = ([], [])
+                    self._sorted_tokens = None
+                posting[0].append(row)
+                posting[1].append(token_positions)
+        self.lengths.append(len(tokens))
+        self._length_array = None
+
+    def _posting(self, token):
+        """(rows, positions) copies of equal length, or None"""
+        posting = self.postings.get(token)
+        if posting is None:
+            return None
+        with self._lock:
+            return list(posting[0]), list(posting[1])
+
+    def rows(self, token):
+        posting = self._posting(token)
+        return posting[0] if posting else []
+
+    def term(self, token):
+        """(rows, term frequencies) as arrays"""
+        posting = self._posting(token)
+        if posting is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.array(posting[0], dtype=np.int64), np.array([len(p) for p in posting[1]], dtype=np.float64)
+
+    def positions(self, token):
+        """row -> positions of `token`"""
+        posting = self._posting(token)
+        return dict(zip(*posting)) if posting else {}
+
+    def length_array(self):
+        if self._length_array is None:
+            self._length_array = np.array(self.lengths, dtype=np.float64)
+        return self._length_array
+
+    def expand_prefix(self, prefix):
+        """Every indexed token starting with `prefix`: one contiguous slice of the sorted vocabulary"""
+        tokens = self._sorted_tokens
+        if tokens is None:
+            with self._lock:
+                tokens = self._sorted_tokens = sorted(self.postings)
+        start = bisect.bisect_left(tokens, prefix)
+        end = bisect.bisect_left(tokens, prefix + "\U0010ffff", lo=start)
+        return tokens[start:end]
+
+
+class TrigramIndex:
+    """Character trigrams -> vocabulary words, for typo-tolerant lookups.
+
+    Candidates share enough trigrams with the query word to be within reach
+    of the edit budget; only those are verified with the bounded distance.
+    """
+
+    def __init__(self):
+        self.words = []
+        self.grams = {}
+        self._known = set()
+
+    def add(self, tokens):
+        for token in tokens:
+            if token not in self._known:
+                self._known.add(token)
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, []).append(len(self.words))
+                self.words.append(token)
+
+    def similar(self, token, limit):
+        """[(word, distance)] within `limit` edits, closest first"""
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for slot in self.grams.get(gram, ()):
+                shared[slot] = shared.get(slot, 0) + 1
+        # One edit breaks at most 3 trigrams (a transposition 4)
+        needed = max(1, len(grams) - 4 * limit)
+        matches = []
+        for slot, count in shared.items():
+            if count >= needed:
+                word = self.words[slot]
+                distance = bounded_edit_distance(token, word, limit)
+                if distance <= limit:
+                    matches.append((word, distance))
+        return sorted(matches, key=lambda m: (m[1], m[0]))
+
+
+class SearchIndex:
+    """Per-field inverted index over one column generation.
+
+    Rows are only ever appended within a generation, so catalog deltas are
+    indexed incrementally; dead rows stay in the postings and are dropped at
+    query time. Query cost depends on the postings of the query terms, not
+    on the catalog size.
+    """
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.fields = {name: FieldPostings() for name in FIELD_WEIGHTS}
+        self.vocabulary = TrigramIndex()
+        self.size = 0
+
+    def add(self, columns, start):
+        """Index rows [start, len(columns))"""
+        for row in range(max(start, self.size), len(columns)):
+            for name, postings in self.fields.items():
+                tokens = tokenize(columns.field(row, name))
+                postings.add(row, tokens)
+                if name in FUZZY_FIELDS:
+                    self.vocabulary.add(tokens)
+        self.size = max(self.size, len(columns))
+
+    # ===== Phrases =====
+    def phrase_rows(self, field, tokens, prefix_last=False):
+        """Rows where `tokens` appear consecutively in `field` (the last one as a prefix, if asked)"""
+        postings = self.fields[field]
+        if not tokens:
+            return []
+        last = postings.expand_prefix(tokens[-1]) if prefix_last else [tokens[-1]]
+        if not last:
+            return []
+        candidates = None
+        for token in tokens[:-1]:
+            rows = set(postings.rows(token))
+            candidates = rows if candidates is None else candidates & rows
+        last_positions = {}
+        for token in last:
+            for row, positions in postings.positions(token).items():
+                if candidates is None or row in candidates:
+                    last_positions.setdefault(row, set()).update(positions)
+        if len(tokens) == 1:
+            return sorted(last_positions)
+
+        position_maps = [postings.positions(token) for token in tokens[:-1]]
+        offset = len(tokens) - 1
+        matches = []
+        for row in sorted(last_positions):
+            starts = set(position_maps[0][row])
+            for i, positions in enumerate(position_maps[1:], start=1):
+                starts &= {p - i for p in positions[row]}
+            if any(p + offset in last_positions[row] for p in starts):
+                matches.append(row)
+        return matches
+
+    def phrase_match(self, tokens, rows):
+        """Subset of `rows` where the phrase occurs in any field"""
+        rows = set(rows)
+        matched = set()
+        for field in self.fields:
+            matched.update(r for r in self.phrase_rows(field, tokens) if r in rows)
+        return matched
+
+    # ===== Typos =====
+    def known(self, token):
+        return any(token in postings.postings for postings in self.fields.values())
+
+    def corrections(self, tokens):
+        """{misspelled word: [(replacement, distance)]} for query words not in the index"""
+        corrected = {}
+        for token in tokens:
+            limit = max_edits(token)
+            if limit and not self.known(token):
+                matches = self.vocabulary.similar(token, limit)[:MAX_CORRECTIONS]
+                if matches:
+                    corrected[token] = matches
+        return corrected
+
+    # ===== Scoring =====
+    def bm25f(self, terms, alive, boosts=None):
+        """(rows, scores) of live rows matching any term; `boosts` scales individual terms"""
+        n_docs = max(int(alive[:self.size].sum()), 1)
+        parts_rows, parts_scores = [], []
+        for term in terms:
+            term_rows, term_tf = [], []
+            for name, postings in self.fields.items():
+                rows, tf = postings.term(term)
+                lengths = postings.length_array()
+                # Rows a concurrent delta is still indexing belong to a newer snapshot
+                current = rows < min(len(lengths), len(alive))
+                rows, tf = rows[current], tf[current]
+                if not len(rows):
+                    continue
+                average = max(lengths.mean(), 1.0)
+                b = FIELD_B[name]
+                term_rows.append(rows)
+                term_tf.append(FIELD_WEIGHTS[name] * tf / (1 - b + b * lengths[rows] / average))
+            if not term_rows:
+                continue
+            rows = np.concatenate(term_rows)
+            unique_rows, slots = np.unique(rows, return_inverse=True)
+            weighted_tf = np.bincount(slots, weights=np.concatenate(term_tf))
+            df = len(unique_rows)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            parts_rows.append(unique_rows)
+            boost = boosts.get(term, 1.0) if boosts else 1.0
+            parts_scores.append(boost * idf * weighted_tf / (K1 + weighted_tf))
+
+        if not parts_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows, slots = np.unique(np.concatenate(parts_rows), return_inverse=True)
+        scores = np.bincount(slots, weights=np.concatenate(parts_scores))
+        live = alive[rows]
+        return rows[live], scores[live]
+
+
+class SearchEngine:
+    """Keeps a SearchIndex in step with the movie store and answers /search queries"""
+
+    def __init__(self, store):
+        self.store = store
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self):
+        """(index, columns) for the current snapshot: rebuilt per generation, extended for deltas"""
+        columns = self.store.columns
+        index = self._index
+        if index is not None and index.generation == columns.generation and index.size >= len(columns):
+            return index, columns
+        with self._lock:
+            index = self._index
+            if index is None or index.generation != columns.generation:
+                index = SearchIndex(columns.generation)
+            index.add(columns, index.size)
+            self._index = index
+        return index, columns
+
+    def title_matches(self, query):
+        """(rows, scores): 100 for an exact title, 90 when the title contains the query as a phrase"""
+        index, columns = self.index()
+        tokens = tokenize(query)
+        rows = [r for r in index.phrase_rows("title", tokens, prefix_last=True) if r < len(columns) and columns.alive[r]]
+        scores = [100 if tokenize(columns.field(r, "title")) == tokens else 90 for r in rows]
+        # Same order as a scan in id order, sorted by score
+        order = sorted(range(len(rows)), key=lambda i: (-scores[i], columns.ids[rows[i]]))
+        return np.array([rows[i] for i in order], dtype=np.int64), np.array([scores[i] for i in order], dtype=np.float64)
+
+    def search(self, query, limit):
+        """(rows, scores, total matches) by BM25F; quoted parts of the query must match as phrases"""
+        index, columns = self.index()
+        phrases = [tokenize(p) for p in PHRASE_RE.findall(query)]
+        terms = list(dict.fromkeys(tokenize(query)))
+        alive = columns.alive
+        rows, scores = index.bm25f(terms, alive)
+        for phrase in phrases:
+            if phrase:
+                keep = index.phrase_match(phrase, rows)
+                mask = np.array([r in keep for r in rows], dtype=bool)
+                rows, scores = rows[mask], scores[mask]
+        return self._best(columns, rows, scores, limit)
+
+    @staticmethod
+    def _best(columns, rows, scores, limit):
+        """(rows, scores, total) of the top `limit`; ties go to the better-rated movie"""
+        ratings = columns.ratings_or_zero()[rows]
+        order = np.lexsort((-ratings, -scores))
+        best = order[:limit] if limit < len(order) else order
+        return rows[best], scores[best], len(rows)
+
+    def fuzzy_search(self, query, limit):
+        """(rows, scores, total, corrections): BM25F after correcting misspelled words.
+
+        A replacement scores as that word would, divided by 1 + its edit distance.
+        """
+        index, columns = self.index()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        corrected = index.corrections(tokens)
+        terms, boosts = [], {}
+        for token in tokens:
+            for word, distance in corrected.get(token, [(token, 0)]):
+                terms.append(word)
+                boosts[word] = max(boosts.get(word, 0.0), 1.0 / (1 + distance))
+        rows, scores = index.bm25f(list(dict.fromkeys(terms)), columns.alive, boosts)
+        corrections = {token: [word for word, _ in matches] for token, matches in corrected.items()}
+        return self._best(columns, rows, scores, limit) + (corrections,)
@@ -0,0 +1,180 @@
+"""
+Catalog columns shared by every worker process on the host.
+
+One process reads the catalog from the database and publishes its columns
+as an artifact; every worker then maps the same files read-only instead of
+holding a private copy (the model arrays are shared the same way through
+their own artifacts). `current.json` names the published snapshot and its
+generation number and is replaced atomically, so a worker sees either the
+old snapshot or the new one. A worker that finds a newer generation than
+its own adopts it instead of rebuilding, and publishing happens under a
+host-wide lock, so one rebuild serves all workers.
+
+Catalog deltas between rebuilds are published as small records keyed by
+(generation, version), each continuing from the version before it. Every
+worker applies the same records in the same order on top of the mapped
+snapshot, so row numbers agree across workers; only the background rebuild
+folds them into a new full snapshot.
+"""
+import json
+import logging
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: publishing is still atomic, just not serialized between processes
+    fcntl = None
+
+from app.models.columnar import MovieColumns
+from app.models.data_loader import apply_delta
+
+ARTIFACT_KIND = "catalog"
+POINTER_FILE = "current.json"
+LOCK_FILE = ".lock"
+DELTA_DIR = "deltas"
+DELTA_LOCK_FILE = ".delta.lock"
+
+
+class SharedCatalog:
+    """Publishes column snapshots to an ArtifactStore and attaches workers to the current one"""
+
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self.root = os.path.join(artifacts.root, ARTIFACT_KIND)
+
+    def current(self):
+        """{"key", "generation", "version", "stamp"} of the published snapshot, or None"""
+        try:
+            with open(os.path.join(self.root, POINTER_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def newer_than(self, generation):
+        """The published snapshot when its generation is ahead of `generation`"""
+        published = self.current()
+        if published is not None and published["generation"] > generation:
+            return published
+        return None
+
+    def next_generation(self, generation=None):
+        """A generation number ahead of both `generation` and the published one"""
+        published = self.current()
+        candidates = [g for g in (generation, published and published["generation"]) if g is not None]
+        return max(candidates) + 1 if candidates else 0
+
+    # ===== Attaching =====
+    def attach(self, published=None):
+        """(columns, version) over read-only maps of the published snapshot, or None"""
+        published = published or self.current()
+        if published is None:
+            return None
+        loaded = self.artifacts.load(ARTIFACT_KIND, published["key"])
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        columns = MovieColumns.from_arrays(arrays, meta)
+        logging.info(f"Attached shared catalog: {len(columns)} movies "
+                     f"(generation {columns.generation}, version {published['version']}).")
+        return columns, published["version"]
+
+    # ===== Publishing =====
+    def publish(self, columns, version):
+        """Write `columns` and point every worker at them; the previous snapshot is kept for late readers"""
+        previous = self.current()
+        key = f"{columns.generation}-{version}"
+        arrays, meta = columns.to_arrays()
+        self.artifacts.save(ARTIFACT_KIND, key, arrays, meta)
+        published = {"key": key, "generation": columns.generation, "version": version}
+        _write_json(os.path.join(self.root, POINTER_FILE), published)
+        # Workers that mapped an older snapshot keep their pages after the files are unlinked
+        keep = {key, previous["key"]} if previous else {key}
+        self.artifacts.prune(ARTIFACT_KIND, keep=keep | {POINTER_FILE, LOCK_FILE, DELTA_DIR, DELTA_LOCK_FILE})
+        self._prune_deltas({columns.generation, previous["generation"]} if previous else {columns.generation})
+        return published
+
+    @contextmanager
+    def exclusive(self, lock_file=LOCK_FILE):
+        """Host-wide lock around build-and-publish, so concurrent workers do it once"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, lock_file), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ===== Deltas =====
+    def deltas(self, generation, after_version):
+        """Delta records of `generation` continuing from `after_version`, oldest first"""
+        directory = os.path.join(self.root, DELTA_DIR)
+        versions = []
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            record_generation, _, rest = name.partition("-")
+            if record_generation == str(generation) and rest.endswith(".json"):
+                version = int(rest[:-len(".json")])
+                if version > after_version:
+                    versions.append(version)
+        records = []
+        for version in sorted(versions):
+            try:
+                with open(os.path.join(directory, f"{generation}-{version}.json")) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                break
+            # The chain is linear: stop at the first gap rather than skip a delta
+            if record["after"] != (records[-1]["version"] if records else after_version):
+                break
+            records.append(record)
+        return records
+
+    def publish_delta(self, generation, after_version, version, upserts, deleted_ids):
+        """Record one delta of `generation`; call under exclusive(DELTA_LOCK_FILE) with `after_version` the tip"""
+        record = {"generation": generation, "after": after_version, "version": version,
+                  "upserts": upserts, "deleted_ids": list(deleted_ids)}
+        directory = os.path.join(self.root, DELTA_DIR)
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, f"{generation}-{version}.json"), record)
+        return record
+
+    def catch_up(self, columns, version, records):
+        """Apply the `records` that continue from `version`, one at a time, as every worker does"""
+        for record in records:
+            if record["after"] == version:
+                columns = apply_delta(columns, record["upserts"], record["deleted_ids"])
+                version = record["version"]
+        return columns, version
+
+    def _prune_deltas(self, keep_generations):
+        directory = os.path.join(self.root, DELTA_DIR)
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            if name.partition("-")[0] not in {str(g) for g in keep_generations}:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def load(self, store):
+        """Install the published catalog (plus its deltas) into `store` if it is current, else build and publish"""
+        with self.exclusive():
+            published = self.current()
+            attached = self.attach(published) if published is not None else None
+            if attached is not None:
+                columns, version = self.catch_up(*attached, self.deltas(published["generation"], attached[1]))
+                if store.snapshot_stamp(columns, version) == store.catalog_stamp():
+                    store.install(columns, version)
+                    return
+            columns, version = store.build_columns(generation=self.next_generation())
+            self.publish(columns, version)
+            store.install(*(self.attach() or (columns, version)))
+
+
+def _write_json(path, value):
+    """Write through a temp file and rename, so readers see the old file or the new one"""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
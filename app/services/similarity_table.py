@@ -0,0 +1,92 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+from app.models.columnar import MISSING_INT
+from app.services.ranking import top_k_rows
+
+ARTIFACT_KIND = "similar"
+DEFAULT_K = 50
+# Dense cells per block product (float32): ~128 MB of scratch regardless of catalog size
+BLOCK_CELLS = 32 * 1024 * 1024
+
+
+class SimilarityTable:
+    """Each movie's top-K content neighbours, precomputed from a ContentModel.
+
+    Row i of `neighbor_ids` / `scores` belongs to matrix row i of the model
+    it was built from. Ids are int32 and scores float16, so 500k movies x 50
+    neighbours is ~150 MB and maps straight from disk.
+    """
+
+    def __init__(self, neighbor_ids, scores, checksum, space="tfidf", params=None):
+        self.neighbor_ids = neighbor_ids
+        self.scores = scores
+        self.checksum = checksum
+        # Vector space of the model it was built from (TF-IDF or LSA)
+        self.space = space
+        # That model's parameters (ContentModel.params): same catalog checksum, other weights -> other table
+        self.params = params
+
+    @property
+    def k(self):
+        return self.neighbor_ids.shape[1]
+
+    @property
+    def n_rows(self):
+        return self.neighbor_ids.shape[0]
+
+    @classmethod
+    def build(cls, model, k=DEFAULT_K, block_cells=BLOCK_CELLS):
+        """Blocked products (sparse, or GEMM on LSA vectors): block x catalog similarities, top-K per row"""
+        columns = model.columns
+        matrix = model.vectors.astype(np.float32)
+        matrix_t = matrix.T.tocsr() if sp.issparse(matrix) else matrix.T
+        n = matrix.shape[0]
+        k_eff = max(0, min(k, n - 1))
+        neighbor_ids = np.full((n, k), MISSING_INT, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float16)
+        dead = ~columns.alive[:n]
+        block = max(1, min(n, block_cells // max(n, 1)))
+
+        for start in range(0, n if k_eff else 0, block):
+            end = min(start + block, n)
+            sims = matrix[start:end] @ matrix_t
+            sims = sims.toarray() if sp.issparse(sims) else sims
+            sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+            sims[:, dead] = -np.inf
+            top, top_scores = top_k_rows(sims, k_eff)
+            valid = np.isfinite(top_scores)
+            neighbor_ids[start:end, :k_eff] = np.where(valid, columns.ids[top], MISSING_INT)
+            scores[start:end, :k_eff] = np.where(valid, top_scores, 0)
+
+        logging.info(f"Similarity table built: {n} movies x {k} neighbours.")
+        return cls(neighbor_ids, scores, model.checksum, model.space, model.params)
+
+    def neighbors(self, row, columns, top_n):
+        """Live rows of the top `top_n` neighbours of `row`, or None if the table can't answer"""
+        if top_n > self.k or row >= self.n_rows:
+            return None  # asked for more than we kept, or a movie added after the build
+        ids = self.neighbor_ids[row]
+        rows = columns.id_index().lookup(ids[ids != MISSING_INT])
+        rows = rows[rows != MISSING_INT]  # neighbours deleted since the build
+        if len(rows) < min(top_n, self.n_rows - 1):
+            return None
+        return rows[:top_n]
+
+    # ===== Artifacts =====
+    def save(self, artifacts):
+        """Keyed by catalog checksum; the model parameters go in the meta and must match on load"""
+        return artifacts.save(ARTIFACT_KIND, self.checksum,
+                              {"neighbor_ids": self.neighbor_ids, "scores": self.scores},
+                              {"space": self.space, "params": self.params})
+
+    @classmethod
+    def load(cls, artifacts, checksum, space="tfidf", params=None):
+        loaded = artifacts.load(ARTIFACT_KIND, checksum)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        if meta.get("space", "tfidf") != space or meta.get("params") != params:
+            return None
+        logging.info(f"Similarity table loaded from artifact {checksum}.")
+        return cls(arrays["neighbor_ids"], arrays["scores"], checksum, space, params)
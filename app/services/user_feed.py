@@ -0,0 +1,151 @@
+"""
+Per-user personalized feeds.
+
+A feed is a ranked list of movie ids plus where it came from (ALS, the
+quiz profile or popular). Feeds are computed as high-priority background
+jobs whenever the user rates, favorites or takes a quiz, and stored in the
+user_feeds table, so every worker process serves the latest one.
+/recommendations/personalized only reads that row and hydrates it from the
+in-memory store. Deleted movies simply drop out at hydration. A user
+without a stored feed gets a provisional quiz/popular one at once while
+the real one is computed in the background.
+"""
+import json
+import time
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db
+from app.models.users import QuizResult, UserFeed
+from app.services.interactions import InteractionMatrix
+from app.services.jobs import PRIORITY_HIGH
+from app.services.quiz_cache import profile_key, hydrate
+
+FEED_SIZE = 20
+# Older feeds are still served, but trigger a refresh (the models they came from may have moved on)
+FEED_MAX_AGE = 3600
+
+
+class Feed:
+    """Ranked movie ids for one user and how they were chosen"""
+
+    def __init__(self, movie_ids, source, message, profile_name=None, quiz_key=None, computed_at=None,
+                 provisional=False):
+        self.movie_ids = [int(i) for i in movie_ids]
+        self.source = source
+        self.message = message
+        self.profile_name = profile_name
+        self.quiz_key = quiz_key
+        self.computed_at = computed_at if computed_at is not None else time.time()
+        # Served while the user's first real feed is still being computed; never stored
+        self.provisional = provisional
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(json.loads(row.movie_ids), row.source, row.message, row.profile_name,
+                   json.loads(row.quiz_key) if row.quiz_key else None, row.computed_at)
+
+    def to_columns(self):
+        return {
+            "movie_ids": json.dumps(self.movie_ids),
+            "source": self.source,
+            "message": self.message,
+            "profile_name": self.profile_name,
+            "quiz_key": json.dumps(self.quiz_key) if self.quiz_key is not None else None,
+            "computed_at": self.computed_at,
+        }
+
+    def hydrate(self, columns):
+        rows = columns.rows_for_ids(self.movie_ids)
+        if self.quiz_key is not None:
+            return hydrate(columns, rows, self.quiz_key)
+        return columns.to_dicts(rows)
+
+
+class UserFeeds:
+    """user id -> Feed in the user_feeds table, refreshed by "refresh_feed" jobs (queued refreshes coalesce)"""
+
+    def __init__(self, scheduler, store, recommender, quiz_cache, size=FEED_SIZE, max_age=FEED_MAX_AGE):
+        self.scheduler = scheduler
+        self.store = store
+        self.recommender = recommender
+        self.quiz_cache = quiz_cache
+        self.size = size
+        self.max_age = max_age
+        scheduler.register("refresh_feed", self._refresh, priority=PRIORITY_HIGH, tracked=False)
+
+    def get(self, user_id):
+        """The user's feed; a missing one is queued and a provisional one returned without waiting"""
+        row = db.session.get(UserFeed, user_id)
+        if row is not None:
+            feed = Feed.from_row(row)
+            if time.time() - feed.computed_at > self.max_age:
+                self.refresh(user_id)
+            return feed
+        self.refresh(user_id)
+        return self.fallback(user_id)
+
+    def refresh(self, user_id):
+        """Schedule a recompute; returns the Job already queued for this user, if any"""
+        return self.scheduler.submit("refresh_feed", {"user_id": user_id}, key=user_id)
+
+    def _refresh(self, user_id):
+        # Stamped when it starts: a later start read later interactions
+        started = time.time()
+        feed = self.compute(user_id)
+        feed.computed_at = started
+        self._save(user_id, feed)
+        return feed
+
+    @staticmethod
+    def _save(user_id, feed):
+        """Store `feed` unless a refresh that started later (in any worker) already stored its own"""
+        values = feed.to_columns()
+        for _ in range(2):
+            updated = UserFeed.query.filter(UserFeed.user_id == user_id, UserFeed.computed_at < feed.computed_at)\
+                .update(values, synchronize_session=False)
+            if not updated and db.session.get(UserFeed, user_id) is None:
+                db.session.add(UserFeed(user_id=user_id, **values))
+            try:
+                db.session.commit()
+                return
+            except IntegrityError:
+                # Another worker inserted the first feed meanwhile; compare against theirs
+                db.session.rollback()
+
+    # ===== Ranking =====
+    def compute(self, user_id):
+        """ALS from the user's current interactions, else their latest quiz profile, else popular"""
+        items = InteractionMatrix.load_user(user_id)
+        movie_ids = self.recommender.personalized_ids(user_id, self.size, items=items) if len(items[0]) else None
+        if movie_ids is not None and len(movie_ids):
+            return Feed(movie_ids, "als", "Based on your watch history and preferences")
+        return self.fallback(user_id, own_ids=items[0], provisional=False)
+
+    def fallback(self, user_id, own_ids=None, provisional=True):
+        """Latest quiz profile, else popular: cached candidates only, cheap enough for a request thread.
+
+        Without `own_ids` the user's movies come from the in-memory interaction matrix.
+        """
+        latest_quiz = QuizResult.query.filter_by(user_id=user_id)\
+            .order_by(QuizResult.created_at.desc()).first()
+        if latest_quiz and latest_quiz.top_genres:
+            top_genres = json.loads(latest_quiz.top_genres) if latest_quiz.top_genres else []
+            tags = json.loads(latest_quiz.tags) if latest_quiz.tags else []
+            if top_genres:
+                key = profile_key(latest_quiz.profile_type, top_genres, tags)
+                rows, columns = self.quiz_cache.ranked_rows(key, user_id, self.size, own_ids=own_ids)
+                if len(rows):
+                    return Feed(columns.ids[rows], "quiz", f"Based on your {latest_quiz.profile_name} profile",
+                                profile_name=latest_quiz.profile_name, quiz_key=key, provisional=provisional)
+
+        popular = self.recommender.get_popular_movies(self.size)
+        return Feed([m["id"] for m in popular], "popular", "Trending movies", provisional=provisional)
+
+
+def refresh_user_feed(user_id):
+    """Recompute a user's feed after they rated, favorited or took a quiz (never blocks the request)"""
+    feeds = current_app.config.get('USER_FEEDS')
+    if feeds is not None:
+        feeds.refresh(int(user_id))
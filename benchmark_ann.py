@@ -0,0 +1,63 @@
+import sys
+import time
+
+import numpy as np
+
+from app.services.ann_index import IVFIndex
+from app.services.ranking import top_k
+
+NPROBES = [1, 2, 4, 8, 16, 32]
+QUERIES = 200
+K = 10
+
+
+def exact_search(vectors, query, k):
+    scores = np.asarray(vectors @ query).ravel()
+    return top_k(scores, k)
+
+
+def benchmark(vectors, nprobes=NPROBES, queries=QUERIES, k=K, seed=0):
+    """recall@k and mean latency of the IVF index against exact search, per nprobe"""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    print(f"Built {index.nlist} lists over {vectors.shape[0]} vectors in {time.perf_counter() - start:.2f}s")
+
+    rows = rng.choice(vectors.shape[0], min(queries, vectors.shape[0]), replace=False)
+    dense = lambda row: vectors[row].toarray().ravel() if hasattr(vectors, "toarray") else vectors[row]
+
+    start = time.perf_counter()
+    truth = [set(exact_search(vectors, dense(r), k).tolist()) for r in rows]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(rows)
+    print(f"exact      recall@{k}=1.000  {exact_ms:.3f} ms/query")
+
+    for nprobe in nprobes:
+        if nprobe > index.nlist:
+            break
+        start = time.perf_counter()
+        found = [set(index.search(dense(r), vectors, k, nprobe)[0].tolist()) for r in rows]
+        ms = (time.perf_counter() - start) * 1000 / len(rows)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"nprobe={nprobe:<4} recall@{k}={recall:.3f}  {ms:.3f} ms/query")
+
+
+def synthetic_vectors(n, dim=128, clusters=256, seed=0):
+    """Clustered unit vectors, for benchmarking at a catalog size the database doesn't have"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+if __name__ == "__main__":
+    # python benchmark_ann.py            -> the TF-IDF matrix of the current catalog
+    # python benchmark_ann.py 200000     -> 200k synthetic 128-d vectors
+    if len(sys.argv) > 1:
+        benchmark(synthetic_vectors(int(sys.argv[1])))
+    else:
+        from app import create_app
+        app = create_app()
+        with app.app_context():
+            model = app.config['RECOMMENDER']._ensure_tfidf_matrix()
+            benchmark(model.matrix)
@@ -0,0 +1,57 @@
+from app import create_app
+from app.services import content_model, similarity_table, item_cf, als, lsa
+from app.services.similarity_table import SimilarityTable
+from app.services.item_cf import ItemNeighbors
+from app.services.als import ALSModel
+from app.services.ann_index import IVFIndex, ANN_MIN_ROWS
+
+
+def build_ann(artifacts, vectors, kind, checksum, label):
+    """IVF index over `vectors`, skipped (and any old one removed) below ANN_MIN_ROWS like the server does"""
+    if vectors.shape[0] < ANN_MIN_ROWS:
+        artifacts.prune(kind, keep=set())
+        print(f"{label} IVF index skipped: {vectors.shape[0]} rows, exact scans below {ANN_MIN_ROWS}")
+        return
+    index = IVFIndex.build(vectors, checksum=checksum)
+    path = index.save(artifacts, kind)
+    artifacts.prune(kind, keep={checksum})
+    print(f"{label} IVF index written to {path}")
+
+
+def build_models(app):
+    """Fit the TF-IDF model, its neighbour table, the collaborative models and their IVF indexes as memory-mappable artifacts"""
+    store = app.config['MOVIE_STORE']
+    artifacts = app.config['MODEL_ARTIFACTS']
+
+    model = app.config['RECOMMENDER'].fit_content_model(store.columns)
+    path = model.save(artifacts)
+    artifacts.prune(content_model.ARTIFACT_KIND, keep={model.checksum})
+    print(f"TF-IDF artifact written to {path}")
+    if model.lsa is not None:
+        artifacts.prune(lsa.ARTIFACT_KIND, keep={model.checksum})
+        print(f"LSA embedding ({model.lsa.dim} dimensions) written to {artifacts.path(lsa.ARTIFACT_KIND, model.checksum)}")
+
+    table = SimilarityTable.build(model)
+    path = table.save(artifacts)
+    artifacts.prune(similarity_table.ARTIFACT_KIND, keep={model.checksum})
+    print(f"Similarity table written to {path}")
+
+    build_ann(artifacts, model.vectors, model.ann_kind, model.checksum, "Content")
+
+    interactions = app.config['RECOMMENDER'].interactions
+    item_neighbors = ItemNeighbors.build(interactions)
+    path = item_neighbors.save(artifacts)
+    artifacts.prune(item_cf.ARTIFACT_KIND, keep={item_neighbors.checksum})
+    print(f"Item-item neighbours written to {path}")
+
+    als_model = ALSModel.fit(interactions)
+    path = als_model.save(artifacts)
+    artifacts.prune(als.ARTIFACT_KIND, keep={als_model.checksum})
+    print(f"ALS factors written to {path}")
+
+    build_ann(artifacts, als_model.item_factors, als.ANN_ARTIFACT_KIND, als_model.checksum, "ALS")
+
+if __name__ == "__main__":
+    app = create_app()
+    with app.app_context():
+        build_models(app)
@@ -0,0 +1,85 @@
+import copy
+
+import pytest
+from flask import Flask
+
+from app.database import db
+
+MOVIES = [
+    {"id": 1, "title": "The Godfather", "genres": "Crime, Drama", "rating": 9.2, "year": 1972, "runtime": 175,
+     "director": "Francis Ford Coppola", "cast": "Marlon Brando, Al Pacino, James Caan",
+     "plot": "The aging patriarch of an organized crime dynasty transfers control to his reluctant son.",
+     "keywords": "mafia, family, crime boss", "popularity": 95.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 2, "title": "The Godfather Part II", "genres": "Crime, Drama", "rating": 9.0, "year": 1974,
+     "runtime": 202, "director": "Francis Ford Coppola", "cast": "Al Pacino, Robert De Niro, Robert Duvall",
+     "plot": "The early life of Vito Corleone and his son Michael expanding the family crime syndicate.",
+     "keywords": "mafia, family, sequel", "popularity": 80.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 3, "title": "Star Wars", "genres": "Action, Adventure, Sci-Fi", "rating": 8.6, "year": 1977,
+     "runtime": 121, "director": "George Lucas", "cast": "Mark Hamill, Harrison Ford, Carrie Fisher",
+     "plot": "Luke Skywalker joins forces with a Jedi Knight to rescue a princess and save the galaxy.",
+     "keywords": "space, rebellion, jedi", "popularity": 90.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 4, "title": "The Empire Strikes Back", "genres": "Action, Adventure, Sci-Fi", "rating": 8.7,
+     "year": 1980, "runtime": 124, "director": "Irvin Kershner", "cast": "Mark Hamill, Harrison Ford",
+     "plot": "The Rebels are pursued across the galaxy by Darth Vader while Luke trains as a Jedi.",
+     "keywords": "space, jedi, sequel", "popularity": 85.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 5, "title": "Alien", "genres": "Horror, Sci-Fi", "rating": 8.5, "year": 1979, "runtime": 117,
+     "director": "Ridley Scott", "cast": "Sigourney Weaver, Tom Skerritt",
+     "plot": "The crew of a commercial spacecraft encounters a deadly lifeform.",
+     "keywords": "space, monster, survival", "popularity": 70.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 6, "title": "Blade Runner", "genres": "Action, Drama, Sci-Fi", "rating": 8.1, "year": 1982,
+     "runtime": 117, "director": "Ridley Scott", "cast": "Harrison Ford, Rutger Hauer, Sean Young",
+     "plot": "A blade runner must pursue and terminate four replicants in a dystopian future.",
+     "keywords": "dystopia, android, future", "popularity": 65.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 7, "title": "Toy Story", "genres": "Animation, Comedy, Family", "rating": 8.3, "year": 1995,
+     "runtime": 81, "director": "John Lasseter", "cast": "Tom Hanks, Tim Allen",
+     "plot": "A cowboy doll is threatened when a new spaceman figure supplants him as top toy.",
+     "keywords": "toys, friendship, fun", "popularity": 75.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 8, "title": "Finding Nemo", "genres": "Animation, Comedy, Family", "rating": 8.1, "year": 2003,
+     "runtime": 100, "director": "Andrew Stanton", "cast": "Albert Brooks, Ellen DeGeneres",
+     "plot": "A clownfish searches the ocean for his son with the help of a forgetful fish.",
+     "keywords": "ocean, father, fun", "popularity": 72.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 9, "title": "Heat", "genres": "Action, Crime, Drama", "rating": 8.3, "year": 1995, "runtime": 170,
+     "director": "Michael Mann", "cast": "Al Pacino, Robert De Niro, Val Kilmer",
+     "plot": "A group of professional bank robbers is tracked by a detective in Los Angeles.",
+     "keywords": "heist, crime, detective", "popularity": 60.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 10, "title": "Amelie", "genres": "Comedy, Romance", "rating": 8.3, "year": 2001, "runtime": 122,
+     "director": "Jean-Pierre Jeunet", "cast": "Audrey Tautou, Mathieu Kassovitz",
+     "plot": "A shy waitress decides to change the lives of those around her for the better.",
+     "keywords": "paris, romance, whimsy", "popularity": 55.0, "img": None, "poster_filename": None,
+     "created_at": None},
+    {"id": 11, "title": "Unrated Short", "genres": None, "rating": None, "year": None, "runtime": None,
+     "director": None, "cast": None, "plot": None, "keywords": None, "popularity": None, "img": None,
+     "poster_filename": None, "created_at": None},
+]
+
+
+@pytest.fixture
+def movies():
+    """A small catalog of Movie.to_dict()-shaped dicts"""
+    return copy.deepcopy(MOVIES)
+
+
+@pytest.fixture
+def db_app(tmp_path):
+    """A bare Flask app over a throwaway SQLite file, with every table created"""
+    import app.models.movie  # noqa: F401 (registers the models)
+    import app.models.users  # noqa: F401
+
+    flask_app = Flask(__name__)
+    flask_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    flask_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,71 @@
+import numpy as np
+import scipy.sparse as sp
+
+from app.services.als import ALSModel, _conjugate_gradient
+from app.services.artifacts import ArtifactStore
+from app.services.interactions import InteractionMatrix
+
+PARAMS = {"factors": 4, "iterations": 10}
+
+
+def interactions():
+    # Two taste clusters: {1, 2, 3} and {4, 5, 6}
+    users, items = [], []
+    for user in range(8):
+        cluster = [1, 2, 3] if user % 2 else [4, 5, 6]
+        # Users 0 and 1 have not seen the last movie of their cluster yet
+        for movie in cluster[:2] if user < 2 else cluster:
+            users.append(user); items.append(movie)
+    return InteractionMatrix.from_triples(users, items, [1.0] * len(users))
+
+
+def test_conjugate_gradient_matches_the_exact_solve():
+    rng = np.random.default_rng(1)
+    fixed = rng.standard_normal((6, 3)).astype(np.float32)
+    confidence = sp.csr_matrix(np.array([[3, 0, 5, 0, 0, 2], [0, 4, 0, 0, 1, 0]], dtype=np.float32))
+    gram = fixed.T @ fixed
+    got = _conjugate_gradient(confidence, fixed, gram, 0.1, np.zeros((2, 3), dtype=np.float32), steps=10)
+    for row in range(2):
+        c = confidence[row].toarray().ravel()
+        system = gram + (fixed.T * np.where(c > 0, c - 1, 0)) @ fixed + 0.1 * np.eye(3)
+        expected = np.linalg.solve(system, fixed.T @ c)
+        assert np.allclose(got[row], expected, atol=1e-3)
+
+
+def test_recommends_within_the_users_cluster():
+    model = ALSModel.fit(interactions(), workers=2, **PARAMS)
+    ids, _ = model.recommend(model.user_vector(0), top_n=1, exclude_ids=[4, 5])
+    assert ids.tolist() == [6]
+    ids, _ = model.recommend(model.user_vector(1), top_n=1, exclude_ids=[1, 2])
+    assert ids.tolist() == [3]
+
+
+def test_fit_is_deterministic_for_a_seed():
+    a = ALSModel.fit(interactions(), workers=1, seed=3, **PARAMS)
+    b = ALSModel.fit(interactions(), workers=4, seed=3, **PARAMS)
+    assert np.allclose(a.item_factors, b.item_factors, atol=1e-5)
+
+
+def test_unknown_users_are_folded_in():
+    model = ALSModel.fit(interactions(), **PARAMS)
+    vector = model.user_vector("new", movie_ids=np.array([4, 99]), weights=[1.0, 1.0])
+    ids, _ = model.recommend(vector, top_n=2, exclude_ids=[4])
+    assert set(ids.tolist()) == {5, 6}
+    assert model.user_vector("new", movie_ids=np.array([99]), weights=[1.0]) is None
+
+
+def test_allowed_mask_and_exclusions():
+    model = ALSModel.fit(interactions(), **PARAMS)
+    allowed = model.item_ids != 6
+    ids, _ = model.recommend(model.user_vector(0), top_n=6, exclude_ids=[4], allowed=allowed)
+    assert 4 not in ids and 6 not in ids
+
+
+def test_artifacts_round_trip(tmp_path):
+    model = ALSModel.fit(interactions(), **PARAMS)
+    artifacts = ArtifactStore(str(tmp_path))
+    model.save(artifacts)
+    loaded = ALSModel.load(artifacts, model.checksum)
+    assert np.array_equal(loaded.item_factors, model.item_factors)
+    assert loaded.params["factors"] == 4 and loaded.user_vector(0) is not None
+    assert ALSModel.load(artifacts, "other") is None
@@ -0,0 +1,67 @@
+import numpy as np
+import scipy.sparse as sp
+
+from app.services.ann_index import IVFIndex, ANN_MIN_ROWS
+from app.services.artifacts import ArtifactStore
+from build_models import build_ann
+
+
+def unit_vectors(n, d=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, d)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact(vectors, query, k):
+    scores = vectors @ query
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+def test_probing_every_list_is_an_exact_search():
+    vectors = unit_vectors(500)
+    index = IVFIndex.build(vectors, nlist=20)
+    for query in vectors[:10]:
+        rows, _ = index.search(query, vectors, 10, nprobe=index.nlist)
+        assert set(rows.tolist()) == exact(vectors, query, 10)
+
+
+def test_default_probes_keep_most_neighbours():
+    vectors = unit_vectors(2000)
+    index = IVFIndex.build(vectors)
+    recall = [len(set(index.search(q, vectors, 10)[0].tolist()) & exact(vectors, q, 10)) / 10 for q in vectors[:50]]
+    assert np.mean(recall) >= 0.5
+
+
+def test_sparse_vectors_and_allowed_rows():
+    vectors = sp.csr_matrix(unit_vectors(300))
+    index = IVFIndex.build(vectors, nlist=10)
+    allowed = np.ones(300, dtype=bool)
+    allowed[:150] = False
+    rows, _ = index.search(vectors[0], vectors, 5, nprobe=index.nlist, allowed=allowed)
+    assert len(rows) == 5 and (rows >= 150).all()
+
+
+def test_rows_added_after_the_build_are_always_scanned():
+    vectors = unit_vectors(300)
+    index = IVFIndex.build(vectors, nlist=10)
+    grown = np.vstack([vectors, vectors[:1]])
+    rows, _ = index.search(vectors[0], grown, 2, nprobe=1)
+    assert set(rows.tolist()) == {0, 300}
+
+
+def test_artifact_round_trip(tmp_path):
+    artifacts = ArtifactStore(str(tmp_path))
+    vectors = unit_vectors(300)
+    index = IVFIndex.build(vectors, nlist=10, checksum="abc")
+    index.save(artifacts, "ivf_test")
+    loaded = IVFIndex.load(artifacts, "ivf_test", "abc")
+    assert np.array_equal(loaded.search(vectors[3], vectors, 5)[0], index.search(vectors[3], vectors, 5)[0])
+
+
+def test_offline_build_skips_small_catalogs_like_the_server(tmp_path):
+    artifacts = ArtifactStore(str(tmp_path))
+    IVFIndex.build(unit_vectors(300), nlist=10, checksum="old").save(artifacts, "ivf_test")
+    build_ann(artifacts, unit_vectors(ANN_MIN_ROWS - 1), "ivf_test", "new", "Test")
+    assert IVFIndex.load(artifacts, "ivf_test", "old") is None
+    assert IVFIndex.load(artifacts, "ivf_test", "new") is None
+    build_ann(artifacts, unit_vectors(ANN_MIN_ROWS), "ivf_test", "new", "Test")
+    assert IVFIndex.load(artifacts, "ivf_test", "new") is not None
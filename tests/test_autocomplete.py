@@ -0,0 +1,39 @@
+from app.models.data_loader import MovieDataStore, apply_delta
+from app.services.autocomplete import Autocomplete, completion_key
+
+
+def texts(completions):
+    return [c["text"] for c in completions]
+
+
+def test_completes_later_words_by_popularity(movies):
+    suggest = Autocomplete(MovieDataStore.from_dicts(movies)).suggest
+    assert texts(suggest("ford")) == ["Francis Ford Coppola", "Harrison Ford"]
+    assert suggest("the emp") == [{"text": "The Empire Strikes Back", "type": "title"}]
+    assert suggest("sci")[0] == {"text": "Sci-Fi", "type": "genre"}
+    assert suggest("  ") == [] and suggest("zzz") == []
+
+
+def test_limit_and_cached_short_prefixes(movies):
+    autocomplete = Autocomplete(MovieDataStore.from_dicts(movies))
+    one = autocomplete.suggest("a", limit=1)
+    assert len(one) == 1
+    # A cached answer for a smaller limit is not reused for a larger one
+    assert texts(autocomplete.suggest("a", limit=5))[:1] == texts(one)
+    assert len(autocomplete.suggest("a", limit=5)) == 5
+
+
+def test_deltas_extend_the_index_and_hide_deleted_rows(movies):
+    store = MovieDataStore.from_dicts(movies)
+    autocomplete = Autocomplete(store)
+    index, _ = autocomplete.index()
+    added = dict(movies[0], id=50, title="Fordson", director=None, cast=None, genres=None, rating=1.0, popularity=1.0)
+    store.install(apply_delta(store.columns, [added], deleted_ids=[1]), 1)
+    # Coppola is still credited on Part II, which scores below Harrison Ford's best movie
+    assert texts(autocomplete.suggest("ford")) == ["Harrison Ford", "Francis Ford Coppola", "Fordson"]
+    assert autocomplete.index()[0] is index
+    assert "The Godfather" not in texts(autocomplete.suggest("godfather"))
+
+
+def test_completion_key_normalizes_like_search():
+    assert completion_key("  The GODFATHER: Part II ") == completion_key("the godfather part ii")
@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from app.models.data_loader import MovieDataStore
+from app.routes.recommendations import recommendations_bp
+from app.services.recommender import MovieRecommender, MAX_BATCH_TOP_N
+
+RATINGS = {1: {"rated_movies": {1: 5, 2: 5, 9: 4}}, 2: {"rated_movies": {1: 5, 2: 4, 3: 5, 4: 5}}}
+
+
+@pytest.fixture
+def recommender(movies):
+    return MovieRecommender(MovieDataStore.from_dicts(movies), RATINGS)
+
+
+def test_similar_seeds_match_the_single_seed_path(recommender, movies):
+    queries = [{"type": "similar", "movie_id": m["id"], "top_n": 3} for m in movies]
+    _, results = recommender.batch_recommendations(queries)
+    for movie, result in zip(movies, results):
+        assert result["ids"] == [m["id"] for m in recommender.get_similar_movies_by_id(movie["id"], 3)]
+
+
+def test_bad_queries_only_fail_themselves(recommender):
+    movies, results = recommender.batch_recommendations([
+        {"type": "popular", "top_n": "many"},
+        {"type": "similar", "movie_id": 404},
+        {"type": "nope"},
+        {"type": "genre", "genre": "Animation", "top_n": 10_000},
+    ])
+    assert [r.get("error") for r in results[:3]] == ["top_n must be an integer", "movie not found",
+                                                     "unknown query type 'nope'"]
+    assert sorted(results[3]["ids"]) == [7, 8] and len(results[3]["ids"]) <= MAX_BATCH_TOP_N
+    assert sorted(m["id"] for m in movies) == [7, 8]
+
+
+def test_movies_are_listed_once(recommender):
+    movies, results = recommender.batch_recommendations([{"type": "popular"}, {"type": "popular", "top_n": 3}])
+    assert results[1]["ids"] == results[0]["ids"][:3]
+    assert [m["id"] for m in movies] == results[0]["ids"]
+
+
+def test_user_queries_answer_only_for_the_signed_in_user(recommender):
+    queries = [{"type": "user"}, {"type": "user", "user_id": 1}, {"type": "user", "user_id": 2}]
+    _, results = recommender.batch_recommendations(queries)
+    assert all(r["error"] == "sign in to get user recommendations" for r in results)
+    _, results = recommender.batch_recommendations(queries, user_id="1")
+    assert results[0]["ids"] == results[1]["ids"] == [m["id"] for m in recommender.collaborative_filtering(1)]
+    assert results[2]["error"] == "user queries are limited to the signed-in user"
+
+
+def test_route_takes_the_user_from_the_token(recommender):
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-of-sufficient-length"
+    app.config["RECOMMENDER"] = recommender
+    JWTManager(app)
+    app.register_blueprint(recommendations_bp)
+    client = app.test_client()
+    body = {"queries": [{"type": "user", "user_id": 2}, {"type": "user"}]}
+
+    anonymous = client.post("/recommendations/batch", json=body).get_json()
+    assert [r["error"] for r in anonymous["results"]] == ["sign in to get user recommendations"] * 2
+
+    with app.app_context():
+        token = create_access_token(identity="1")
+    signed_in = client.post("/recommendations/batch", json=body,
+                            headers={"Authorization": f"Bearer {token}"}).get_json()
+    assert signed_in["results"][0]["error"] == "user queries are limited to the signed-in user"
+    assert "ids" in signed_in["results"][1]
+
+    assert client.post("/recommendations/batch", json={"queries": [{"type": "popular"}],
+                                                       "top_n": "x"}).status_code == 400
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import db
+from app.models.data_loader import MovieDataStore
+from app.models.movie import Movie, CatalogChange
+from app.services.catalog_sync import CatalogSync
+from app.services.content_model import ContentModel
+from app.services.recommender import MovieRecommender
+
+
+@pytest.fixture
+def sync(db_app, movies):
+    for movie in movies:
+        db.session.add(Movie(**{k: v for k, v in movie.items() if k not in ("img", "created_at")}))
+    db.session.commit()
+    store = MovieDataStore()
+    store.load_movies()
+    return CatalogSync(store, MovieRecommender(store))
+
+
+def test_poll_applies_only_new_changes(sync):
+    assert sync.poll() == 0
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.get(Movie, 3).rating = 1.0
+    db.session.commit()
+    assert sync.poll() == 2
+    assert sync.store.get_movie_by_id(3)["rating"] == 1.0
+    assert sync.store.get_all_movies()[-1]["title"] == "Brand New"
+    assert sync.store.version == MovieDataStore.latest_version()
+    assert sync.poll() == 0
+
+
+def test_last_change_per_movie_wins(sync):
+    movie = db.session.get(Movie, 5)
+    movie.rating = 1.0
+    db.session.commit()
+    db.session.delete(movie)
+    db.session.commit()
+    assert sync.poll() == 1
+    assert sync.store.get_movie_by_id(5) is None
+
+
+def test_deltas_fold_into_the_content_model_without_refitting(sync, monkeypatch):
+    model = sync.recommender._ensure_tfidf_matrix()
+
+    def refit(*args, **kwargs):
+        pytest.fail("a delta refit the content model")
+    monkeypatch.setattr(ContentModel, "fit", refit)
+    db.session.add(Movie(title="Godfather Returns", genres="Crime, Drama", director="Francis Ford Coppola",
+                         keywords="mafia, family"))
+    db.session.commit()
+    sync.poll()
+    extended = sync.recommender._ensure_tfidf_matrix()
+    assert extended.columns is sync.store.columns and extended.vectorizer is model.vectorizer
+    similar = [m["title"] for m in sync.recommender.get_similar_movies_by_id(1, top_n=2)]
+    assert "Godfather Returns" in similar
+
+
+def test_rebuild_starts_a_new_generation(sync):
+    generation = sync.store.columns.generation
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.commit()
+    sync.rebuild()
+    assert sync.store.columns.generation == generation + 1
+    assert sync.rebuilt_version == sync.store.version == MovieDataStore.latest_version()
+    assert not sync.rebuild_due()
+
+
+def test_pruning_never_reuses_change_ids(sync):
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.commit()
+    CatalogChange.query.update({"changed_at": datetime.utcnow() - timedelta(days=30)})
+    db.session.commit()
+    sync.rebuild()
+    version = sync.store.version
+    assert CatalogChange.query.count() == 1
+    db.session.get(Movie, 3).rating = 1.0
+    db.session.commit()
+    assert MovieDataStore.latest_version() > version
+    assert sync.poll() == 1 and sync.store.get_movie_by_id(3)["rating"] == 1.0
@@ -0,0 +1,75 @@
+import numpy as np
+
+from app.models.columnar import MovieColumns, IdIndex, MISSING_INT
+from app.models.data_loader import MovieDataStore, apply_delta
+
+
+def test_rows_round_trip_to_the_original_dicts(movies):
+    columns = MovieColumns.from_dicts(movies)
+    assert columns.to_dicts(range(len(movies))) == movies
+
+
+def test_missing_values_come_back_as_none(movies):
+    columns = MovieColumns.from_dicts(movies)
+    row = columns.rows_for_ids([11])[0]
+    assert columns.row_dict(int(row)) == movies[-1]
+
+
+def test_rows_for_ids_keeps_input_order_and_drops_unknown_ids(movies):
+    columns = MovieColumns.from_dicts(movies)
+    rows = columns.rows_for_ids([5, "3", 999, None, 1])
+    assert columns.ids[rows].tolist() == [5, 3, 1]
+
+
+def test_id_index_sparse_ids_use_binary_search():
+    ids = np.array([10, 10_000_000, 7], dtype=np.int64)
+    index = IdIndex(ids, np.arange(3))
+    assert index.table is None
+    assert index.lookup([7, 10_000_000, 8]).tolist() == [2, 1, MISSING_INT]
+
+
+def test_genre_mask_matches_substrings_case_insensitively(movies):
+    columns = MovieColumns.from_dicts(movies)
+    assert columns.ids[columns.genre_mask("sci")].tolist() == [3, 4, 5, 6]
+
+
+def test_delta_keeps_existing_row_numbers(movies):
+    columns = MovieColumns.from_dicts(movies)
+    before = {movie_id: int(columns.rows_for_ids([movie_id])[0]) for movie_id in (1, 2, 3)}
+    edited = dict(movies[1], rating=1.0)
+    added = dict(movies[0], id=12, title="New Movie")
+    updated = apply_delta(columns, [edited, added], deleted_ids=[3])
+
+    assert len(updated) == len(columns) + 2
+    assert int(updated.rows_for_ids([1])[0]) == before[1]
+    assert int(updated.rows_for_ids([2])[0]) == len(columns)  # edits are retired and appended
+    assert not updated.alive[before[2]] and not updated.alive[before[3]]
+    assert len(updated.rows_for_ids([3])) == 0
+    assert updated.row_dict(len(columns))["rating"] == 1.0
+    assert updated.row_dict(len(columns) + 1)["title"] == "New Movie"
+    # The old snapshot is untouched
+    assert columns.alive.all() and len(columns.rows_for_ids([3])) == 1
+
+
+def test_view_rows_are_live_rows_in_id_order(movies):
+    columns = apply_delta(MovieColumns.from_dicts(movies), [dict(movies[0], rating=1.0)], deleted_ids=[2])
+    view = columns.view_rows()
+    assert columns.ids[view].tolist() == [1, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+
+
+def test_arrays_round_trip(movies):
+    columns = apply_delta(MovieColumns.from_dicts(movies, generation=3), [], deleted_ids=[4])
+    arrays, meta = columns.to_arrays()
+    restored = MovieColumns.from_arrays(arrays, meta)
+    assert restored.generation == 3
+    assert restored.to_dicts(restored.view_rows()) == columns.to_dicts(columns.view_rows())
+
+
+def test_store_lookups(movies):
+    store = MovieDataStore.from_dicts(movies)
+    assert store.count() == len(movies)
+    assert store.get_movie_by_id(3)["title"] == "Star Wars"
+    assert store.get_movie_by_id(404) is None
+    assert [m["id"] for m in store.get_many([9, 404, 1])] == [9, 1]
+    view = store.get_all_movies()
+    assert len(view) == len(movies) and view[0] == movies[0] and view[-2:] == movies[-2:]
@@ -0,0 +1,34 @@
+from app.models.data_loader import MovieDataStore, apply_delta
+from app.services.content_model import ContentModel, TitleIndex
+
+
+def test_titles_resolve_normalized_and_with_a_year(movies):
+    columns = MovieDataStore.from_dicts(movies).columns
+    titles = TitleIndex()
+    titles.add(columns, 0)
+    assert columns.ids[titles.resolve("  the GODFATHER ", columns)] == 1
+    assert columns.ids[titles.resolve("The Godfather", columns, year=1972)] == 1
+    assert titles.resolve("The Godfather", columns, year=1999) is None
+    assert titles.resolve("Nope", columns) is None
+
+
+def test_remakes_resolve_to_the_oldest_id_unless_a_year_is_given(movies):
+    remake = dict(movies[4], id=20, year=2030)
+    columns = MovieDataStore.from_dicts(movies + [remake]).columns
+    titles = TitleIndex()
+    titles.add(columns, 0)
+    assert columns.ids[titles.resolve("Alien", columns)] == 5
+    assert columns.ids[titles.resolve("Alien", columns, year=2030)] == 20
+
+
+def test_deltas_extend_the_title_index_in_place(movies):
+    store = MovieDataStore.from_dicts(movies)
+    model = ContentModel.fit(store.columns)
+    store.install(apply_delta(store.columns, [dict(movies[4], title="Aliens")], deleted_ids=[1]), 1)
+    extended = model.extend(store.columns)
+    assert extended.titles is model.titles
+    assert store.columns.ids[extended.titles.resolve("Aliens", store.columns)] == 5
+    assert extended.titles.resolve("Alien", store.columns) is None  # retired row
+    assert extended.titles.resolve("The Godfather", store.columns) is None
+    # The old snapshot still resolves its own rows
+    assert model.columns.ids[model.titles.resolve("Alien", model.columns)] == 5
@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.models.data_loader import MovieDataStore
+from app.services.field_vectorizer import FIELD_WEIGHTS, FieldVectorizer
+
+
+def fitted(movies, weights=None):
+    columns = MovieDataStore.from_dicts(movies).columns
+    vectorizer = FieldVectorizer(weights)
+    return columns, vectorizer, vectorizer.fit_transform(columns)
+
+
+def cosine(matrix, a, b):
+    return float((matrix[a] @ matrix[b].T).toarray()[0, 0])
+
+
+def test_rows_are_unit_length_across_the_stacked_blocks(movies):
+    columns, vectorizer, matrix = fitted(movies)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    assert np.allclose(norms, 1, atol=1e-5)  # a title alone is enough
+    assert matrix.shape[1] == sum(vectorizer.widths.values())
+
+
+def test_cast_members_are_whole_names(movies):
+    _, vectorizer, _ = fitted(movies)
+    assert "harrison ford" in vectorizer.cast.vocabulary_
+    assert "ford" not in vectorizer.cast.vocabulary_
+
+
+def test_weights_shift_what_similarity_follows(movies):
+    # Star Wars (3) and Blade Runner (6) share Harrison Ford; Star Wars and Alien (5) share only genres
+    _, _, by_cast = fitted(movies, {"cast": 10.0, "genres": 0.1})
+    _, _, by_genre = fitted(movies, {"cast": 0.1, "genres": 10.0})
+    assert cosine(by_cast, 2, 5) > cosine(by_cast, 2, 4)
+    assert cosine(by_genre, 2, 3) > cosine(by_cast, 2, 3)
+
+
+def test_transform_uses_the_fitted_vocabularies(movies):
+    columns, vectorizer, matrix = fitted(movies[:10])
+    extended = MovieDataStore.from_dicts(movies[:10] + [dict(movies[0], id=30, genres="Western")]).columns
+    added = vectorizer.transform(extended, start=10)
+    assert added.shape == (1, matrix.shape[1])
+    # Same movie under an unseen genre: everything but the genre block still lines up
+    assert 0.5 < float((added @ matrix[0].T).toarray()[0, 0]) < 1
+
+
+def test_state_round_trip(movies):
+    columns, vectorizer, matrix = fitted(movies)
+    arrays, meta = vectorizer.state()
+    restored = FieldVectorizer.from_state(arrays, meta)
+    assert np.allclose(restored.transform(columns).toarray(), matrix.toarray(), atol=1e-6)
+    assert FieldVectorizer.matches(meta)
+    assert not FieldVectorizer.matches(meta, {"genres": FIELD_WEIGHTS["genres"] + 1})
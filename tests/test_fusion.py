@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.fusion import RRF_K, fuse, parse_weights
+
+
+def test_rrf_rewards_agreement_between_sources():
+    ids, scores = fuse([([1, 2, 3], [9, 8, 7]), ([3, 4], [0.9, 0.1])], [1.0, 1.0], top_n=4)
+    assert ids.tolist()[0] == 3
+    assert scores[0] == pytest.approx(1 / (RRF_K + 3) + 1 / (RRF_K + 1))
+
+
+def test_rrf_ignores_score_scales():
+    a = fuse([([1, 2], [1000, 1]), ([3, 4], [0.2, 0.1])], [1.0, 1.0], top_n=4)
+    b = fuse([([1, 2], [2, 1]), ([3, 4], [2, 1])], [1.0, 1.0], top_n=4)
+    assert a[0].tolist() == b[0].tolist()
+
+
+def test_ties_keep_first_seen_order():
+    ids, _ = fuse([([5, 6], [1, 1]), ([7, 8], [1, 1])], [1.0, 1.0], top_n=4)
+    assert ids.tolist() == [5, 7, 6, 8]
+
+
+def test_blend_sums_normalized_scores():
+    ids, scores = fuse([([1, 2], [10, 0]), ([2, 3], [4, 2])], [1.0, 2.0], top_n=3, method="blend")
+    assert ids.tolist() == [2, 1, 3]
+    assert scores.tolist() == [2.0, 1.0, 0.0]
+
+
+def test_zero_weights_and_empty_sources_are_skipped():
+    ids, _ = fuse([([1], [1.0]), ([], []), ([2], [1.0])], [0.0, 1.0, 1.0], top_n=5)
+    assert ids.tolist() == [2]
+    assert len(fuse([], [], top_n=5)[0]) == 0
+    with pytest.raises(ValueError):
+        fuse([([1], [1.0])], [1.0], top_n=1, method="max")
+
+
+def test_parse_weights():
+    assert parse_weights("genre:2, content:0.5,bad,popular:x") == {"genre": 2.0, "content": 0.5}
+    assert parse_weights(None) == {}
@@ -0,0 +1,54 @@
+import threading
+
+from app.models.data_loader import MovieDataStore
+from app.services.recommender import MovieRecommender
+
+RATINGS = {1: {"rated_movies": {1: 5, 2: 5}}, 2: {"rated_movies": {1: 5, 2: 4, 9: 5}}}
+
+
+def recommender(movies):
+    return MovieRecommender(MovieDataStore.from_dicts(movies), RATINGS)
+
+
+def test_sources_are_fused_with_the_popular_prior(movies):
+    movies_out, meta = recommender(movies).hybrid_recommendations_with_meta(
+        user_id=1, movie_title="The Godfather", genre="crime", top_n=5)
+    assert [m["source"] for m in meta] == ["genre", "content", "collaborative"]
+    assert all(m["status"] == "ok" for m in meta)
+    ids = [m["id"] for m in movies_out]
+    assert len(ids) == 5 and ids[0] in (2, 9)  # agreed on by several sources
+
+
+def test_a_slow_source_is_replaced_by_popular_at_its_deadline(movies):
+    engine = recommender(movies)
+    engine.source_timeout = 0.05
+    release = threading.Event()
+
+    def stuck(genre, n):
+        release.wait(5)
+        return engine._genre_candidates(genre, n)
+    engine._genre_candidates = stuck
+    try:
+        movies_out, meta = engine.hybrid_recommendations_with_meta(genre="crime", top_n=3)
+    finally:
+        release.set()
+    assert meta[0]["status"] == "timeout" and meta[0]["ms"] < 1000
+    assert [m["id"] for m in movies_out] == [m["id"] for m in engine.get_popular_movies(3)]
+
+
+def test_a_failing_source_is_reported_not_raised(movies):
+    engine = recommender(movies)
+
+    def broken(title, n):
+        raise RuntimeError("boom")
+    engine._content_candidates = broken
+    movies_out, meta = engine.hybrid_recommendations_with_meta(movie_title="Heat", top_n=3)
+    assert [(m["source"], m["status"]) for m in meta] == [("content", "error")]
+    assert len(movies_out) == 3
+
+
+def test_unknown_weights_and_methods_fall_back(movies):
+    engine = recommender(movies)
+    only_popular = engine.hybrid_recommendations(genre="crime", top_n=3, weights={"genre": 0})
+    assert [m["id"] for m in only_popular] == [m["id"] for m in engine.get_popular_movies(3)]
+    assert len(engine.hybrid_recommendations(genre="crime", top_n=3, method="max")) == 3
@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.services.interactions import InteractionMatrix
+
+
+def matrix(users, items, weights):
+    return InteractionMatrix.from_triples(users, items, weights)
+
+
+def test_duplicate_signals_are_summed_per_movie():
+    m = matrix([1, "1", 2], [10, 10, 20], [1.0, 4.0, 2.0])
+    ids, weights = m.user_items(m.user_row("1"))
+    assert ids.tolist() == [10] and weights.tolist() == [5.0]
+    assert m.user_row(3) is None
+
+
+def test_checksum_covers_user_ids():
+    same = matrix([1, 2], [10, 20], [1.0, 2.0])
+    assert same.checksum() == matrix([2, 1], [20, 10], [2.0, 1.0]).checksum()
+    # Identical matrix over other users: cached user factors would land on the wrong rows
+    assert same.checksum() != matrix([1, 3], [10, 20], [1.0, 2.0]).checksum()
+    assert same.checksum() != matrix([1, 2], [10, 20], [1.0, 3.0]).checksum()
+
+
+def test_neighbour_recommendations_skip_seen_movies():
+    m = matrix([1, 1, 2, 2, 2, 3], [10, 20, 10, 20, 30, 40], [5, 5, 5, 5, 5, 5])
+    ids, scores = m.recommend_items(m.user_row(1), top_n=5)
+    assert ids.tolist() == [30]
+    assert np.all(scores > 0)
+
+
+def test_legacy_dict():
+    m = InteractionMatrix.from_legacy({7: {"rated_movies": {1: 4, 2: 3}}})
+    assert m.user_ids == [7] and m.item_ids.tolist() == [1, 2]
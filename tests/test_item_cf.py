@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.models.columnar import MISSING_INT
+from app.services.artifacts import ArtifactStore
+from app.services.interactions import InteractionMatrix
+from app.services.item_cf import ItemNeighbors, adjusted_cosine_columns
+
+
+def interactions():
+    # 10 and 20 are liked together; 30 is liked by whoever dislikes 10
+    users = [1, 1, 1, 2, 2, 2, 3, 3, 4, 4]
+    items = [10, 20, 30, 10, 20, 30, 10, 20, 30, 40]
+    ratings = [5, 5, 1, 4, 5, 2, 5, 4, 5, 5]
+    return InteractionMatrix.from_triples(users, items, ratings)
+
+
+def test_neighbours_match_a_dense_scan():
+    data = interactions()
+    model = ItemNeighbors.build(data, k=2, block_cells=4)  # one item per block
+    columns = adjusted_cosine_columns(data.matrix).toarray()
+    sims = columns.T @ columns
+    np.fill_diagonal(sims, 0)
+    for col in range(len(data.item_ids)):
+        got = model.neighbor_cols[col]
+        got = got[got != MISSING_INT]
+        expected = [c for c in np.argsort(-sims[col], kind="stable")[:2] if sims[col, c] > 0]
+        assert sorted(got.tolist()) == sorted(expected)
+        assert np.allclose(model.scores[col, :len(got)], sims[col, got], atol=1e-2)
+
+
+def test_users_with_constant_values_are_not_centered_away():
+    data = InteractionMatrix.from_triples([1, 1], [10, 20], [4.0, 4.0])
+    assert adjusted_cosine_columns(data.matrix).nnz == 2
+
+
+def test_recommend_skips_seen_and_disallowed_movies():
+    model = ItemNeighbors.build(interactions(), k=3)
+    ids, scores = model.recommend(np.array([10]), [5.0], top_n=5)
+    assert ids.tolist()[0] == 20 and 10 not in ids
+    assert np.all(scores > 0)
+    allowed = model.item_ids != 20
+    ids, _ = model.recommend(np.array([10]), [5.0], top_n=5, allowed=allowed)
+    assert 20 not in ids
+    assert len(model.recommend(np.array([99]), [1.0], top_n=5)[0]) == 0
+
+
+def test_artifacts_round_trip(tmp_path):
+    model = ItemNeighbors.build(interactions(), k=3)
+    artifacts = ArtifactStore(str(tmp_path))
+    model.save(artifacts)
+    loaded = ItemNeighbors.load(artifacts, model.checksum)
+    assert loaded.k == 3
+    assert np.array_equal(loaded.neighbor_cols, model.neighbor_cols)
+    assert np.array_equal(loaded.recommend(np.array([10]), [5.0], 5)[0], model.recommend(np.array([10]), [5.0], 5)[0])
@@ -0,0 +1,103 @@
+import os
+import threading
+
+import pytest
+from flask import Flask
+
+from app.services.jobs import (JobScheduler, SQLiteJobLog, PRIORITY_HIGH, PRIORITY_LOW, QUEUED, SUCCEEDED,
+                               FAILED)
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_identical_queued_jobs_coalesce(app):
+    scheduler = JobScheduler(app)
+    scheduler.register("work", lambda n=0: n)
+    first = scheduler.submit("work", {"n": 1}, key=7)
+    assert scheduler.submit("work", {"n": 2}, key="7") is first
+    assert scheduler.submit("work", {"n": 3}, key=8) is not first
+    assert scheduler.stats()["queued"] == 2
+
+
+def test_workers_run_the_most_urgent_job_first(app):
+    scheduler = JobScheduler(app, workers=1)
+    order = []
+    scheduler.register("record", lambda n: order.append(n))
+    jobs = [scheduler.submit("record", {"n": name}, key=name, priority=priority)
+            for name, priority in (("low", PRIORITY_LOW), ("normal", None), ("high", PRIORITY_HIGH))]
+    # A duplicate can make its queued job more urgent
+    scheduler.submit("record", key="low", priority=PRIORITY_HIGH - 1)
+    scheduler.start()
+    for job in jobs:
+        job.wait(timeout=5)
+    assert order == ["low", "high", "normal"]
+    assert all(job.status == SUCCEEDED for job in jobs)
+
+
+def test_failures_are_recorded_not_raised(app):
+    scheduler = JobScheduler(app, workers=1)
+
+    def fail():
+        raise ValueError("boom")
+    scheduler.register("fail", fail)
+    scheduler.start()
+    job = scheduler.submit("fail")
+    job.wait(timeout=5)
+    assert job.status == FAILED and job.error == "boom"
+    assert scheduler.get(job.id)["status"] == FAILED
+
+
+def test_untracked_jobs_are_never_listed(app):
+    scheduler = JobScheduler(app, workers=1)
+    scheduler.register("public", lambda: "ok")
+    scheduler.register("internal", lambda: "ok", tracked=False)
+    scheduler.start()
+    public, internal = scheduler.submit("public"), scheduler.submit("internal")
+    public.wait(timeout=5)
+    internal.wait(timeout=5)
+    assert [job["id"] for job in scheduler.recent()] == [public.id]
+    assert scheduler.get(internal.id) is None
+    assert scheduler.is_public("public") and not scheduler.is_public("internal")
+
+
+def test_submit_never_blocks_on_running_work(app):
+    scheduler = JobScheduler(app, workers=1)
+    release = threading.Event()
+    scheduler.register("slow", lambda: release.wait(5))
+    scheduler.start()
+    running = scheduler.submit("slow")
+    while running.status == QUEUED:
+        threading.Event().wait(0.01)
+    queued = scheduler.submit("slow")
+    assert queued is not running  # a running job no longer coalesces
+    release.set()
+    queued.wait(timeout=5)
+
+
+def test_unfinished_jobs_are_requeued_after_a_restart(app, tmp_path):
+    path = str(tmp_path / "jobs.db")
+    before = JobScheduler(app, log=SQLiteJobLog(path))
+    before.register("rebuild", lambda: "done")
+    job = before.submit("rebuild", {}, key="catalog")
+    assert before.get(job.id)["status"] == QUEUED
+
+    after = JobScheduler(app, workers=1, log=SQLiteJobLog(path))
+    ran = threading.Event()
+    after.register("rebuild", lambda: ran.set() or "done")
+    after.start()
+    assert ran.wait(5)
+    for _ in range(100):
+        if after.get(job.id)["status"] == SUCCEEDED:
+            break
+        threading.Event().wait(0.01)
+    assert after.get(job.id)["result"] == "done"
+
+
+def test_cpu_work_runs_in_the_process_pool(app):
+    scheduler = JobScheduler(app, workers=1, process_workers=1)
+    scheduler.start()
+    assert scheduler.run_cpu(os.getpid) != os.getpid()
+    assert JobScheduler(app).run_cpu(os.getpid) == os.getpid()  # no pool: inline
@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.models.data_loader import MovieDataStore, apply_delta
+from app.services.artifacts import ArtifactStore
+from app.services.content_model import ContentModel
+from app.services.lsa import LSAEmbedding
+from app.services.recommender import MovieRecommender
+
+
+def tfidf(movies):
+    return ContentModel.fit(MovieDataStore.from_dicts(movies).columns).matrix
+
+
+def test_dimensions_are_bounded_by_the_catalog(movies):
+    embedding = LSAEmbedding.fit(tfidf(movies), dim=128)
+    assert embedding.dim == len(movies) - 1 and embedding.requested_dim == 128
+    assert embedding.vectors.dtype == np.float32 and embedding.vectors.flags.c_contiguous
+    assert np.allclose(np.linalg.norm(embedding.vectors, axis=1), 1, atol=1e-5)
+
+
+def test_full_rank_projection_keeps_tfidf_neighbours(movies):
+    matrix = tfidf(movies)
+    embedding = LSAEmbedding.fit(matrix, dim=128)
+    dense = embedding.vectors @ embedding.vectors[0]
+    sparse = (matrix @ matrix[0].T).toarray().ravel()
+    assert np.argsort(-dense)[1] == np.argsort(-sparse)[1] == 1  # The Godfather Part II
+
+
+def test_extend_projects_new_rows_without_refitting(movies):
+    matrix = tfidf(movies)
+    embedding = LSAEmbedding.fit(matrix, dim=4)
+    extended = embedding.extend(matrix[:2])
+    assert extended.components is embedding.components
+    assert np.allclose(extended.vectors[-2:], embedding.vectors[:2], atol=1e-5)
+
+
+def test_artifacts_are_keyed_on_the_configured_size(movies, tmp_path):
+    artifacts = ArtifactStore(str(tmp_path))
+    embedding = LSAEmbedding.fit(tfidf(movies), dim=4, checksum="abc")
+    embedding.save(artifacts)
+    assert np.array_equal(LSAEmbedding.load(artifacts, "abc", dim=4).vectors, embedding.vectors)
+    assert LSAEmbedding.load(artifacts, "abc", dim=8) is None
+
+
+def test_recommender_uses_lsa_vectors_when_configured(movies):
+    store = MovieDataStore.from_dicts(movies)
+    recommender = MovieRecommender(store)
+    recommender.lsa_dim = 8
+    model = recommender._ensure_tfidf_matrix()
+    assert model.space == "lsa" and model.vectors.shape == (len(movies), 8)
+    assert recommender.get_similar_movies_by_id(1, top_n=1)[0]["id"] == 2
+    store.install(apply_delta(store.columns, [dict(movies[0], id=40)], []), 1)
+    assert recommender._ensure_tfidf_matrix().vectors.shape == (len(movies) + 1, 8)
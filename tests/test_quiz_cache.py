@@ -0,0 +1,32 @@
+from app.models.data_loader import MovieDataStore, apply_delta
+from app.services.quiz_cache import QuizCandidateCache, profile_key
+from app.services.recommender import MovieRecommender
+from app.services.search_engine import SearchEngine
+
+
+def setup(movies):
+    store = MovieDataStore.from_dicts(movies)
+    engine = SearchEngine(store)
+    return store, QuizCandidateCache(store, engine, MovieRecommender(store))
+
+
+def test_cache_computes_each_profile_once_per_version(movies):
+    store, cache = setup(movies)
+    key = profile_key("explorer", ["Sci-Fi", "Comedy"], ["Space", "fun "])
+    assert key == profile_key("explorer", ["sci-fi", "comedy", ""], ["space", "fun"])
+    first = cache.recommend(key)
+    assert [m["id"] for m in cache.recommend(key)] == [m["id"] for m in first] == [7, 4, 3, 5, 8]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    store.install(apply_delta(store.columns, [], deleted_ids=[7]), 1)
+    assert 7 not in [m["id"] for m in cache.recommend(key)]
+    assert cache.stats()["misses"] == 2
+
+
+def test_users_own_movies_are_dropped_and_genres_nudged(movies):
+    store, cache = setup(movies)
+    key = profile_key("explorer", ["sci-fi", "comedy"], ["space", "fun"])
+    # Amelie is a comedy: the comedies move ahead of the sci-fi films they tied with
+    rows, columns = cache.ranked_rows(key, own_ids=[10])
+    assert columns.ids[rows].tolist() == [7, 8, 4, 3, 5]
+    rows, columns = cache.ranked_rows(key, own_ids=[7])
+    assert 7 not in columns.ids[rows]
@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.models.data_loader import MovieDataStore
+from app.services.quiz_recommender import _best, _diversify, genre_bits, genre_query_bits, quiz_rows, tag_rows
+from app.services.recommender import MovieRecommender
+from app.services.search_engine import SearchEngine
+
+
+def setup(movies):
+    store = MovieDataStore.from_dicts(movies)
+    engine = SearchEngine(store)
+    return store, engine, MovieRecommender(store)
+
+
+def ids(columns, rows):
+    return columns.ids[rows].tolist()
+
+
+def test_genre_bits_match_genre_substrings(movies):
+    columns = MovieDataStore.from_dicts(movies).columns
+    bits = genre_bits(columns)
+    rows = np.flatnonzero((bits & genre_query_bits(columns, "sci")).any(axis=1))
+    assert ids(columns, rows) == [3, 4, 5, 6]
+    assert not (bits & genre_query_bits(columns, "western")).any()
+
+
+def test_tags_match_phrases_and_word_starts(movies):
+    store, engine, _ = setup(movies)
+    index, columns = engine.index()
+    assert ids(columns, tag_rows(index, columns, "robert de")) == [2, 9]
+    assert ids(columns, tag_rows(index, columns, "space")) == [3, 4, 5, 7]  # "spaceman", "spacecraft"
+
+
+def test_quiz_rows_rank_by_match_then_rating(movies):
+    store, engine, recommender = setup(movies)
+    index, columns = engine.index()
+    rows, scores, total = quiz_rows(columns, index, recommender, ["sci-fi", "comedy"], ["space", "fun"])
+    assert total == 5
+    assert ids(columns, rows) == [7, 4, 3, 5, 8]
+    assert scores.tolist() == [5, 4, 4, 4, 4]
+
+
+def test_best_breaks_ties_by_rating_then_position():
+    scores = np.array([1.0, 2.0, 2.0, 2.0, 0.0])
+    ratings = np.array([9.0, 7.0, 8.0, 7.0, 9.0])
+    assert _best(scores, ratings, 3).tolist() == [2, 1, 3]
+
+
+def test_diversify_caps_each_primary_genre(movies):
+    columns = MovieDataStore.from_dicts(movies).columns
+    rows = columns.view_rows()[:10]
+    kept = _diversify(columns, rows, limit=4)
+    assert len(kept) == 4
+    primaries = [columns.field(int(r), "genres").split(",")[0] for r in kept]
+    assert max(primaries.count(g) for g in primaries) <= 2
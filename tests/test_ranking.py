@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.models.columnar import MovieColumns
+from app.services.ranking import top_k, top_k_rows, popular_rows, highest_rated_rows
+
+
+def test_top_k_breaks_ties_by_position():
+    scores = np.array([1.0, 3.0, 2.0, 3.0, 2.0, 2.0])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 4, 5, 0]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_top_k_matches_a_stable_sort():
+    scores = np.random.default_rng(0).integers(0, 5, size=200).astype(float)
+    for k in (1, 7, 50):
+        assert top_k(scores, k).tolist() == np.argsort(-scores, kind="stable")[:k].tolist()
+
+
+def test_top_k_rows_matches_top_k_per_row():
+    scores = np.random.default_rng(1).integers(0, 4, size=(30, 40)).astype(float)
+    scores[:, 5] = -np.inf
+    positions, values = top_k_rows(scores, 6)
+    for row, got, got_scores in zip(scores, positions, values):
+        assert got.tolist() == top_k(row, 6).tolist()
+        assert got_scores.tolist() == row[got].tolist()
+
+
+def test_catalog_rankings_skip_dead_and_unrated_rows(movies):
+    columns = MovieColumns.from_dicts(movies)
+    columns = columns.retire(columns.rows_for_ids([1]))
+    assert columns.ids[popular_rows(columns)][:2].tolist() == [3, 4]
+    rated = columns.ids[highest_rated_rows(columns)].tolist()
+    assert rated[0] == 2 and 1 not in rated and 11 not in rated
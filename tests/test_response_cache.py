@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+from flask import Flask, jsonify, request
+
+from app.models.data_loader import MovieDataStore
+from app.services.response_cache import ResponseCache, cached_response
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl=10)
+    now = [0.0]
+    monkeypatch.setattr("app.services.response_cache.time.monotonic", lambda: now[0])
+    for key in "abc":
+        cache.get_or_compute(key, lambda: (key, True))
+    assert cache.get_or_compute("a", lambda: ("a2", True)) == ("a2", False)  # evicted
+    assert cache.get_or_compute("c", lambda: ("c2", True)) == ("c", True)
+    now[0] = 11
+    assert cache.get_or_compute("c", lambda: ("c3", True)) == ("c3", False)
+    assert cache.stats()["expirations"] == 1 and cache.stats()["evictions"] >= 1
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "body", True
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                 for _ in range(4)]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader] + followers:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(results) == [("body", False)] + [("body", True)] * 4
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_failures_and_uncacheable_results_are_not_stored():
+    cache = ResponseCache()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: ("error", False)) == ("error", False)
+    assert cache.get_or_compute("k", lambda: ("ok", True)) == ("ok", False)
+    assert cache.get_or_compute("k", lambda: ("other", True)) == ("ok", True)
+
+
+def test_invalidate_drops_results_computed_before_it():
+    cache = ResponseCache()
+
+    def compute():
+        cache.invalidate()  # e.g. an admin write lands mid-computation
+        return "stale", True
+
+    cache.get_or_compute("k", compute)
+    assert cache.stats()["entries"] == 0
+
+
+def test_decorator_keys_on_query_and_catalog_version(movies):
+    app = Flask(__name__)
+    store = MovieDataStore.from_dicts(movies)
+    app.config.update(RESPONSE_CACHE=ResponseCache(), MOVIE_STORE=store)
+    calls = []
+
+    @app.route("/items")
+    @cached_response
+    def items():
+        calls.append(request.args.get("q"))
+        return jsonify(q=request.args.get("q"), version=store.version)
+
+    client = app.test_client()
+    assert client.get("/items?q=a&x=").headers["X-Cache"] == "MISS"
+    assert client.get("/items?x=&q=a").headers["X-Cache"] == "HIT"
+    assert client.get("/items?q=b").headers["X-Cache"] == "MISS"
+    store.install(store.columns, store.version + 1)
+    assert client.get("/items?q=a").get_json()["version"] == store.version
+    assert calls == ["a", "b", "a"]
@@ -0,0 +1,84 @@
+import threading
+
+from app.models.data_loader import MovieDataStore, apply_delta
+from app.services.search_engine import SearchEngine, FieldPostings, bounded_edit_distance, tokenize
+
+
+def titles(columns, rows):
+    return [columns.field(int(r), "title") for r in rows]
+
+
+def test_bm25f_prefers_title_matches(movies):
+    engine = SearchEngine(MovieDataStore.from_dicts(movies))
+    rows, scores, total = engine.search("godfather", limit=10)
+    assert titles(engine.store.columns, rows) == ["The Godfather", "The Godfather Part II"]
+    assert total == 2 and scores[0] >= scores[1]
+
+
+def test_quoted_phrases_must_match_in_order(movies):
+    engine = SearchEngine(MovieDataStore.from_dicts(movies))
+    rows, _, _ = engine.search('"robert de niro"', limit=10)
+    assert sorted(titles(engine.store.columns, rows)) == ["Heat", "The Godfather Part II"]
+    rows, _, _ = engine.search('"niro de robert"', limit=10)
+    assert len(rows) == 0
+
+
+def test_title_matches_rank_exact_titles_first(movies):
+    engine = SearchEngine(MovieDataStore.from_dicts(movies))
+    rows, scores = engine.title_matches("the godfather")
+    assert titles(engine.store.columns, rows) == ["The Godfather", "The Godfather Part II"]
+    assert scores.tolist() == [100, 90]
+
+
+def test_prefix_expansion_is_not_truncated(movies):
+    # Many vocabulary words sort between "w" and "wars"
+    fillers = [dict(movies[0], id=100 + i, title=f"Star Wa{i:03d}") for i in range(120)]
+    engine = SearchEngine(MovieDataStore.from_dicts(movies + fillers))
+    rows, _ = engine.title_matches("star w")
+    found = titles(engine.store.columns, rows)
+    assert "Star Wars" in found and len(found) == 121
+
+
+def test_deltas_are_indexed_incrementally(movies):
+    store = MovieDataStore.from_dicts(movies)
+    engine = SearchEngine(store)
+    index, _ = engine.index()
+    store.install(apply_delta(store.columns, [dict(movies[4], title="Aliens")], deleted_ids=[7]), 1)
+    assert engine.index()[0] is index
+    rows, _, _ = engine.search("aliens", limit=10)
+    assert titles(store.columns, rows) == ["Aliens"]
+    assert len(engine.search("toy", limit=10)[0]) == 0  # deleted rows stay indexed but never match
+
+
+def test_fuzzy_search_corrects_misspelled_words(movies):
+    engine = SearchEngine(MovieDataStore.from_dicts(movies))
+    rows, _, _, corrections = engine.fuzzy_search("godfahter", limit=10)
+    assert corrections == {"godfahter": ["godfather"]}
+    assert titles(engine.store.columns, rows)[0] == "The Godfather"
+
+
+def test_bounded_edit_distance():
+    assert bounded_edit_distance("kitten", "sitting", 3) == 3
+    assert bounded_edit_distance("kitten", "sitting", 1) == 2
+    assert bounded_edit_distance("ab", "ba", 1) == 1
+
+
+def test_postings_stay_consistent_while_appending():
+    postings = FieldPostings()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            rows, tf = postings.term("word")
+            if len(rows) != len(tf):
+                errors.append((len(rows), len(tf)))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for row in range(20000):
+        postings.add(row, tokenize("word other word"))
+    stop.set()
+    reader.join()
+    assert not errors
+    assert postings.term("word")[1][:1].tolist() == [2.0]
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.database import db
+from app.models.data_loader import MovieDataStore
+from app.models.movie import Movie
+from app.services.artifacts import ArtifactStore
+from app.services.catalog_sync import CatalogSync
+from app.services.recommender import MovieRecommender
+from app.services.shared_catalog import SharedCatalog, DELTA_DIR
+
+
+@pytest.fixture
+def shared(db_app, movies, tmp_path):
+    for movie in movies:
+        db.session.add(Movie(**{k: v for k, v in movie.items() if k not in ("img", "created_at")}))
+    db.session.commit()
+    return SharedCatalog(ArtifactStore(str(tmp_path / "models")))
+
+
+def worker(shared):
+    """One worker process: its own store and sync over the shared artifacts"""
+    store = MovieDataStore()
+    shared.load(store)
+    return store, CatalogSync(store, MovieRecommender(store), shared=shared)
+
+
+def snapshots(shared):
+    return sorted(k for k in os.listdir(shared.root) if not k.startswith(".") and "-" in k)
+
+
+def test_workers_map_one_published_snapshot(shared):
+    first, _ = worker(shared)
+    second, _ = worker(shared)
+    assert first.columns.generation == second.columns.generation
+    assert not second.columns.ids.flags.writeable  # a read-only map, not a private copy
+    assert second.get_all_movies()[:] == first.get_all_movies()[:]
+    assert len(snapshots(shared)) == 1
+
+
+def test_deltas_are_small_records_every_worker_applies_alike(shared):
+    store_a, sync_a = worker(shared)
+    store_b, sync_b = worker(shared)
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.get(Movie, 3).rating = 1.0
+    db.session.delete(db.session.get(Movie, 5))
+    db.session.commit()
+
+    assert sync_a.poll() == 3
+    assert sync_b.poll() == 3
+    for store in (store_a, store_b):
+        assert store.get_movie_by_id(3)["rating"] == 1.0 and store.get_movie_by_id(5) is None
+    assert np.array_equal(store_a.columns.ids, store_b.columns.ids)
+    assert np.array_equal(store_a.columns.alive, store_b.columns.alive)
+    assert store_a.version == store_b.version
+    # Only the record was written; the snapshot stays as published
+    assert len(snapshots(shared)) == 1
+    assert len(os.listdir(os.path.join(shared.root, DELTA_DIR))) == 1
+
+
+def test_a_new_worker_replays_the_records_instead_of_rebuilding(shared):
+    store_a, sync_a = worker(shared)
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.commit()
+    sync_a.poll()
+    store_c, _ = worker(shared)
+    assert store_c.columns.generation == store_a.columns.generation
+    assert store_c.version == store_a.version
+    assert np.array_equal(store_c.columns.ids, store_a.columns.ids)
+
+
+def test_an_unrecorded_database_change_forces_a_rebuild(shared):
+    store_a, _ = worker(shared)
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.commit()
+    store_c, _ = worker(shared)
+    assert store_c.columns.generation == store_a.columns.generation + 1
+    assert store_c.get_all_movies()[-1]["title"] == "Brand New"
+
+
+def test_the_chain_stops_at_a_gap(shared):
+    shared.publish_delta(0, 5, 6, [], [1])
+    shared.publish_delta(0, 7, 8, [], [2])
+    assert [r["version"] for r in shared.deltas(0, 5)] == [6]
+    assert shared.deltas(0, 6) == []
+
+
+def test_rebuilds_fold_deltas_and_prune_old_generations(shared):
+    store_a, sync_a = worker(shared)
+    generation = store_a.columns.generation
+    db.session.add(Movie(title="Brand New", genres="Drama"))
+    db.session.commit()
+    sync_a.poll()
+    shared.publish(*store_a.build_columns(generation=generation + 1))
+    shared.publish(*store_a.build_columns(generation=generation + 2))
+    assert shared.deltas(generation, 0) == []
+    assert len(snapshots(shared)) == 2  # the previous one stays for late readers
+    store_b, _ = worker(shared)
+    assert store_b.columns.generation == generation + 2
+    assert store_b.get_all_movies()[-1]["title"] == "Brand New"
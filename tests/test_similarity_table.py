@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.models.data_loader import MovieDataStore
+from app.services.artifacts import ArtifactStore
+from app.services.catalog_sync import CatalogSync
+from app.services.content_model import ContentModel
+from app.services.recommender import MovieRecommender
+from app.services.similarity_table import SimilarityTable
+
+
+def boot(movies, artifacts, weights=None):
+    """What create_app does for content similarity: map artifacts, then warm up off the request path"""
+    ratings = {1: {"rated_movies": {1: 5, 2: 4, 9: 4}}, 2: {"rated_movies": {3: 5, 4: 5, 5: 3}}}
+    recommender = MovieRecommender(MovieDataStore.from_dicts(movies), ratings, artifacts=artifacts)
+    recommender.field_weights = weights
+    recommender.preload_content()
+    CatalogSync(recommender.store, recommender).warm_models()
+    return recommender
+
+
+def test_neighbours_match_a_brute_force_scan(movies):
+    model = ContentModel.fit(MovieDataStore.from_dicts(movies).columns)
+    table = SimilarityTable.build(model, k=3, block_cells=16)  # several blocks
+    sims = model.similarities(model.vectors)
+    for row in range(len(movies)):
+        expected = sims[row].copy()
+        expected[row] = -np.inf
+        got = table.neighbors(row, model.columns, 3)
+        assert np.allclose(sorted(sims[row, got]), sorted(np.sort(expected)[-3:]), atol=1e-2)
+
+
+def test_asking_for_more_than_k_falls_back(movies):
+    model = ContentModel.fit(MovieDataStore.from_dicts(movies).columns)
+    assert SimilarityTable.build(model, k=3).neighbors(0, model.columns, 4) is None
+
+
+def test_second_boot_loads_the_model_and_table(movies, tmp_path, monkeypatch):
+    artifacts = ArtifactStore(str(tmp_path))
+    first = boot(movies, artifacts)
+    assert first._ensure_tfidf_matrix().neighbors is not None
+
+    def refit(*args, **kwargs):
+        pytest.fail("second boot refit instead of loading the artifacts")
+    monkeypatch.setattr(ContentModel, "fit", refit)
+    monkeypatch.setattr(SimilarityTable, "build", refit)
+    second = boot(movies, artifacts)
+    model = second._ensure_tfidf_matrix()
+    assert model.neighbors is not None
+    assert np.array_equal(model.neighbors.neighbor_ids, first._ensure_tfidf_matrix().neighbors.neighbor_ids)
+
+
+def test_table_from_other_weights_is_not_loaded(movies, tmp_path):
+    artifacts = ArtifactStore(str(tmp_path))
+    model = boot(movies, artifacts)._ensure_tfidf_matrix()
+    assert SimilarityTable.load(artifacts, model.checksum, model.space, model.params) is not None
+    other = dict(model.params, weights=dict(model.params["weights"], genres=5.0))
+    assert SimilarityTable.load(artifacts, model.checksum, model.space, other) is None
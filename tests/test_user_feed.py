@@ -0,0 +1,68 @@
+import json
+import time
+
+import pytest
+
+from app.database import db
+from app.models.data_loader import MovieDataStore
+from app.models.users import User, UserFeed, QuizResult
+from app.services.jobs import JobScheduler
+from app.services.quiz_cache import QuizCandidateCache
+from app.services.recommender import MovieRecommender
+from app.services.search_engine import SearchEngine
+from app.services.user_feed import Feed, UserFeeds
+
+
+@pytest.fixture
+def feeds(db_app, movies):
+    store = MovieDataStore.from_dicts(movies)
+    recommender = MovieRecommender(store)
+    quiz_cache = QuizCandidateCache(store, SearchEngine(store), recommender)
+    # Workers are never started: queued refreshes only run when a test runs them
+    feeds = UserFeeds(JobScheduler(db_app), store, recommender, quiz_cache, size=5)
+    db.session.add(User(id=1, name="Ann", email="ann@example.com", password_hash="x"))
+    db.session.commit()
+    return feeds
+
+
+def test_miss_serves_a_provisional_feed_and_queues_a_refresh(feeds):
+    feed = feeds.get(1)
+    assert feed.provisional and feed.source == "popular"
+    assert feeds.scheduler.stats()["queued"] == 1
+    assert db.session.get(UserFeed, 1) is None
+    # Coalesced with the refresh already queued
+    feeds.get(1)
+    assert feeds.scheduler.stats()["queued"] == 1
+
+
+def test_provisional_feed_follows_the_latest_quiz(feeds):
+    db.session.add(QuizResult(user_id=1, profile_type="explorer", profile_name="Explorer",
+                              profile_description="", top_genres=json.dumps(["Sci-Fi"]),
+                              tags=json.dumps([]), quiz_answers="{}"))
+    db.session.commit()
+    feed = feeds.get(1)
+    assert feed.provisional and feed.source == "quiz" and feed.profile_name == "Explorer"
+    assert set(feed.movie_ids) <= {3, 4, 5, 6}
+
+
+def test_refresh_stores_the_feed_for_every_worker(feeds, movies):
+    feeds._refresh(1)
+    db.session.remove()
+    feed = feeds.get(1)
+    assert not feed.provisional and feed.source == "popular"
+    assert [m["id"] for m in feed.hydrate(feeds.store.columns)] == feed.movie_ids
+
+
+def test_an_older_computation_never_replaces_a_newer_feed(feeds):
+    now = time.time()
+    feeds._save(1, Feed([1, 2], "als", "newer", computed_at=now))
+    feeds._save(1, Feed([3, 4], "popular", "older", computed_at=now - 10))
+    assert feeds.get(1).movie_ids == [1, 2]
+    feeds._save(1, Feed([5], "quiz", "newest", computed_at=now + 10))
+    assert feeds.get(1).movie_ids == [5]
+
+
+def test_stale_feeds_are_served_and_refreshed(feeds):
+    feeds._save(1, Feed([1, 2], "als", "old", computed_at=time.time() - feeds.max_age - 1))
+    assert feeds.get(1).movie_ids == [1, 2]
+    assert feeds.scheduler.stats()["queued"] == 1